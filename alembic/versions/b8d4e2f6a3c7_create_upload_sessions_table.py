@@ -0,0 +1,46 @@
+"""create upload_sessions table
+
+Revision ID: b8d4e2f6a3c7
+Revises: f7c3a9e1b5d2
+Create Date: 2026-10-19 18:02:45.305117
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b8d4e2f6a3c7"
+down_revision: Union[str, None] = "f7c3a9e1b5d2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    op.create_table(
+        "upload_sessions",
+        sa.Column("id", sa.String(64), primary_key=True),
+        sa.Column(
+            "owner_id",
+            sa.Integer(),
+            sa.ForeignKey("users.id", ondelete="SET NULL"),
+            nullable=True,
+        ),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.Column("filename", sa.String(255), nullable=False),
+        sa.Column("content_type", sa.String(127), nullable=True),
+        sa.Column("size", sa.BigInteger(), nullable=False),
+        sa.Column("part_size", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(16), nullable=False),
+        sa.Column("storage_upload_id", sa.String(255), nullable=False),
+    )
+    op.create_index("ix_upload_sessions_expires_at", "upload_sessions", ["expires_at"])
+
+
+def downgrade():
+    op.drop_index("ix_upload_sessions_expires_at", table_name="upload_sessions")
+    op.drop_table("upload_sessions")
@@ -0,0 +1,46 @@
+"""create reports table
+
+Revision ID: c3e1f7a9b2d4
+Revises: a8c94d2f2887
+Create Date: 2026-10-19 10:12:41.305118
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c3e1f7a9b2d4"
+down_revision: Union[str, None] = "a8c94d2f2887"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    op.create_table(
+        "reports",
+        sa.Column("id", sa.String(64), primary_key=True),
+        sa.Column(
+            "owner_id",
+            sa.Integer(),
+            sa.ForeignKey("users.id", ondelete="SET NULL"),
+            nullable=True,
+        ),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("duration_sec", sa.Float(), nullable=True),
+        sa.Column("language", sa.String(16), nullable=True),
+        sa.Column("status", sa.String(16), nullable=False),
+        sa.Column("source_path", sa.String(), nullable=False),
+        sa.Column("artifacts", sa.JSON(), nullable=False),
+    )
+    op.create_index(
+        "ix_reports_owner_created", "reports", ["owner_id", "created_at", "id"]
+    )
+
+
+def downgrade():
+    op.drop_index("ix_reports_owner_created", table_name="reports")
+    op.drop_table("reports")
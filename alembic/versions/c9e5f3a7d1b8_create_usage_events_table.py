@@ -0,0 +1,46 @@
+"""create usage_events table
+
+Revision ID: c9e5f3a7d1b8
+Revises: b8d4e2f6a3c7
+Create Date: 2026-10-19 21:14:08.512904
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c9e5f3a7d1b8"
+down_revision: Union[str, None] = "b8d4e2f6a3c7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    op.create_table(
+        "usage_events",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("principal", sa.String(128), nullable=False),
+        sa.Column(
+            "owner_id",
+            sa.Integer(),
+            sa.ForeignKey("users.id", ondelete="SET NULL"),
+            nullable=True,
+        ),
+        sa.Column("endpoint", sa.String(64), nullable=False),
+        sa.Column("status_code", sa.Integer(), nullable=False),
+        sa.Column("audio_seconds", sa.Float(), nullable=False),
+        sa.Column("llm_tokens", sa.Integer(), nullable=False),
+    )
+    op.create_index("ix_usage_events_created_at", "usage_events", ["created_at"])
+    op.create_index("ix_usage_events_principal", "usage_events", ["principal"])
+
+
+def downgrade():
+    op.drop_index("ix_usage_events_principal", table_name="usage_events")
+    op.drop_index("ix_usage_events_created_at", table_name="usage_events")
+    op.drop_table("usage_events")
@@ -0,0 +1,75 @@
+"""create report search index
+
+Revision ID: e5b2d8c4a1f6
+Revises: c3e1f7a9b2d4
+Create Date: 2026-10-19 14:37:05.918204
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e5b2d8c4a1f6"
+down_revision: Union[str, None] = "c3e1f7a9b2d4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SQLITE_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS report_chunks_fts USING fts5("
+    "text, content='report_chunks', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3 4')",
+    "CREATE TRIGGER IF NOT EXISTS report_chunks_ai AFTER INSERT ON report_chunks BEGIN "
+    "INSERT INTO report_chunks_fts(rowid, text) VALUES (new.id, new.text); END",
+    "CREATE TRIGGER IF NOT EXISTS report_chunks_ad AFTER DELETE ON report_chunks BEGIN "
+    "INSERT INTO report_chunks_fts(report_chunks_fts, rowid, text) "
+    "VALUES ('delete', old.id, old.text); END",
+]
+SQLITE_FTS_DROP = [
+    "DROP TRIGGER IF EXISTS report_chunks_ad",
+    "DROP TRIGGER IF EXISTS report_chunks_ai",
+    "DROP TABLE IF EXISTS report_chunks_fts",
+]
+POSTGRES_FTS_DDL = [
+    "ALTER TABLE report_chunks ADD COLUMN IF NOT EXISTS tsv tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('simple', text)) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_report_chunks_tsv ON report_chunks USING GIN (tsv)",
+]
+
+
+def upgrade():
+    op.create_table(
+        "report_chunks",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "report_id",
+            sa.String(64),
+            sa.ForeignKey("reports.id", ondelete="CASCADE"),
+            nullable=False,
+            index=True,
+        ),
+        sa.Column("owner_id", sa.Integer(), nullable=True),
+        sa.Column("kind", sa.String(16), nullable=False),
+        sa.Column("field", sa.String(32), nullable=True),
+        sa.Column("start", sa.Float(), nullable=True),
+        sa.Column("end", sa.Float(), nullable=True),
+        sa.Column("speaker", sa.String(64), nullable=True),
+        sa.Column("text", sa.Text(), nullable=False),
+    )
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        for stmt in SQLITE_FTS_DDL:
+            op.execute(stmt)
+    elif dialect == "postgresql":
+        for stmt in POSTGRES_FTS_DDL:
+            op.execute(stmt)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == "sqlite":
+        for stmt in SQLITE_FTS_DROP:
+            op.execute(stmt)
+    op.drop_table("report_chunks")
@@ -0,0 +1,40 @@
+"""create transcripts table
+
+Revision ID: f7c3a9e1b5d2
+Revises: e5b2d8c4a1f6
+Create Date: 2026-10-19 15:40:12.118204
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f7c3a9e1b5d2"
+down_revision: Union[str, None] = "e5b2d8c4a1f6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    op.create_table(
+        "transcripts",
+        sa.Column("id", sa.String(64), primary_key=True),
+        sa.Column(
+            "owner_id",
+            sa.Integer(),
+            sa.ForeignKey("users.id", ondelete="SET NULL"),
+            nullable=True,
+        ),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("language", sa.String(16), nullable=True),
+        sa.Column("text", sa.Text(), nullable=False),
+        sa.Column("segments", sa.JSON(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table("transcripts")
@@ -5,23 +5,33 @@ Authentication routes.
 import secrets
 from typing import Dict
 
-from fastapi import APIRouter, Header, HTTPException, status
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from sqlalchemy import delete, select
 
-from app.api.deps import AuthUserDep, DBSessionDep, TokenUserDep
-from app.core.security import get_password_hash
+from app.api.deps import AuthUserDep, DBSessionDep, TokenUserDep, api_key_header
 from app.models.user import APIToken, User
 from app.schemas.token import RefreshToken, Token
 from app.schemas.user import UserCreate, UserLogin, UserOut
 from app.services.auth import (
     authenticate_user,
     create_tokens_for_user,
+    forget_api_token,
+    hash_password,
     refresh_access_token,
 )
+from app.services.process_pool import PoolSaturated
 
 router = APIRouter()
 
 
+def _hashing_unavailable(e: PoolSaturated) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=f"Password hashing is saturated, retry later ({e})",
+        headers={"Retry-After": "1"},
+    )
+
+
 @router.post("/signup", response_model=UserOut, status_code=status.HTTP_201_CREATED)
 async def create_user(user_data: UserCreate, db: DBSessionDep) -> User:
     """Register a new user."""
@@ -35,10 +45,11 @@ async def create_user(user_data: UserCreate, db: DBSessionDep) -> User:
         )
 
     # Create new user
-    user = User(
-        username=user_data.username,
-        hashed_password=get_password_hash(user_data.password),
-    )
+    try:
+        hashed_password = await hash_password(user_data.password)
+    except PoolSaturated as e:
+        raise _hashing_unavailable(e)
+    user = User(username=user_data.username, hashed_password=hashed_password)
     db.add(user)
     await db.commit()
     await db.refresh(user)
@@ -51,7 +62,10 @@ async def login(
     db: DBSessionDep,
 ) -> Dict:
     """Authenticate user and return tokens."""
-    user = await authenticate_user(db, data.username, data.password)
+    try:
+        user = await authenticate_user(db, data.username, data.password)
+    except PoolSaturated as e:
+        raise _hashing_unavailable(e)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -109,4 +123,20 @@ async def create_api_token(
     db_token = APIToken(token=token_value, user_id=user.id)
     db.add(db_token)
     await db.commit()
+    forget_api_token(token_value)
     return {"api_token": token_value}
+
+
+@router.delete("/api-token", status_code=status.HTTP_204_NO_CONTENT)
+async def revoke_api_token(
+    db: DBSessionDep, api_token: str = Depends(api_key_header)
+) -> Response:
+    """Revoke the API token sent in X-API-Token."""
+    if not api_token:
+        raise HTTPException(status_code=401, detail="API token missing")
+    result = await db.execute(delete(APIToken).where(APIToken.token == api_token))
+    await db.commit()
+    forget_api_token(api_token)
+    if not result.rowcount:
+        raise HTTPException(status_code=401, detail="Invalid API token")
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -13,11 +13,13 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.core.config import settings
-from app.db.session import get_db
+from app.db.session import SessionFactory, get_db, get_session_factory
 from app.models.user import APIToken, User
 from app.schemas.token import TokenPayload
+from app.services.auth import cached_principal, principal_key, remember_principal
 
 DBSessionDep = Annotated[AsyncSession, Depends(get_db)]
+DBSessionFactoryDep = Annotated[SessionFactory, Depends(get_session_factory)]
 
 
 # OAuth2 scheme for token authentication
@@ -41,6 +43,12 @@ async def get_current_user(
         if len(token_seg) != 2 or token_seg[0] != "Bearer":
             raise credentials_exception
 
+        # Token already verified: no decoding, no query (entry bounded by exp)
+        cache_key = principal_key("jwt", token_seg[1])
+        cached = await cached_principal(db, cache_key)
+        if cached is not None:
+            return cached
+
         payload = jwt.decode(
             token_seg[1], settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
         )
@@ -54,11 +62,28 @@ async def get_current_user(
     user = cast(Optional[User], result.scalar_one_or_none())
     if user is None:
         raise credentials_exception
+    ttl = None
+    if token_data.exp:
+        ttl = (datetime.fromtimestamp(token_data.exp) - datetime.now()).total_seconds()
+    remember_principal(cache_key, user, ttl)
     return user
 
 
 AuthUserDep = Annotated[User, Depends(get_current_user)]
 
+
+async def get_optional_user(
+    db: DBSessionDep,
+    token: str = Depends(oauth2_scheme),
+) -> Optional[User]:
+    """Current user if an Authorization header is sent, None for anonymous calls."""
+    if not token:
+        return None
+    return await get_current_user(db, token)
+
+
+OptionalUserDep = Annotated[Optional[User], Depends(get_optional_user)]
+
 api_key_header = APIKeyHeader(name="X-API-Token", auto_error=False)
 
 
@@ -68,6 +93,11 @@ async def get_current_user_token(
     if not api_token:
         raise HTTPException(status_code=401, detail="API token missing")
 
+    cache_key = principal_key("api", api_token)
+    cached = await cached_principal(db, cache_key)
+    if cached is not None:
+        return cached
+
     result = await db.execute(
         select(APIToken)
         .options(selectinload(APIToken.user))
@@ -76,7 +106,9 @@ async def get_current_user_token(
     token_record = cast(Optional[APIToken], result.scalar_one_or_none())
     if not token_record:
         raise HTTPException(status_code=401, detail="Invalid API token")
-    return cast(User, token_record.user)
+    user = cast(User, token_record.user)
+    remember_principal(cache_key, user)
+    return user
 
 
 TokenUserDep = Annotated[User, Depends(get_current_user_token)]
@@ -4,7 +4,11 @@ Health check endpoints.
 
 from fastapi import APIRouter, status
 from pydantic import BaseModel
-from typing import Dict
+from typing import Any, Dict
+
+from app.db.session import sessionmanager
+from app.services.notes_cache import notes_cache
+from app.services.retention import retention
 
 router = APIRouter()
 
@@ -20,3 +24,21 @@ class HealthStatusOutput(BaseModel):
 async def health_check() -> Dict:
     """Health check endpoint."""
     return {"status": "healthy"}
+
+
+@router.get("/health/db", status_code=status.HTTP_200_OK)
+async def database_pool() -> Dict[str, Any]:
+    """Database connection pool usage."""
+    return sessionmanager.pool_stats()
+
+
+@router.get("/health/notes-cache", status_code=status.HTTP_200_OK)
+async def notes_cache_stats() -> Dict[str, Any]:
+    """Structured notes cache usage (hit ratio, bytes stored)."""
+    return notes_cache.stats()
+
+
+@router.get("/health/storage", status_code=status.HTTP_200_OK)
+async def storage_stats() -> Dict[str, Any]:
+    """Stored bytes against the retention limits, and bytes reclaimed so far."""
+    return retention.stats()
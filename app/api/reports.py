@@ -1,10 +1,40 @@
-from typing import Optional
-import os, json, traceback
+from typing import Any, AsyncIterator, Optional
+import asyncio, json, logging, traceback
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, Query, Form
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi import (
+    APIRouter,
+    UploadFile,
+    File,
+    HTTPException,
+    Query,
+    Form,
+    Request,
+    WebSocket,
+    WebSocketDisconnect,
+)
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.schemas.reports import TranscribeResponse, Transcript, TranscriptSegment
+from app.api.deps import (
+    AuthUserDep,
+    DBSessionDep,
+    DBSessionFactoryDep,
+    OptionalUserDep,
+    get_current_user,
+)
+from app.core.config import settings
+from app.models.user import User
+from app.schemas.reports import (
+    ReportOut,
+    ReportPage,
+    SearchHit,
+    SearchResponse,
+    SimilarResponse,
+    TranscribeResponse,
+    Transcript,
+    TranscriptSegment,
+)
 from app.services.transcription import (
     transcribe_audio,
     TranscriptionError,
@@ -12,21 +42,48 @@ from app.services.transcription import (
 )
 from app.services.notes import (
     generate_structured_notes,
-    render_markdown,
-    save_markdown,
-    generate_pdf_report,
+    stream_structured_notes,
     make_report_id,
 )
+from app.services.live import LiveTranscription
+from app.services.llm import LLMTimeoutError
+from app.services.process_pool import PoolSaturated
+from app.services.retention import retention
+from app.services.artifacts import ArtifactNotFound, artifact_store, save_report_source
+from app.services.search import SearchUnavailable, index_report, search_chunks
+from app.services.storage import storage_response
+from app.services.similarity import index_chunks, similar_chunks, similar_reports
+from app.services.transcripts import (
+    TranscriptNotFound,
+    load_transcript,
+    save_transcript,
+)
+from app.services.uploads import UploadNotFound, load_upload, uploaded_audio
+from app.services.report_index import (
+    InvalidCursor,
+    list_reports,
+    record_artifact,
+    record_report,
+)
 from app.models.notes import NotesResponse, MeetingSummary
 
 router = APIRouter(prefix="/reports", tags=["reports"])
+logger = logging.getLogger(__name__)
+
 
-DATA_ROOT = os.getenv("DATA_ROOT", "/data/reports")
+def _owner_id(user: Optional[User]) -> Optional[int]:
+    return int(user.id) if user else None
 
 
 @router.post("/transcribe", response_model=TranscribeResponse)
 async def transcribe_endpoint(
-    file: UploadFile = File(...),
+    db: DBSessionDep,
+    user: OptionalUserDep,
+    file: Optional[UploadFile] = File(default=None),
+    upload_id: Optional[str] = Query(
+        default=None,
+        description="session d'upload complétée (/reports/uploads), à la place de file",
+    ),
     language_hint: str | None = Query(default=None, description="ex: 'fr', 'en'"),
     diarization: str = Query(
         default="none",
@@ -43,16 +100,18 @@ async def transcribe_endpoint(
         default=4,
         ge=1,
         le=8,
-        description="Nombre max. de speakers (approximation, round-robin)"
+        description="Nombre max. de speakers (approximation, round-robin)",
     ),
-):
+) -> TranscribeResponse:
 
     lang_hint_clean=(language_hint or "").strip() if language_hint is not None else ""
     if lang_hint_clean.lower()=="auto":
         lang_hint_clean=""
+    if not file and not upload_id:
+        raise HTTPException(
+            status_code=400, detail="Provide either 'file' or 'upload_id'."
+        )
     try:
-        content = await file.read()
-       
         '''if diarization == "advanced":
             text, segs, lang = await transcribe_audio_with_advanced_diarization(
                 content,
@@ -71,10 +130,8 @@ async def transcribe_endpoint(
                     gap_threshold=gap_threshold,
                     max_speakers=2,
                 )'''
-        text, segs, lang = await transcribe_audio(
-            content,
-            file.filename,
-            lang_hint_clean or None,
+        text, segs, lang = await _transcribe_input(
+            db, user, file, upload_id, lang_hint_clean
         )
         if diarization == "alternate":
             segs = assign_speakers_round_robin(
@@ -87,56 +144,114 @@ async def transcribe_endpoint(
             text=text or "",
             segments=[TranscriptSegment(**s) for s in segs],
         )
-        return TranscribeResponse(transcript=transcript)
+        transcript_id = await save_transcript(
+            db,
+            transcript.text,
+            [s.model_dump() for s in transcript.segments],
+            lang,
+            owner_id=_owner_id(user),
+        )
+        return TranscribeResponse(transcript=transcript, transcript_id=transcript_id)
 
+    except HTTPException:
+        raise
     except TranscriptionError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print("TRACE:\n", traceback.format_exc(), flush=True)
         raise HTTPException(status_code=500, detail=f"Transcription failed: {e}")
-    
-@router.post("/notes", response_model=NotesResponse)
-async def generate_notes_endpoint(
-    file: Optional[UploadFile] = File(default=None),
-    transcript: Optional[str] = Form(default=None),
-    language_hint: str = Form(default="auto"),
-    diarization: str = Form(default="none"),
-    gap_threshold: float = Form(default=1.0),
-    export_pdf: bool = Form(default=False),
-):
+
+
+async def _transcribe_input(
+    db: AsyncSession,
+    owner: Optional[User],
+    file: Optional[UploadFile],
+    upload_id: Optional[str],
+    lang_hint_clean: str,
+) -> tuple[str, list[dict], Optional[str]]:
     """
-    Génèration des notes de réunion 
+    Transcription du fichier envoyé, ou de l'audio d'une session d'upload
+    (upload_id), lu depuis le stockage sans transiter par la requête.
     """
-    if not file and not transcript:
-        raise HTTPException(status_code=400, detail="Provide either 'file' or 'transcript'.")
+    if upload_id:
+        try:
+            session = await load_upload(db, upload_id, _owner_id(owner))
+        except UploadNotFound:
+            raise HTTPException(status_code=404, detail="Upload not found")
+        if session.status != "complete":
+            raise HTTPException(status_code=409, detail="Upload is not complete")
+        async with uploaded_audio(artifact_store.storage, session) as path:
+            text, segs, lang = await transcribe_audio(
+                path, str(session.filename), lang_hint_clean or None
+            )
+        return text, segs, lang
+    assert file is not None  # vérifié par l'appelant
+    content = await file.read()
+    text, segs, lang = await transcribe_audio(
+        content, file.filename or "", lang_hint_clean or None
+    )
+    return text, segs, lang
+
 
-    
+def _clean_language_hint(language_hint: Optional[str]) -> str:
     lang_hint_clean = (language_hint or "").strip()
     if lang_hint_clean.lower() == "auto":
         lang_hint_clean = ""
+    return lang_hint_clean
+
+
+async def _resolve_transcript(
+    db: AsyncSession,
+    owner: Optional[User],
+    file: Optional[UploadFile],
+    transcript: Optional[str],
+    transcript_id: Optional[str],
+    lang_hint_clean: str,
+    upload_id: Optional[str] = None,
+) -> tuple[str, Optional[list[dict]], Optional[str]]:
+    """
+    Transcript à résumer : transcript enregistré (transcript_id),
+    transcription du fichier ou de l'audio envoyé (upload_id), ou texte/JSON
+    fourni. Renvoie (texte, segments, langue).
+    """
+    if not file and not transcript and not transcript_id and not upload_id:
+        raise HTTPException(
+            status_code=400,
+            detail="Provide either 'file', 'upload_id', 'transcript' or 'transcript_id'.",
+        )
 
     transcript_text: Optional[str] = None
+    segments: Optional[list[dict]] = None
     lang: Optional[str] = None  
 
-    if file:
-        content = await file.read()
+    if transcript_id:
         try:
-            text, segs, lang_detected = await transcribe_audio(
-                content,
-                file.filename,
-                lang_hint_clean or None,  
+            record = await load_transcript(db, transcript_id, _owner_id(owner))
+        except TranscriptNotFound:
+            raise HTTPException(status_code=404, detail="Transcript not found")
+        transcript_text = str(record.text)
+        segments = list(record.segments or []) or None
+        lang = str(record.language or lang_hint_clean) or None
+    elif file or upload_id:
+        try:
+            text, segs, lang_detected = await _transcribe_input(
+                db, owner, file, upload_id, lang_hint_clean
             )
             transcript_text = text
+            segments = segs
             if lang_detected:
                 lang = lang_detected
             elif lang_hint_clean:
                 lang = lang_hint_clean
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Transcription failed: {e}")
     else:
         try:
-            maybe = json.loads(transcript)
+            maybe = json.loads(transcript or "")
             transcript_text = maybe.get("text") or transcript
+            segments = maybe.get("segments") or None
         except Exception:
             transcript_text = transcript
 
@@ -145,64 +260,430 @@ async def generate_notes_endpoint(
 
     if not transcript_text or not transcript_text.strip():
         raise HTTPException(status_code=400, detail="Transcript is empty.")
+    return transcript_text, segments, lang
+
+
+def _render_unavailable(e: PoolSaturated) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail=f"PDF rendering is saturated, retry later ({e})",
+        headers={"Retry-After": "10"},
+    )
+
+
+async def _build_report(
+    db: AsyncSession,
+    owner: Optional[User],
+    summary: MeetingSummary,
+    transcript_text: str,
+    language: str,
+    export_pdf: bool,
+    segments: Optional[list[dict]] = None,
+) -> NotesResponse:
+    """
+    Enregistre la source du rapport (fichier + ligne dans la table reports),
+    l'indexe (plein texte et vecteurs) et renvoie la réponse associée.
+    Les exports ne sont pas rendus ici : leurs URLs déclenchent le rendu au
+    premier téléchargement (voir download_report_file).
+    """
+    report_id = make_report_id()
+    owner_id = _owner_id(owner)
+    source_path, source_bytes = await asyncio.to_thread(
+        save_report_source, report_id, summary, transcript_text, language, segments
+    )
+    await record_report(
+        db,
+        report_id,
+        source_path,
+        source_bytes,
+        language,
+        segments=segments,
+        owner_id=owner_id,
+    )
+    chunks = await index_report(
+        db,
+        report_id,
+        summary,
+        transcript_text,
+        segments=segments,
+        owner_id=owner_id,
+    )
+    # ligne du rapport et index plein texte validés ensemble
+    await db.commit()
+    try:
+        await index_chunks(chunks, owner_id)
+    except Exception:
+        # la recherche par similarité est secondaire : le rapport reste valide
+        logger.exception("vector indexing failed for report %s", report_id)
+
+    exports = {
+        "markdown_url": f"/reports/files/{report_id}/meeting-notes.md",
+        "pdf_url": (
+            f"/reports/files/{report_id}/meeting-report.pdf" if export_pdf else None
+        ),
+        "srt_url": (
+            f"/reports/files/{report_id}/meeting-transcript.srt" if segments else None
+        ),
+        "vtt_url": (
+            f"/reports/files/{report_id}/meeting-transcript.vtt" if segments else None
+        ),
+    }
+
+    return NotesResponse(
+        report_id=report_id,
+        language=language,
+        transcript_text=transcript_text,
+        summary=summary,
+        exports=exports,
+    )
+
+
+@router.post("/notes", response_model=NotesResponse)
+async def generate_notes_endpoint(
+    db: DBSessionDep,
+    user: OptionalUserDep,
+    file: Optional[UploadFile] = File(default=None),
+    transcript: Optional[str] = Form(default=None),
+    transcript_id: Optional[str] = Form(
+        default=None, description="transcript_id renvoyé par /reports/transcribe"
+    ),
+    upload_id: Optional[str] = Form(
+        default=None, description="session d'upload complétée (/reports/uploads)"
+    ),
+    language_hint: str = Form(default="auto"),
+    diarization: str = Form(default="none"),
+    gap_threshold: float = Form(default=1.0),
+    export_pdf: bool = Form(default=False),
+    strategy: Optional[str] = Form(
+        default=None,
+        pattern="^(single|sections)$",
+        description="single=un appel LLM; sections=extractions parallèles",
+    ),
+) -> JSONResponse:
+    """
+    Génèration des notes de réunion
+    """
+    lang_hint_clean = _clean_language_hint(language_hint)
+    transcript_text, segments, lang = await _resolve_transcript(
+        db, user, file, transcript, transcript_id, lang_hint_clean, upload_id
+    )
 
     try:
-        summary: MeetingSummary = generate_structured_notes(
+        summary: MeetingSummary = await generate_structured_notes(
             transcript_text,
-            lang or lang_hint_clean or None,  # au cas où
+            lang or lang_hint_clean or "auto",  # au cas où
+            segments=segments,
+            strategy=strategy,
         )
+    except LLMTimeoutError as e:
+        raise HTTPException(status_code=504, detail=f"Notes generation failed: {e}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Notes generation failed: {e}")
 
-    report_id = make_report_id()
-    out_dir = os.path.join(DATA_ROOT, report_id)
-    md_text = render_markdown(summary, transcript_text)
-    md_path = save_markdown(md_text, out_dir)
-    pdf_path = None
-    if export_pdf:
-        pdf_path = os.path.join(out_dir, "meeting-report.pdf")
-        generate_pdf_report(summary, transcript_text, pdf_path)
+    report = await _build_report(
+        db,
+        user,
+        summary,
+        transcript_text,
+        lang or lang_hint_clean or "unknown",
+        export_pdf,
+        segments=segments,
+    )
+    return JSONResponse(content=report.model_dump())
 
-    md_filename = os.path.basename(md_path)
-    pdf_filename = os.path.basename(pdf_path) if pdf_path else None
 
-    exports = {
-        "markdown_path": md_path,
-        "pdf_path": pdf_path,
-        "markdown_url": f"/reports/files/{report_id}/{md_filename}",
-        "pdf_url": f"/reports/files/{report_id}/{pdf_filename}" if pdf_filename else None,
-    }
+def _control_type(text: str) -> Optional[str]:
+    """Type d'un message de contrôle {"type": ...} ; None s'il est invalide."""
+    try:
+        payload = json.loads(text)
+    except json.JSONDecodeError:
+        return None
+    return payload.get("type") if isinstance(payload, dict) else None
+
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/notes/stream")
+async def generate_notes_stream_endpoint(
+    db: DBSessionDep,
+    session_factory: DBSessionFactoryDep,
+    user: OptionalUserDep,
+    file: Optional[UploadFile] = File(default=None),
+    transcript: Optional[str] = Form(default=None),
+    transcript_id: Optional[str] = Form(default=None),
+    upload_id: Optional[str] = Form(default=None),
+    language_hint: str = Form(default="auto"),
+    export_pdf: bool = Form(default=False),
+    strategy: Optional[str] = Form(default=None, pattern="^(single|sections)$"),
+) -> StreamingResponse:
+    """
+    Génération des notes en streaming (Server-Sent Events).
+    Événements : "section" (une section du résumé dès qu'elle est complète),
+    "report" (NotesResponse finale avec les exports), "error", puis "done".
+    """
+    lang_hint_clean = _clean_language_hint(language_hint)
+    transcript_text, segments, lang = await _resolve_transcript(
+        db, user, file, transcript, transcript_id, lang_hint_clean, upload_id
+    )
+
+    async def events() -> AsyncIterator[str]:
+        try:
+            summary: Optional[MeetingSummary] = None
+            async for kind, payload in stream_structured_notes(
+                transcript_text,
+                lang or lang_hint_clean or "auto",
+                segments=segments,
+                strategy=strategy,
+            ):
+                if kind == "section":
+                    yield _sse("section", payload)
+                else:
+                    summary = payload
+            assert summary is not None  # "summary" termine toujours le flux
+            # la session de la dépendance est fermée avant l'envoi du corps
+            # (FastAPI >= 0.106) : session propre au générateur
+            async with session_factory() as stream_db:
+                report = await _build_report(
+                    stream_db,
+                    user,
+                    summary,
+                    transcript_text,
+                    lang or lang_hint_clean or "unknown",
+                    export_pdf,
+                    segments=segments,
+                )
+            yield _sse("report", report.model_dump())
+        except HTTPException as e:
+            yield _sse("error", {"detail": e.detail, "status_code": e.status_code})
+        except Exception as e:
+            yield _sse("error", {"detail": f"Notes generation failed: {e}"})
+        yield _sse("done", {})
 
-    return JSONResponse(
-        content=NotesResponse(
-            report_id=report_id,
-            language=lang or lang_hint_clean or "unknown",
-            transcript_text=transcript_text,
-            summary=summary,
-            exports=exports,
-        ).model_dump()
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
+
+
+@router.websocket("/live")
+async def live_transcription_endpoint(
+    websocket: WebSocket,
+    session_factory: DBSessionFactoryDep,
+    token: Optional[str] = Query(
+        default=None,
+        description="JWT (les navigateurs n'envoient pas d'en-tête Authorization)",
+    ),
+    sample_rate: int = Query(default=settings.LIVE_SAMPLE_RATE, ge=8000, le=48000),
+    language_hint: str = Query(default="auto"),
+    notes: bool = Query(default=True, description="générer le rapport à la fin"),
+    export_pdf: bool = Query(default=False),
+    strategy: Optional[str] = Query(default=None, pattern="^(single|sections)$"),
+) -> None:
+    """
+    Transcription en direct d'une réunion.
+    Client -> serveur : trames binaires PCM 16 bits little-endian mono à
+    `sample_rate` Hz, puis {"type": "stop"} en fin de réunion.
+    Serveur -> client : {"type": "segment", "segment": TranscriptSegment} au
+    fil de l'eau (timestamps depuis le début du flux), {"type": "error"} pour
+    une fenêtre en échec, puis {"type": "transcript"} (transcript_id) et
+    {"type": "report"} (NotesResponse) avant la fermeture.
+    La base n'est ouverte que le temps de l'authentification puis de
+    l'enregistrement : aucune connexion n'est retenue pendant la réunion.
+    """
+    token = token or websocket.headers.get("authorization")
+    user: Optional[User] = None
+    if token:
+        if not token.startswith("Bearer "):
+            token = f"Bearer {token}"
+        try:
+            async with session_factory() as db:
+                user = await get_current_user(db, token)
+        except HTTPException:
+            await websocket.close(code=1008)
+            return
+    owner_id = _owner_id(user)
+    lang_hint_clean = _clean_language_hint(language_hint)
+
+    await websocket.accept()
+    live = LiveTranscription(sample_rate, lang_hint_clean or None)
+
+    async def forward_segments() -> None:
+        async for item in live.results():
+            if isinstance(item, Exception):
+                await websocket.send_json(
+                    {"type": "error", "detail": f"Transcription failed: {item}"}
+                )
+            else:
+                await websocket.send_json({"type": "segment", "segment": item})
+
+    sender = asyncio.create_task(forward_segments())
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            if message.get("bytes"):
+                live.feed(message["bytes"])
+            elif message.get("text"):
+                if _control_type(message["text"]) == "stop":
+                    break
+                await websocket.send_json(
+                    {"type": "error", "detail": 'Expected {"type": "stop"}.'}
+                )
+        live.finish()
+        await sender
+    except WebSocketDisconnect:
+        return
+    finally:
+        # toute sortie (fin normale, déconnexion, erreur) : fenêtres en cours
+        # et envoi arrêtés ; sans effet s'ils sont déjà terminés
+        live.cancel()
+        sender.cancel()
+
+    transcript_text = live.text
+    language = live.language or lang_hint_clean or "unknown"
+    if not transcript_text:
+        await websocket.send_json({"type": "error", "detail": "No speech detected."})
+        await websocket.close()
+        return
+
+    async with session_factory() as db:
+        transcript_id = await save_transcript(
+            db, transcript_text, live.segments, language, owner_id=owner_id
+        )
+    transcript = Transcript(
+        language=language,
+        text=transcript_text,
+        segments=[TranscriptSegment(**s) for s in live.segments],
+    )
+    await websocket.send_json(
+        {
+            "type": "transcript",
+            "transcript_id": transcript_id,
+            "transcript": transcript.model_dump(),
+        }
+    )
+
+    if notes:
+        try:
+            summary = await generate_structured_notes(
+                transcript_text, language, segments=live.segments, strategy=strategy
+            )
+            async with session_factory() as db:
+                report = await _build_report(
+                    db,
+                    user,
+                    summary,
+                    transcript_text,
+                    language,
+                    export_pdf,
+                    segments=live.segments,
+                )
+            await websocket.send_json({"type": "report", "report": report.model_dump()})
+        except Exception as e:
+            await websocket.send_json(
+                {"type": "error", "detail": f"Notes generation failed: {e}"}
+            )
+    await websocket.close()
+
+
+@router.get("", response_model=ReportPage)
+async def list_reports_endpoint(
+    db: DBSessionDep,
+    user: AuthUserDep,
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: Optional[str] = Query(
+        default=None, description="next_cursor de la page précédente"
+    ),
+) -> ReportPage:
+    """
+    Rapports de l'utilisateur courant, du plus récent au plus ancien
+    (pagination par curseur).
+    """
+    try:
+        rows, next_cursor = await list_reports(
+            db, int(user.id), limit=limit, cursor=cursor
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    items = [ReportOut.model_validate(row) for row in rows]
+    return ReportPage(items=items, next_cursor=next_cursor)
+
+
+@router.get("/search", response_model=SearchResponse)
+async def search_reports_endpoint(
+    db: DBSessionDep,
+    user: AuthUserDep,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(default=20, ge=1, le=100),
+) -> SearchResponse:
+    """
+    Recherche plein texte dans les transcripts et notes de l'utilisateur
+    courant. Chaque résultat donne le rapport, le segment (timestamps,
+    locuteur) ou le champ du résumé, et un extrait.
+    """
+    try:
+        hits = await search_chunks(db, q, int(user.id), limit=limit)
+    except SearchUnavailable as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    return SearchResponse(query=q, hits=[SearchHit(**hit) for hit in hits])
+
+
+@router.get("/similar", response_model=SimilarResponse)
+async def similar_reports_endpoint(
+    db: DBSessionDep,
+    user: AuthUserDep,
+    q: Optional[str] = Query(default=None, min_length=1, max_length=2000),
+    report_id: Optional[str] = Query(default=None),
+    limit: int = Query(default=10, ge=1, le=50),
+) -> SimilarResponse:
+    """
+    Recherche par similarité (embeddings) : passages proches d'un texte
+    libre (q), ou réunions aux sujets proches d'un rapport (report_id).
+    """
+    if (q is None) == (report_id is None):
+        raise HTTPException(
+            status_code=400, detail="Provide either 'q' or 'report_id'."
+        )
+    if q is not None:
+        hits = await similar_chunks(db, q, int(user.id), limit=limit)
+    else:
+        assert report_id is not None
+        hits = await similar_reports(db, report_id, int(user.id), limit=limit)
+    return SimilarResponse(
+        query=q, report_id=report_id, hits=[SearchHit(**hit) for hit in hits]
+    )
+
+
 @router.get("/files/{report_id}/{filename}")
-async def download_report_file(report_id: str, filename: str):
+async def download_report_file(
+    report_id: str, filename: str, request: Request, db: DBSessionDep
+) -> Response:
     """
     Sert un fichier de rapport (Markdown ou PDF) pour téléchargement.
     Utilisé par les URLs markdown_url / pdf_url renvoyées à Streamlit.
+    L'export est rendu à la première demande puis servi depuis le stockage.
+    Un export ne change plus une fois rendu : ETag fort, cache longue durée,
+    304 sur requête conditionnelle, plages d'octets, variante compressée.
     """
-    file_path = os.path.join(DATA_ROOT, report_id, filename)
-
-    if not os.path.isfile(file_path):
+    try:
+        key, media_type, rendered = await artifact_store.get(report_id, filename)
+    except ArtifactNotFound:
         raise HTTPException(status_code=404, detail="File not found")
+    except PoolSaturated as e:
+        raise _render_unavailable(e)
+    # rapport existant uniquement : pas de marqueur d'accès pour un id inconnu
+    # (écriture dans le stockage, marqueur en S3 : hors de la boucle)
+    await asyncio.to_thread(retention.record_access, report_id)
+    storage = artifact_store.storage
+    if rendered:
+        info = await asyncio.to_thread(storage.stat, key)
+        await record_artifact(db, report_id, key, info.size if info else 0)
 
-    # Déterminer le type MIME
-    if filename.endswith(".pdf"):
-        media_type = "application/pdf"
-    elif filename.endswith(".md"):
-        media_type = "text/markdown"
-    else:
-        media_type = "application/octet-stream"
-
-    return FileResponse(
-        file_path,
-        media_type=media_type,
-        filename=filename,
-    )
+    try:
+        return await storage_response(request, storage, key, media_type, filename)
+    except FileNotFoundError:  # évincé entre-temps par la rétention
+        raise HTTPException(status_code=404, detail="File not found")
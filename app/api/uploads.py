@@ -0,0 +1,157 @@
+"""
+Sessions d'upload audio (voir app/services/uploads.py).
+"""
+
+from datetime import datetime
+from typing import Dict, Optional, cast
+
+from fastapi import APIRouter, HTTPException, Path, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import DBSessionDep, OptionalUserDep
+from app.models.report import UploadSession
+from app.models.user import User
+from app.schemas.reports import UploadCreate, UploadPart, UploadSessionOut
+from app.services.artifacts import artifact_store
+from app.services.uploads import (
+    UploadIncomplete,
+    UploadNotFound,
+    abort_upload,
+    complete_upload,
+    create_upload,
+    expected_part_size,
+    list_received,
+    load_upload,
+    part_count,
+    part_targets,
+    receive_part,
+)
+
+router = APIRouter(prefix="/reports/uploads", tags=["uploads"])
+
+
+async def _session_out(session: UploadSession) -> UploadSessionOut:
+    storage = artifact_store.storage
+    received = await list_received(storage, session)
+    targets = (
+        part_targets(storage, session, received) if session.status == "pending" else {}
+    )
+    parts = []
+    for n in range(1, part_count(session) + 1):
+        uploaded = n not in targets
+        url = None
+        if not uploaded:
+            url = targets[n] or f"/reports/uploads/{session.id}/parts/{n}"
+        parts.append(
+            UploadPart(
+                part_number=n,
+                size=expected_part_size(session, n),
+                uploaded=uploaded,
+                url=url,
+            )
+        )
+    return UploadSessionOut(
+        upload_id=str(session.id),
+        filename=str(session.filename),
+        size=int(session.size),
+        part_size=int(session.part_size),
+        status=str(session.status),
+        expires_at=cast(datetime, session.expires_at),
+        parts=parts,
+    )
+
+
+def _owner_id(user: Optional[User]) -> Optional[int]:
+    return int(user.id) if user else None
+
+
+async def _load(
+    db: AsyncSession, user: Optional[User], upload_id: str
+) -> UploadSession:
+    try:
+        return await load_upload(db, upload_id, _owner_id(user))
+    except UploadNotFound:
+        raise HTTPException(status_code=404, detail="Upload not found")
+
+
+@router.post("", response_model=UploadSessionOut, status_code=status.HTTP_201_CREATED)
+async def create_upload_endpoint(
+    body: UploadCreate, db: DBSessionDep, user: OptionalUserDep
+) -> UploadSessionOut:
+    """
+    Ouvre une session d'upload : renvoie la taille des parties et, pour
+    chacune, l'URL où envoyer son contenu (PUT).
+    """
+    try:
+        session = await create_upload(
+            db,
+            artifact_store.storage,
+            body.filename,
+            body.size,
+            body.content_type,
+            owner_id=_owner_id(user),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return await _session_out(session)
+
+
+@router.get("/{upload_id}", response_model=UploadSessionOut)
+async def get_upload_endpoint(
+    upload_id: str, db: DBSessionDep, user: OptionalUserDep
+) -> UploadSessionOut:
+    """
+    État de la session (reprise après coupure) : parties reçues, cibles des
+    parties manquantes.
+    """
+    return await _session_out(await _load(db, user, upload_id))
+
+
+@router.put("/{upload_id}/parts/{part_number}")
+async def upload_part_endpoint(
+    upload_id: str,
+    request: Request,
+    db: DBSessionDep,
+    user: OptionalUserDep,
+    part_number: int = Path(ge=1),
+) -> Dict[str, int]:
+    """
+    Envoi d'une partie via l'API (stockage sans URL présignée) : corps brut,
+    écrit en flux, de la taille annoncée pour cette partie.
+    """
+    session = await _load(db, user, upload_id)
+    try:
+        size = await receive_part(
+            artifact_store.storage, session, part_number, request.stream()
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"part_number": part_number, "size": size}
+
+
+@router.post("/{upload_id}/complete", response_model=UploadSessionOut)
+async def complete_upload_endpoint(
+    upload_id: str, db: DBSessionDep, user: OptionalUserDep
+) -> UploadSessionOut:
+    """
+    Assemble les parties : l'audio est ensuite utilisable par
+    /reports/transcribe et /reports/notes (upload_id).
+    """
+    session = await _load(db, user, upload_id)
+    try:
+        await complete_upload(db, artifact_store.storage, session)
+    except UploadIncomplete as e:
+        raise HTTPException(
+            status_code=409, detail={"message": str(e), "missing_parts": e.missing}
+        )
+    return await _session_out(session)
+
+
+@router.delete("/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def abort_upload_endpoint(
+    upload_id: str, db: DBSessionDep, user: OptionalUserDep
+) -> Response:
+    """Abandonne la session et supprime l'audio déjà envoyé."""
+    session = await _load(db, user, upload_id)
+    await abort_upload(db, artifact_store.storage, session)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
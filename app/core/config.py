@@ -21,13 +21,120 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    # Utilisateurs authentifiés mis en cache par empreinte du jeton (par
+    # processus) : un jeton révoqué reste accepté au plus AUTH_CACHE_TTL_SEC
+    # par les autres workers. 0 désactive le cache.
+    AUTH_CACHE_TTL_SEC: float = 60.0
+    AUTH_CACHE_SIZE: int = 10000
+    # Coût bcrypt (2^rounds) ; un hash plus faible est refait à la connexion
+    # suivante (un hash plus fort est conservé). Hachage dans un pool de
+    # processus borné : au-delà de workers + queue, /auth/login et
+    # /auth/signup répondent 503.
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = os.cpu_count() or 2
+    PASSWORD_HASH_QUEUE_LIMIT: int = 64
     '''HF_API_TOKEN: str | None = None
     ASR_MODEL_ID: str = "openai/whisper-large-v3-turbo"
     BACKEND: str = "hf"'''
     OPENAI_API_KEY: str | None = None
+    # Endpoint compatible OpenAI (proxy, serveur local...) ; None = API OpenAI
+    OPENAI_BASE_URL: str | None = None
     ASR_MODEL_ID: str = "gpt-4o-mini-transcribe"   # ou "whisper-1"
     BACKEND: str = "openai"
 
+    # Diarisation par fenêtres (bibliothèque, pas encore exposée par l'API) :
+    # fenêtres diarisées en parallèle, speakers reliés entre fenêtres au-delà
+    # de ce seuil de similarité cosinus des embeddings
+    DIARIZATION_WORKERS: int = 2
+    SPEAKER_LINK_THRESHOLD: float = 0.55
+
+    # Notes (LLM)
+    NOTES_MODEL_ID: str = "gpt-4o-mini"
+    # Au-delà de ce nombre de tokens, résumé hiérarchique (map-reduce)
+    NOTES_MAP_REDUCE_MIN_TOKENS: int = 12000
+    NOTES_SECTION_MAX_TOKENS: int = 6000
+    # "single" (un appel) ou "sections" (extractions parallèles par section)
+    NOTES_STRATEGY: str = "single"
+    # Limite globale d'appels LLM simultanés (par worker) et timeout par appel
+    LLM_MAX_CONCURRENCY: int = 8
+    LLM_TIMEOUT_SEC: float = 120.0
+    # Cache disque des notes (clé : transcript normalisé + langue + modèle + prompts)
+    NOTES_CACHE_ENABLED: bool = True
+    NOTES_CACHE_DIR: str = "/data/cache/notes"
+    NOTES_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+
+    # Rapports : source (report.json) et exports rendus à la demande
+    DATA_ROOT: str = "/data/reports"
+    # "local" (DATA_ROOT) ou "s3" (object store partagé entre réplicas, boto3)
+    STORAGE_BACKEND: str = "local"
+    S3_BUCKET: str = "meeting-reports"
+    S3_PREFIX: str = "reports/"
+    S3_ENDPOINT_URL: str | None = None  # MinIO, Ceph...
+    S3_REGION: str | None = None
+    # taille des parties du multipart upload (minimum S3 : 5 Mio)
+    S3_PART_SIZE: int = 8 * 1024 * 1024
+
+    # Sessions d'upload audio (envoi en parties vers le stockage, puis
+    # traitement par référence) ; sessions et audio supprimés à expiration
+    UPLOAD_PART_SIZE: int = 16 * 1024 * 1024
+    UPLOAD_MAX_BYTES: int = 8 * 1024**3
+    UPLOAD_TTL_HOURS: float = 24.0
+
+    # Rétention de DATA_ROOT (tâche de fond) : exports (cache) évincés en LRU
+    # avant les rapports ; 0 = pas de limite
+    RETENTION_ENABLED: bool = True
+    RETENTION_MAX_BYTES: int = 20 * 1024**3
+    RETENTION_MAX_AGE_DAYS: float = 365.0
+    RETENTION_INTERVAL_SEC: float = 5.0
+    # travail borné par passage : répertoires examinés, suppressions
+    RETENTION_SCAN_BATCH: int = 200
+    RETENTION_DELETE_BATCH: int = 20
+    # un rapport consulté depuis moins longtemps n'est jamais supprimé
+    RETENTION_GRACE_SEC: float = 600.0
+
+    # Recherche plein texte : classement limité aux N correspondances les plus récentes
+    SEARCH_MAX_CANDIDATES: int = 1000
+
+    # Recherche par similarité : embeddings ("hashing" local ou "openai") et index IVF
+    EMBEDDING_BACKEND: str = "hashing"
+    EMBEDDING_MODEL_ID: str = "text-embedding-3-small"
+    EMBEDDING_DIM: int = 256
+    # un seul processus écrivain par répertoire (verrou exclusif), les autres
+    # le lisent : avec plusieurs répliques, un répertoire local par réplique
+    VECTOR_INDEX_DIR: str = "/data/index/vectors"
+    VECTOR_NPROBE: int = 16
+    # taille minimale du delta avant compaction dans le segment IVF
+    VECTOR_DELTA_MIN: int = 10000
+
+    # Transcription en direct (WebSocket) : fenêtres bornées par les silences
+    LIVE_SAMPLE_RATE: int = 16000
+    LIVE_VAD_THRESHOLD_DB: float = -45.0
+    LIVE_SILENCE_MS: int = 600
+    LIVE_MIN_SPEECH_MS: int = 250
+    LIVE_MAX_WINDOW_SEC: float = 20.0
+    LIVE_ASR_CONCURRENCY: int = 2
+
+    # Rendu PDF dans un pool de processus ; au-delà de workers + queue -> 503
+    PDF_RENDER_WORKERS: int = os.cpu_count() or 2
+    PDF_RENDER_QUEUE_LIMIT: int = 16
+
+    # Limitation par utilisateur (ou adresse IP pour les appels anonymes) de
+    # /reports/transcribe et /reports/notes : seau de requêtes, et quotas
+    # horaires d'audio et de tokens LLM (0 : pas de quota). Les PUT de
+    # parties d'upload ont leur propre seau (0 : illimité). Refus (429)
+    # avant la lecture du corps. Backend "memory" (par processus) ou
+    # "redis" (partagé entre réplicas, paquet redis requis).
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"
+    RATE_LIMIT_REDIS_URL: str = "redis://localhost:6379/0"
+    RATE_LIMIT_REQUESTS_PER_MINUTE: float = 30.0
+    RATE_LIMIT_BURST: int = 10
+    RATE_LIMIT_UPLOAD_PARTS_PER_MINUTE: float = 120.0
+    QUOTA_AUDIO_SECONDS_PER_HOUR: float = 4 * 3600.0
+    QUOTA_LLM_TOKENS_PER_HOUR: int = 2_000_000
+    # Journal de consommation (table usage_events), écrit par lots
+    USAGE_FLUSH_INTERVAL_SEC: float = 5.0
+    USAGE_FLUSH_BATCH: int = 500
 
     # CORS
     CORS_ORIGINS: List[str] = ["*"]
@@ -58,6 +165,22 @@ class Settings(BaseSettings):
     DB_HOST: str = os.getenv("DB_HOST", "")
     DB_PORT: str = os.getenv("DB_PORT", "")
     DB_NAME: str = os.getenv("DB_NAME", "db.sqlite3")
+    DB_ECHO: bool = False
+    # Pool de connexions (fichier SQLite, Postgres) ; au-delà de
+    # DB_POOL_SIZE + DB_MAX_OVERFLOW, une requête attend DB_POOL_TIMEOUT
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0
+    # Postgres : connexions recyclées avant les coupures côté serveur/proxy,
+    # et cache de requêtes préparées d'asyncpg par connexion (0 : désactivé,
+    # nécessaire derrière pgbouncer en mode transaction)
+    DB_POOL_RECYCLE_SEC: int = 1800
+    DB_STATEMENT_CACHE_SIZE: int = 500
+    # SQLite : WAL (lectures concurrentes d'une écriture), fsync allégé, et
+    # attente du verrou d'écriture au lieu d'un "database is locked" immédiat
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
 
     @property
     def DATABASE_URL(self) -> str:
@@ -3,15 +3,30 @@ Security utilities for authentication and authorization.
 """
 
 from datetime import datetime, timedelta
-from typing import Any, Optional, Union, cast
+from typing import Any, Optional, Tuple, Union, cast
 
 from jose import jwt
 from passlib.context import CryptContext
 
 from app.core.config import settings
 
+
+def make_pwd_context(rounds: int) -> CryptContext:
+    """
+    Password hashing context. Only weaker hashes need an update: a lowered
+    BCRYPT_ROUNDS must never rewrite stronger stored hashes (passlib's
+    "rounds"/"min_rounds" options would flag those too).
+    """
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_desired_rounds=rounds,
+    )
+
+
 # Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = make_pwd_context(settings.BCRYPT_ROUNDS)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -19,6 +34,16 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return cast(bool, pwd_context.verify(plain_password, hashed_password))
 
 
+def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """Verify a password; also return a new hash if the stored one is outdated."""
+    return cast(
+        Tuple[bool, Optional[str]],
+        pwd_context.verify_and_update(plain_password, hashed_password),
+    )
+
+
 def get_password_hash(password: str) -> str:
     """Generate password hash."""
     return cast(str, pwd_context.hash(password))
@@ -3,22 +3,122 @@ Database session management.
 """
 
 import contextlib
-from typing import Any, AsyncGenerator, AsyncIterator
+from typing import (
+    Any,
+    AsyncContextManager,
+    AsyncGenerator,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Optional,
+)
 
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import (
     AsyncConnection,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
+from sqlalchemy.pool import QueuePool
 
 from app.core.config import settings
 
 
+def engine_options(url: str) -> Dict[str, Any]:
+    """Engine profile for the database behind `url`, from the DB_* settings."""
+    parsed = make_url(url)
+    options: Dict[str, Any] = {"echo": settings.DB_ECHO}
+    pool_options = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+    }
+    backend = parsed.get_backend_name()
+    if backend == "sqlite":
+        # An in-memory database is a single shared connection (StaticPool)
+        if parsed.database and parsed.database != ":memory:":
+            options.update(pool_options)
+    elif backend == "postgresql":
+        options.update(
+            pool_options,
+            pool_recycle=settings.DB_POOL_RECYCLE_SEC,
+            pool_pre_ping=True,
+        )
+        if parsed.get_driver_name() == "asyncpg":
+            options["connect_args"] = {
+                "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE
+            }
+    return options
+
+
+def _set_sqlite_pragmas(dbapi_connection: Any, connection_record: Any) -> None:
+    """Per-connection SQLite settings (PRAGMAs are not persisted, except WAL)."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    cursor.close()
+
+
+def _capacity(pool: QueuePool) -> Optional[int]:
+    """Connections the pool may open at once (None: unbounded overflow)."""
+    max_overflow = pool._max_overflow
+    return None if max_overflow < 0 else pool.size() + max_overflow
+
+
 class DatabaseSessionManager:
-    def __init__(self, host: str, engine_kwargs: dict[str, Any] = {}):
-        self._engine = create_async_engine(host, **engine_kwargs)
+    def __init__(self, host: str, engine_kwargs: Optional[Dict[str, Any]] = None):
+        options = {**engine_options(host), **(engine_kwargs or {})}
+        poolclass = options.get("poolclass")
+        if poolclass is not None and not issubclass(poolclass, QueuePool):
+            # e.g. NullPool: no pool to size
+            for key in ("pool_size", "max_overflow", "pool_timeout"):
+                options.pop(key, None)
+        self._engine = create_async_engine(host, **options)
         self._sessionmaker = async_sessionmaker(autocommit=False, bind=self._engine)
+        self.checkouts = 0
+        self.peak_checked_out = 0
+        self.exhausted = 0
+        sync_engine = self._engine.sync_engine
+        if sync_engine.dialect.name == "sqlite":
+            event.listen(sync_engine, "connect", _set_sqlite_pragmas)
+        event.listen(sync_engine, "checkout", self._on_checkout)
+
+    def _on_checkout(self, *args: Any) -> None:
+        pool = self._engine.sync_engine.pool if self._engine is not None else None
+        if not isinstance(pool, QueuePool):
+            return
+        self.checkouts += 1
+        checked_out = pool.checkedout()
+        self.peak_checked_out = max(self.peak_checked_out, checked_out)
+        capacity = _capacity(pool)
+        if capacity is not None and checked_out >= capacity:
+            # last free connection taken: the next checkout waits
+            self.exhausted += 1
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Connection pool usage, to spot saturation (exhausted > 0)."""
+        if self._engine is None:
+            raise Exception("DatabaseSessionManager is not initialized")
+        pool = self._engine.sync_engine.pool
+        stats: Dict[str, Any] = {"pool": type(pool).__name__}
+        if isinstance(pool, QueuePool):
+            capacity = _capacity(pool)
+            stats.update(
+                size=pool.size(),
+                capacity=capacity,
+                checked_out=pool.checkedout(),
+                idle=pool.checkedin(),
+                utilization=(
+                    round(pool.checkedout() / capacity, 3) if capacity else None
+                ),
+                peak_checked_out=self.peak_checked_out,
+                checkouts=self.checkouts,
+                exhausted=self.exhausted,
+            )
+        return stats
 
     async def close(self) -> None:
         if self._engine is None:
@@ -55,12 +155,20 @@ class DatabaseSessionManager:
             await session.close()
 
 
-sessionmanager = DatabaseSessionManager(
-    settings.DATABASE_URL,
-    # {"echo": settings.echo_sql}
-)
+sessionmanager = DatabaseSessionManager(settings.DATABASE_URL)
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     async with sessionmanager.session() as session:
         yield session
+
+
+SessionFactory = Callable[[], AsyncContextManager[AsyncSession]]
+
+
+def get_session_factory() -> SessionFactory:
+    """
+    Opens short-lived sessions, for work that outlives the request-scoped
+    session (streamed responses, WebSockets).
+    """
+    return sessionmanager.session
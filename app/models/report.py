@@ -0,0 +1,164 @@
+from sqlalchemy import (
+    DDL,
+    JSON,
+    BigInteger,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    event,
+)
+
+from app.db.base import Base
+
+
+class Report(Base):
+    __tablename__ = "reports"
+
+    # identifiant make_report_id(), aussi nom du répertoire sous DATA_ROOT
+    id = Column(String(64), primary_key=True)
+    owner_id = Column(
+        Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True
+    )
+    created_at = Column(DateTime, nullable=False)
+    duration_sec = Column(Float, nullable=True)
+    language = Column(String(16), nullable=True)
+    status = Column(String(16), nullable=False, default="ready")
+    source_path = Column(String, nullable=False)
+    # nom de fichier -> {"path": ..., "bytes": ...}, complété à chaque rendu d'export
+    artifacts = Column(JSON, nullable=False, default=dict)
+
+    __table_args__ = (
+        # listing paginé par curseur : WHERE owner_id = ? ORDER BY created_at, id
+        Index("ix_reports_owner_created", "owner_id", "created_at", "id"),
+    )
+
+
+class StoredTranscript(Base):
+    """
+    Transcript produit par /reports/transcribe, réutilisable par
+    /reports/notes (transcript_id) sans nouvelle passe de transcription.
+    """
+
+    __tablename__ = "transcripts"
+
+    # uuid4 : l'id d'un transcript anonyme vaut droit d'accès
+    id = Column(String(64), primary_key=True)
+    owner_id = Column(
+        Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True
+    )
+    created_at = Column(DateTime, nullable=False)
+    language = Column(String(16), nullable=True)
+    text = Column(Text, nullable=False)
+    # [{"start", "end", "text", "speaker"}], locuteurs compris
+    segments = Column(JSON, nullable=False, default=list)
+
+
+class UploadSession(Base):
+    """
+    Envoi d'un fichier audio en parties, directement vers le stockage
+    (URLs présignées en S3) ; /reports/transcribe et /reports/notes le
+    lisent ensuite par référence (upload_id).
+    """
+
+    __tablename__ = "upload_sessions"
+
+    # uuid4 : l'id d'une session anonyme vaut droit d'accès
+    id = Column(String(64), primary_key=True)
+    owner_id = Column(
+        Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True
+    )
+    created_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    filename = Column(String(255), nullable=False)
+    content_type = Column(String(127), nullable=True)
+    size = Column(BigInteger, nullable=False)
+    part_size = Column(Integer, nullable=False)
+    # "pending" (parties en cours d'envoi) ou "complete"
+    status = Column(String(16), nullable=False, default="pending")
+    # identifiant du multipart upload côté stockage
+    storage_upload_id = Column(String(255), nullable=False)
+
+
+class UsageEvent(Base):
+    """
+    Consommation d'une requête coûteuse (/reports/transcribe, /reports/notes) :
+    secondes d'audio transcrites et tokens LLM. Écrite par lots (usage.py).
+    """
+
+    __tablename__ = "usage_events"
+
+    id = Column(Integer, primary_key=True)
+    created_at = Column(DateTime, nullable=False, index=True)
+    # clé du limiteur : "user:<id>" ou "ip:<adresse>"
+    principal = Column(String(128), nullable=False, index=True)
+    owner_id = Column(
+        Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True
+    )
+    endpoint = Column(String(64), nullable=False)
+    status_code = Column(Integer, nullable=False)
+    audio_seconds = Column(Float, nullable=False, default=0.0)
+    llm_tokens = Column(Integer, nullable=False, default=0)
+
+
+class ReportChunk(Base):
+    """
+    Unité de recherche plein texte : un segment du transcript (avec ses
+    timestamps) ou un champ du résumé. L'index lui-même dépend du moteur :
+    table FTS5 sur SQLite, colonne tsvector + GIN sur PostgreSQL (DDL
+    ci-dessous, hors ORM).
+    """
+
+    __tablename__ = "report_chunks"
+
+    id = Column(Integer, primary_key=True)
+    report_id = Column(
+        String(64),
+        ForeignKey("reports.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    owner_id = Column(Integer, nullable=True)
+    kind = Column(String(16), nullable=False)  # "segment" ou "summary"
+    field = Column(String(32), nullable=True)  # champ du résumé (decisions...)
+    start = Column(Float, nullable=True)
+    end = Column(Float, nullable=True)
+    speaker = Column(String(64), nullable=True)
+    text = Column(Text, nullable=False)
+
+
+# SQLite : table FTS5 à contenu externe, tenue à jour par triggers
+SQLITE_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS report_chunks_fts USING fts5("
+    "text, content='report_chunks', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3 4')",
+    "CREATE TRIGGER IF NOT EXISTS report_chunks_ai AFTER INSERT ON report_chunks BEGIN "
+    "INSERT INTO report_chunks_fts(rowid, text) VALUES (new.id, new.text); END",
+    "CREATE TRIGGER IF NOT EXISTS report_chunks_ad AFTER DELETE ON report_chunks BEGIN "
+    "INSERT INTO report_chunks_fts(report_chunks_fts, rowid, text) "
+    "VALUES ('delete', old.id, old.text); END",
+]
+SQLITE_FTS_DROP = [
+    "DROP TRIGGER IF EXISTS report_chunks_ad",
+    "DROP TRIGGER IF EXISTS report_chunks_ai",
+    "DROP TABLE IF EXISTS report_chunks_fts",
+]
+
+# PostgreSQL : tsvector généré (config "simple" : transcripts multilingues) + GIN
+POSTGRES_FTS_DDL = [
+    "ALTER TABLE report_chunks ADD COLUMN IF NOT EXISTS tsv tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('simple', text)) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_report_chunks_tsv ON report_chunks USING GIN (tsv)",
+]
+
+_chunks = ReportChunk.__table__
+for _stmt in SQLITE_FTS_DDL:
+    event.listen(_chunks, "after_create", DDL(_stmt).execute_if(dialect="sqlite"))
+for _stmt in SQLITE_FTS_DROP:
+    event.listen(_chunks, "before_drop", DDL(_stmt).execute_if(dialect="sqlite"))
+for _stmt in POSTGRES_FTS_DDL:
+    event.listen(_chunks, "after_create", DDL(_stmt).execute_if(dialect="postgresql"))
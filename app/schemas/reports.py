@@ -1,5 +1,6 @@
-from typing import List, Optional
-from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, ConfigDict, Field
 
 class TranscriptSegment(BaseModel):
     start: float
@@ -14,3 +15,66 @@ class Transcript(BaseModel):
 
 class TranscribeResponse(BaseModel):
     transcript: Transcript
+    # à passer à /reports/notes pour éviter une nouvelle transcription
+    transcript_id: Optional[str] = None
+
+
+class ReportOut(BaseModel):
+    id: str
+    created_at: datetime
+    duration_sec: Optional[float] = None
+    language: Optional[str] = None
+    status: str
+    artifacts: Dict[str, Dict[str, Any]] = Field(default_factory=dict)
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ReportPage(BaseModel):
+    items: List[ReportOut]
+    next_cursor: Optional[str] = None
+
+
+class SearchHit(BaseModel):
+    report_id: str
+    kind: str
+    field: Optional[str] = None
+    start: Optional[float] = None
+    end: Optional[float] = None
+    speaker: Optional[str] = None
+    snippet: str
+    score: float
+
+
+class SearchResponse(BaseModel):
+    query: str
+    hits: List[SearchHit]
+
+
+class SimilarResponse(BaseModel):
+    query: Optional[str] = None
+    report_id: Optional[str] = None
+    hits: List[SearchHit]
+
+
+class UploadCreate(BaseModel):
+    filename: str = Field(min_length=1, max_length=255)
+    size: int = Field(gt=0, description="taille du fichier en octets")
+    content_type: Optional[str] = Field(default=None, max_length=127)
+
+
+class UploadPart(BaseModel):
+    part_number: int
+    size: int
+    uploaded: bool
+    # PUT du contenu de la partie : URL présignée du stockage, ou relais de l'API
+    url: Optional[str] = None
+
+
+class UploadSessionOut(BaseModel):
+    upload_id: str
+    filename: str
+    size: int
+    part_size: int
+    status: str
+    expires_at: datetime
+    parts: List[UploadPart] = Field(default_factory=list)
@@ -0,0 +1,203 @@
+"""
+Exports de rapport rendus à la demande.
+
+La création d'un rapport n'écrit que sa source (report.json : résumé,
+transcript, segments, langue). Chaque export (Markdown, PDF, SRT/VTT) est
+rendu au premier téléchargement puis conservé dans le stockage (voir
+storage.py) à côté de la source ; les premières requêtes concurrentes sur
+un même fichier partagent un seul rendu. Les exports texte sont écrits en
+flux (générateurs), avec leurs variantes compressées (.gz, .br) produites
+dans le même passage et servies selon Accept-Encoding.
+"""
+
+import asyncio
+import json
+import os
+import re
+from contextlib import ExitStack
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.models.notes import MeetingSummary
+from app.services.notes import iter_markdown, render_pdf_file
+from app.services.render_pool import pdf_pool
+from app.services.storage import Storage, get_storage
+from app.services.subtitles import iter_srt, iter_vtt
+from app.utils.file_response import available_encodings, encoder, keep_variant
+
+REPORT_SOURCE = "report.json"
+
+# Identifiants produits par make_report_id() (pas de séparateur de chemin)
+_REPORT_ID_RE = re.compile(r"^[0-9A-Za-z_-]+$")
+
+Renderer = Callable[[Storage, Dict[str, Any], str], Awaitable[Any]]
+
+
+class ArtifactNotFound(Exception):
+    pass
+
+
+def report_key(report_id: str, filename: str = "") -> str:
+    """Clé de stockage d'un fichier du rapport ("<id>/" seul : préfixe du rapport)."""
+    if not _REPORT_ID_RE.match(report_id):
+        raise ArtifactNotFound(f"Invalid report id: {report_id!r}")
+    return f"{report_id}/{filename}"
+
+
+def _write_text(storage: Storage, key: str, chunks: Iterable[str]) -> None:
+    """
+    Écrit l'export en flux, avec ses variantes compressées calculées au fil
+    de l'eau ; une variante qui ne gagne pas assez est abandonnée avant
+    publication. L'export lui-même est publié en dernier.
+    """
+    with ExitStack() as stack:
+        out = stack.enter_context(storage.open_write(key))
+        variants = [
+            (encoder(coding), stack.enter_context(storage.open_write(key + suffix)))
+            for coding, suffix in available_encodings()
+        ]
+        for chunk in chunks:
+            data = chunk.encode("utf-8")
+            out.write(data)
+            for compressor, variant in variants:
+                variant.write(compressor.compress(data))
+        for compressor, variant in variants:
+            variant.write(compressor.flush())
+            if not keep_variant(out.size, variant.size):
+                variant.discard()
+
+
+def save_report_source(
+    report_id: str,
+    summary: MeetingSummary,
+    transcript_text: str,
+    language: str,
+    segments: Optional[List[Dict[str, Any]]] = None,
+    storage: Optional[Storage] = None,
+) -> Tuple[str, int]:
+    """
+    Écrit report.json, seule donnée nécessaire pour rendre les exports.
+    Renvoie (clé, taille en octets).
+    """
+    storage = storage or get_storage()
+    key = report_key(report_id, REPORT_SOURCE)
+    source = {
+        "report_id": report_id,
+        "language": language,
+        "summary": summary.model_dump(),
+        "transcript_text": transcript_text,
+        "segments": segments,
+    }
+    with storage.open_write(key) as out:
+        for chunk in json.JSONEncoder(ensure_ascii=False).iterencode(source):
+            out.write(chunk.encode("utf-8"))
+    return key, out.size
+
+
+def _load_source(storage: Storage, report_id: str) -> Dict[str, Any]:
+    try:
+        raw = storage.read_bytes(report_key(report_id, REPORT_SOURCE))
+    except FileNotFoundError:
+        raise ArtifactNotFound("Report not found")
+    source: Dict[str, Any] = json.loads(raw)
+    return source
+
+
+def _write_markdown(storage: Storage, source: Dict[str, Any], key: str) -> None:
+    summary = MeetingSummary(**source["summary"])
+    _write_text(storage, key, iter_markdown(summary, source["transcript_text"]))
+
+
+def _write_subtitles(storage: Storage, source: Dict[str, Any], key: str) -> None:
+    segments = source.get("segments")
+    if not segments:
+        raise ArtifactNotFound("Transcript has no timed segments")
+    _write_text(
+        storage, key, iter_vtt(segments) if key.endswith(".vtt") else iter_srt(segments)
+    )
+
+
+async def _render_markdown(storage: Storage, source: Dict[str, Any], key: str) -> None:
+    await asyncio.to_thread(_write_markdown, storage, source, key)
+
+
+async def _render_subtitles(storage: Storage, source: Dict[str, Any], key: str) -> None:
+    await asyncio.to_thread(_write_subtitles, storage, source, key)
+
+
+async def _render_pdf(storage: Storage, source: Dict[str, Any], key: str) -> None:
+    # reportlab écrit un fichier : rendu dans un fichier local, puis publié
+    # (simple renommage en local, multipart upload en S3)
+    path = storage.staging_path(key)
+    try:
+        # peut lever PoolSaturated si le pool est saturé
+        await pdf_pool.submit(
+            render_pdf_file,
+            source["summary"],
+            source["transcript_text"],
+            path,
+            source.get("segments"),
+        )
+        await asyncio.to_thread(storage.put_file, key, path)
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+# nom de fichier -> (type MIME, rendu) ; ajouter un format = ajouter une entrée
+EXPORT_FORMATS: Dict[str, Tuple[str, Renderer]] = {
+    "meeting-notes.md": ("text/markdown", _render_markdown),
+    "meeting-report.pdf": ("application/pdf", _render_pdf),
+    "meeting-transcript.srt": ("application/x-subrip", _render_subtitles),
+    "meeting-transcript.vtt": ("text/vtt", _render_subtitles),
+}
+
+
+class ArtifactStore:
+    """
+    Résout un export vers un objet du stockage, en le rendant si besoin.
+    Un seul rendu par fichier à la fois : les requêtes suivantes attendent
+    la même tâche (single-flight) au lieu de relancer le rendu.
+    """
+
+    def __init__(self, storage: Optional[Storage] = None):
+        self._storage = storage
+        self._inflight: Dict[str, "asyncio.Future[None]"] = {}
+
+    @property
+    def storage(self) -> Storage:
+        return self._storage or get_storage()
+
+    async def get(self, report_id: str, filename: str) -> Tuple[str, str, bool]:
+        """
+        Renvoie (clé, type MIME, started) de l'export, rendu au premier
+        appel ; started ne vaut True que pour la requête qui a lancé le rendu.
+        """
+        if filename not in EXPORT_FORMATS:
+            raise ArtifactNotFound(f"Unknown export: {filename!r}")
+        media_type, renderer = EXPORT_FORMATS[filename]
+        key = report_key(report_id, filename)
+        if await asyncio.to_thread(self.storage.stat, key) is not None:
+            return key, media_type, False
+
+        task = self._inflight.get(key)
+        started = task is None
+        if task is None:
+            task = asyncio.ensure_future(self._render(report_id, key, renderer))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # shield : un client qui se déconnecte n'annule pas le rendu partagé
+        await asyncio.shield(task)
+        return key, media_type, started
+
+    def rendering(self, report_id: str) -> bool:
+        """Un export du rapport est-il en cours de rendu ?"""
+        prefix = report_key(report_id)
+        return any(key.startswith(prefix) for key in list(self._inflight))
+
+    async def _render(self, report_id: str, key: str, renderer: Renderer) -> None:
+        storage = self.storage
+        source = await asyncio.to_thread(_load_source, storage, report_id)
+        await renderer(storage, source, key)
+
+
+artifact_store = ArtifactStore()
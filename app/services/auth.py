@@ -3,26 +3,92 @@ Authentication service.
 """
 
 from datetime import datetime
-from typing import Optional, Tuple, cast
+from hashlib import sha256
+from typing import Any, Dict, Optional, Tuple, cast
 
 from jose import JWTError, jwt
-from sqlalchemy import select
+from sqlalchemy import inspect, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 
 from app.core.config import settings
-from app.core.security import create_access_token, create_refresh_token, verify_password
+from app.core.security import (
+    create_access_token,
+    create_refresh_token,
+    get_password_hash,
+    verify_and_update_password,
+)
 from app.models.user import User
 from app.schemas.token import TokenPayload
+from app.services.process_pool import BoundedProcessPool
+from app.utils.lru_cache import TTLCache
+
+# bcrypt is pure CPU (~250 ms at cost 12): run it in worker processes, off
+# the event loop; submit() raises PoolSaturated once the queue is full.
+password_pool = BoundedProcessPool(
+    settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_QUEUE_LIMIT, name="password"
+)
+
+# Authenticated users keyed by token digest. Column snapshots are cached
+# rather than ORM instances so that no session state leaks between requests.
+principal_cache: TTLCache[Dict[str, Any]] = TTLCache(
+    settings.AUTH_CACHE_SIZE, settings.AUTH_CACHE_TTL_SEC
+)
+
+
+def principal_key(kind: str, token: str) -> str:
+    """Cache key of a credential ("jwt" or "api"); the token itself is never stored."""
+    return f"{kind}:{sha256(token.encode()).hexdigest()}"
+
+
+def remember_principal(key: str, user: User, ttl: Optional[float] = None) -> None:
+    """Cache the user authenticated by `key` (for at most `ttl` seconds)."""
+    snapshot = {
+        attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs
+    }
+    principal_cache.put(key, snapshot, ttl)
+
+
+async def cached_principal(db: AsyncSession, key: str) -> Optional[User]:
+    """Cached user for `key`, attached to `db` without querying the database."""
+    snapshot = principal_cache.get(key)
+    if snapshot is None:
+        return None
+    user = User(**snapshot)
+    make_transient_to_detached(user)
+    return cast(User, await db.merge(user, load=False))
+
+
+def forget_api_token(token: str) -> None:
+    """Drop a created or revoked API token from the cache."""
+    principal_cache.pop(principal_key("api", token))
+
+
+async def hash_password(password: str) -> str:
+    """Hash a password in the password pool."""
+    return cast(str, await password_pool.submit(get_password_hash, password))
 
 
 async def authenticate_user(
     db: AsyncSession, username: str, password: str
 ) -> Optional[User]:
-    """Authenticate a user by username and password."""
+    """
+    Authenticate a user by username and password. A hash made with other
+    parameters (e.g. a previous BCRYPT_ROUNDS) is replaced on success.
+    """
     result = await db.execute(select(User).filter(User.username == username))
     user = cast(Optional[User], result.scalar_one_or_none())
-    if not user or not verify_password(password, user.hashed_password):
+    if not user:
+        return None
+    valid, new_hash = await password_pool.submit(
+        verify_and_update_password, password, user.hashed_password
+    )
+    if not valid:
         return None
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+        await db.refresh(user)
     return user
 
 
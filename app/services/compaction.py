@@ -0,0 +1,180 @@
+"""
+Compaction du transcript avant prompt LLM.
+
+- suppression des hésitations (euh, hum, um, uh...) et des espaces redondants
+- repli des boucles de répétition typiques des hallucinations ASR
+- segments consécutifs d'un même locuteur fusionnés en tours de parole,
+  encodés en une ligne "[HH:MM:SS] S1: texte"
+
+Le comptage de tokens utilise tiktoken (encodage o200k_base des modèles
+gpt-4o), chargé au premier comptage et non à l'import : le premier
+chargement peut télécharger le fichier BPE. S'il échoue (hors-ligne), une
+approximation (~4 caractères par token) est utilisée et signalée dans les
+logs.
+"""
+
+import functools
+import logging
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import tiktoken
+
+logger = logging.getLogger(__name__)
+
+# À incrémenter à chaque changement de l'encodage (invalide le cache des notes)
+COMPACTION_VERSION = "2"
+
+# Un tour de parole fusionné ne dépasse pas cette durée (granularité des timestamps)
+MAX_TURN_SEC = 90.0
+
+_FILLERS_RE = re.compile(
+    r"(?<!\w)(?:euh+m?|heu+|hum+|hm+|mmh+|bah|um+|uh+m?|erm+)(?!\w)[,.…]*\s*",
+    re.IGNORECASE,
+)
+# Même mot ou groupe de 1 à 6 mots répété au moins 3 fois d'affilée ; mots
+# alphabétiques seulement : chiffres et identifiants répétés sont du contenu
+_REPEAT_RE = re.compile(r"\b((?:[^\W\d_]+\W+){1,6}?)\1{2,}", re.IGNORECASE)
+_SPACES_RE = re.compile(r"\s+")
+_SPACE_BEFORE_PUNCT_RE = re.compile(r"\s+([,.!?;:])")
+
+
+@functools.lru_cache(maxsize=1)
+def _encoding() -> Optional[tiktoken.Encoding]:
+    try:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:  # fichier BPE non téléchargeable (hors-ligne)
+        logger.warning(
+            "tiktoken encoding unavailable, token counts are approximate",
+            exc_info=True,
+        )
+        return None
+
+
+def count_tokens(text: str) -> int:
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return max(1, len(text) // 4)
+
+
+def format_ts(seconds: float) -> str:
+    total = int(seconds or 0)
+    return f"{total // 3600:02d}:{(total % 3600) // 60:02d}:{total % 60:02d}"
+
+
+def clean_text(text: str) -> str:
+    text = _FILLERS_RE.sub("", text)
+    # le motif répété se termine par un séparateur : on complète la fin
+    text = _REPEAT_RE.sub(r"\1", text + " ")
+    text = _SPACES_RE.sub(" ", text)
+    text = _SPACE_BEFORE_PUNCT_RE.sub(r"\1", text)
+    return text.strip(" ,")
+
+
+def speaker_tags(segments: List[Dict[str, Any]]) -> Dict[str, str]:
+    """Étiquettes courtes (S1, S2...) dans l'ordre d'apparition des locuteurs."""
+    tags: Dict[str, str] = {}
+    for s in segments:
+        speaker = s.get("speaker")
+        if speaker and speaker not in tags:
+            tags[speaker] = f"S{len(tags) + 1}"
+    return tags
+
+
+def compact_segments(segments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Nettoie chaque segment, supprime les segments vides ou répétés à l'identique
+    par le même locuteur (boucles d'hallucination), puis fusionne les segments
+    consécutifs d'un même locuteur en tours d'au plus MAX_TURN_SEC secondes.
+    """
+    out: List[Dict[str, Any]] = []
+    prev: Optional[tuple] = None
+    for s in segments:
+        text = clean_text(s.get("text") or "")
+        norm = text.lower().strip(" .!?")
+        speaker = s.get("speaker")
+        if not norm or (speaker, norm) == prev:
+            continue
+        prev = (speaker, norm)
+        start = float(s.get("start", 0.0) or 0.0)
+        end = float(s.get("end", start) or start)
+
+        last = out[-1] if out else None
+        if (
+            last is not None
+            and last.get("speaker") == speaker
+            and end - last["start"] <= MAX_TURN_SEC
+        ):
+            last["text"] = f"{last['text']} {text}"
+            last["end"] = max(last["end"], end)
+            continue
+        out.append({"start": start, "end": end, "text": text, "speaker": speaker})
+    return out
+
+
+def encode_segments(
+    segments: List[Dict[str, Any]],
+    tags: Optional[Dict[str, str]] = None,
+    timestamps: bool = True,
+) -> str:
+    """Une ligne par tour : "[HH:MM:SS] S1: texte"."""
+    tags = tags if tags is not None else speaker_tags(segments)
+    lines = []
+    for s in segments:
+        prefix = f"[{format_ts(s.get('start', 0.0))}] " if timestamps else ""
+        speaker = s.get("speaker")
+        if speaker:
+            prefix += f"{tags.get(speaker, speaker)}: "
+        lines.append(f"{prefix}{s['text']}")
+    return "\n".join(lines)
+
+
+def speaker_legend(tags: Dict[str, str]) -> str:
+    if not tags:
+        return ""
+    return "SPEAKERS: " + ", ".join(f"{tag}={name}" for name, tag in tags.items())
+
+
+@dataclass
+class CompactTranscript:
+    text: str
+    tokens_before: int
+    tokens_after: int
+
+    @property
+    def reduction(self) -> float:
+        if not self.tokens_before:
+            return 0.0
+        return 1.0 - self.tokens_after / self.tokens_before
+
+
+def compact_transcript(
+    transcript_text: str,
+    segments: Optional[List[Dict[str, Any]]] = None,
+) -> CompactTranscript:
+    """
+    Version compacte du transcript pour le prompt, avec le nombre de tokens
+    avant/après. Sans segments exploitables, seul le texte est nettoyé.
+    """
+    tokens_before = count_tokens(transcript_text)
+    segs = [s for s in (segments or []) if (s.get("text") or "").strip()]
+    if segs:
+        timestamps = any(s.get("end") for s in segs)
+        compacted = compact_segments(segs)
+        tags = speaker_tags(compacted)
+        legend = speaker_legend(tags)
+        body = encode_segments(compacted, tags, timestamps=timestamps)
+        text = f"{legend}\n{body}" if legend else body
+    else:
+        text = clean_text(transcript_text)
+
+    result = CompactTranscript(text, tokens_before, count_tokens(text))
+    logger.info(
+        "transcript compaction: %d -> %d tokens (-%.0f%%)",
+        result.tokens_before,
+        result.tokens_after,
+        result.reduction * 100,
+    )
+    return result
@@ -1,41 +1,119 @@
+import inspect
 import os
 import tempfile
-from typing import List, Dict, Any
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Dict, Any, Deque, Iterator, Optional, Tuple
 
-from pyannote.audio import Pipeline
+import numpy as np
+from pyannote.audio import Inference, Pipeline
+from pyannote.core import Segment
+from pydub import AudioSegment
+
+from app.core.config import settings
+from app.services.speaker_linking import WindowResult, link_windows
+from app.services.transcription import (
+    CHUNK_SEC,
+    chunk_bounds,
+    _export_chunk_wav,
+    _load_and_resample,
+)
+
+# Durée max. de parole (s) utilisée pour calculer l'embedding d'un speaker local
+_EMBEDDING_MAX_SPEECH = 30.0
+
+# Un pipeline par thread worker : pyannote n'est pas garanti thread-safe
+_local = threading.local()
+
+
+def _hf_token() -> str:
+    hf_token = os.getenv("HUGGINGFACE_TOKEN")
+    if not hf_token:
+        raise RuntimeError("HUGGINGFACE_TOKEN is not set in environment.")
+    return hf_token
 
-_pipeline = None
 
 def get_diarization_pipeline() -> Pipeline:
-    global _pipeline
-    if _pipeline is None:
-        hf_token = os.getenv("HUGGINGFACE_TOKEN")
-        if not hf_token:
-            raise RuntimeError("HUGGINGFACE_TOKEN is not set in environment.")
-        _pipeline = Pipeline.from_pretrained(
+    pipeline = getattr(_local, "pipeline", None)
+    if pipeline is None:
+        pipeline = Pipeline.from_pretrained(
             "pyannote/speaker-diarization",
-            use_auth_token=hf_token,
+            use_auth_token=_hf_token(),
         )
-    return _pipeline
+        _local.pipeline = pipeline
+    return pipeline
 
 
-def diarize_audio_bytes(audio_bytes: bytes, file_suffix: str = ".wav") -> List[Dict[str, Any]]:
+def _get_embedding_inference() -> Inference:
+    inference = getattr(_local, "embedding", None)
+    if inference is None:
+        inference = Inference(
+            "pyannote/embedding",
+            window="whole",
+            use_auth_token=_hf_token(),
+        )
+        _local.embedding = inference
+    return inference
+
+
+def _speaker_embeddings(path: str, diarization: Any) -> Dict[str, np.ndarray]:
     """
-    Prend des bytes audio, les écrit dans un fichier temporaire,
-    applique pyannote, et renvoie une liste de segments :
-    [
-      {"start": float, "end": float, "speaker": "SPEAKER_00"},
-      ...
-    ]
+    Embedding moyen de chaque speaker local, calculé sur ses tours de parole
+    les plus longs (borné par _EMBEDDING_MAX_SPEECH secondes).
+    """
+    inference = _get_embedding_inference()
+    out: Dict[str, np.ndarray] = {}
+    for label in diarization.labels():
+        turns = sorted(
+            diarization.label_timeline(label),
+            key=lambda t: t.duration,
+            reverse=True,
+        )
+        vectors, weights, used = [], [], 0.0
+        for turn in turns:
+            if used >= _EMBEDDING_MAX_SPEECH:
+                break
+            if turn.duration < 0.5:
+                continue
+            emb = np.asarray(inference.crop(path, Segment(turn.start, turn.end)))
+            vectors.append(emb.reshape(-1))
+            weights.append(turn.duration)
+            used += turn.duration
+        if vectors:
+            out[label] = np.average(np.stack(vectors), axis=0, weights=weights)
+    return out
+
+
+def _returns_embeddings(pipeline: Pipeline) -> bool:
+    """
+    pyannote >= 3.1 : le pipeline peut renvoyer les embeddings des centroïdes
+    (paramètre return_embeddings de apply), sinon ils sont recalculés.
+    """
+    return "return_embeddings" in inspect.signature(pipeline.apply).parameters
+
+
+def _diarize_window(wav_bytes: bytes) -> WindowResult:
+    """
+    Diarise une fenêtre : renvoie les segments locaux (temps relatifs à la
+    fenêtre) et un embedding par speaker local.
     """
     pipeline = get_diarization_pipeline()
 
-    # audio dans un fichier temporaire
-    with tempfile.NamedTemporaryFile(suffix=file_suffix, delete=True) as tmp:
-        tmp.write(audio_bytes)
+    with tempfile.NamedTemporaryFile(suffix=".wav", delete=True) as tmp:
+        tmp.write(wav_bytes)
         tmp.flush()
 
-        diarization = pipeline(tmp.name)
+        if _returns_embeddings(pipeline):
+            diarization, centroids = pipeline(tmp.name, return_embeddings=True)
+            embeddings = {
+                label: np.asarray(centroids[k])
+                for k, label in enumerate(diarization.labels())
+                if k < len(centroids)
+            }
+        else:
+            diarization = pipeline(tmp.name)
+            embeddings = _speaker_embeddings(tmp.name, diarization)
 
     segments = []
     for turn, _, speaker in diarization.itertracks(yield_label=True):
@@ -46,7 +124,55 @@ def diarize_audio_bytes(audio_bytes: bytes, file_suffix: str = ".wav") -> List[D
                 "speaker": str(speaker),
             }
         )
-    return segments
+    return segments, embeddings
+
+
+def _iter_windows(
+    audio: AudioSegment, window_sec: int
+) -> Iterator[Tuple[float, bytes]]:
+    for start_ms, end_ms in chunk_bounds(len(audio), window_sec):
+        yield start_ms / 1000.0, _export_chunk_wav(audio[start_ms:end_ms])
+
+
+def _diarize_windows(
+    audio: AudioSegment, window_sec: int, workers: int
+) -> Iterator[Tuple[float, WindowResult]]:
+    """
+    Résultats des fenêtres dans l'ordre chronologique ; au plus `workers`
+    fenêtres exportées/en cours à la fois.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        pending: Deque[Tuple[float, "Future[WindowResult]"]] = deque()
+        for offset, wav in _iter_windows(audio, window_sec):
+            pending.append((offset, ex.submit(_diarize_window, wav)))
+            if len(pending) >= workers:
+                off, fut = pending.popleft()
+                yield off, fut.result()
+        for off, fut in pending:
+            yield off, fut.result()
+
+
+def diarize_audio_bytes(
+    audio_bytes: bytes,
+    file_suffix: str = ".wav",
+    window_sec: int = CHUNK_SEC,
+    max_workers: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Diarisation par fenêtres fixes (alignées sur le découpage ASR), traitées
+    en parallèle, puis reliées entre elles par embeddings pour que
+    "SPEAKER_00" désigne la même personne sur toute la réunion.
+    La mémoire de pyannote est bornée par la taille de fenêtre ; l'audio
+    décodé (16 kHz mono, environ 115 Mo par heure) reste entier en mémoire.
+    Renvoie une liste de segments :
+    [
+      {"start": float, "end": float, "speaker": "SPEAKER_00"},
+      ...
+    ]
+    """
+    audio = _load_and_resample(audio_bytes, f"audio{file_suffix}")
+    workers = max(1, max_workers or settings.DIARIZATION_WORKERS)
+    return link_windows(_diarize_windows(audio, window_sec, workers))
 
 
 def assign_speakers_by_overlap(
@@ -0,0 +1,101 @@
+"""
+Embeddings de texte pour la recherche par similarité.
+
+Backends interchangeables (EMBEDDING_BACKEND) :
+- "hashing" : hachage de mots et bigrammes dans un espace de dimension fixe,
+  local et déterministe (tests, hors-ligne) ;
+- "openai"  : API d'embeddings (EMBEDDING_MODEL_ID), via le client partagé ;
+  tokens consommés comptés comme ceux du LLM (quotas, usage.py).
+
+Les vecteurs renvoyés sont en float32, normalisés L2 (produit scalaire =
+similarité cosinus).
+"""
+
+import asyncio
+import hashlib
+import re
+from typing import List, Protocol, Sequence
+
+import numpy as np
+
+from app.core.config import settings
+from app.services import llm
+from app.services.usage import record_llm_tokens
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class EmbeddingBackend(Protocol):
+    # identifie l'espace vectoriel : l'index est reconstruit s'il change
+    key: str
+    dim: int
+
+    async def embed(self, texts: Sequence[str]) -> np.ndarray: ...
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    out: np.ndarray = vectors / norms
+    return out.astype(np.float32, copy=False)
+
+
+class HashingEmbedding:
+    """Feature hashing signé des mots et bigrammes (aucune dépendance, aucun modèle)."""
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.key = "hashing"
+
+    def _features(self, text: str) -> List[str]:
+        words = [w.lower() for w in _WORD_RE.findall(text)]
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    def embed_sync(self, texts: Sequence[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                h = int.from_bytes(
+                    hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(),
+                    "little",
+                )
+                out[row, h % self.dim] += 1.0 if (h >> 63) else -1.0
+        return _normalize(out)
+
+    async def embed(self, texts: Sequence[str]) -> np.ndarray:
+        return await asyncio.to_thread(self.embed_sync, texts)
+
+
+class OpenAIEmbedding:
+    def __init__(self, model: str, dim: int, batch_size: int = 256):
+        self.model = model
+        self.key = f"openai:{model}"
+        self.dim = dim
+        self.batch_size = batch_size
+
+    async def embed(self, texts: Sequence[str]) -> np.ndarray:
+        rows: List[List[float]] = []
+        for i in range(0, len(texts), self.batch_size):
+            batch = list(texts[i : i + self.batch_size])
+            async with llm.llm_slot():
+                response = await asyncio.wait_for(
+                    llm.get_async_client().embeddings.create(
+                        model=self.model, input=batch, dimensions=self.dim
+                    ),
+                    timeout=settings.LLM_TIMEOUT_SEC,
+                )
+            usage = getattr(response, "usage", None)
+            if usage is not None and usage.total_tokens:
+                record_llm_tokens(usage.total_tokens)
+            rows.extend(item.embedding for item in response.data)
+        return _normalize(
+            np.asarray(rows, dtype=np.float32).reshape(len(texts), self.dim)
+        )
+
+
+def get_embedding_backend() -> EmbeddingBackend:
+    if settings.EMBEDDING_BACKEND == "openai":
+        return OpenAIEmbedding(settings.EMBEDDING_MODEL_ID, settings.EMBEDDING_DIM)
+    if settings.EMBEDDING_BACKEND == "hashing":
+        return HashingEmbedding(settings.EMBEDDING_DIM)
+    raise ValueError(f"Unknown embedding backend: {settings.EMBEDDING_BACKEND!r}")
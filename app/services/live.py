@@ -0,0 +1,245 @@
+"""
+Transcription en direct d'une réunion (WebSocket /reports/live).
+
+Le client envoie de l'audio PCM 16 bits little-endian au fil de l'eau.
+SilenceSegmenter découpe le flux en fenêtres bornées par les silences (VAD
+par énergie, seuil adaptatif au bruit de fond) ; chaque fenêtre est envoyée
+à l'ASR dès sa fermeture, et LiveTranscription renvoie ses segments dans
+l'ordre, avec des timestamps relatifs au début du flux.
+"""
+
+import asyncio
+import io
+import math
+import wave
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.transcription import transcribe_audio
+from app.services.usage import checkpoint
+
+_FRAME_MS = 30
+_PREROLL_MS = 210  # audio conservé avant le début de la parole
+_NOISE_MARGIN_DB = 10.0
+_NOISE_SMOOTHING = 0.05
+
+
+@dataclass(frozen=True)
+class AudioWindow:
+    index: int
+    start: float  # secondes depuis le début du flux
+    pcm: bytes
+    sample_rate: int
+
+    @property
+    def duration(self) -> float:
+        return len(self.pcm) / 2 / self.sample_rate
+
+    def wav_bytes(self) -> bytes:
+        out = io.BytesIO()
+        with wave.open(out, "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(self.sample_rate)
+            w.writeframes(self.pcm)
+        return out.getvalue()
+
+
+def frame_energy_db(frame: np.ndarray) -> float:
+    """Énergie d'une trame int16 en dBFS."""
+    power = float(np.mean(np.square(frame, dtype=np.float64))) / 32768.0**2
+    return 10.0 * math.log10(power + 1e-12)
+
+
+class SilenceSegmenter:
+    """
+    Découpe un flux PCM mono en fenêtres de parole.
+
+    Une fenêtre s'ouvre sur la première trame de parole (précédée de
+    _PREROLL_MS d'audio) et se ferme après `silence_ms` de silence, ou à
+    `max_window_sec` pendant un long monologue. Les fenêtres de moins de
+    `min_speech_ms` de parole (clics, bruits brefs) sont ignorées.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int,
+        threshold_db: Optional[float] = None,
+        silence_ms: Optional[int] = None,
+        min_speech_ms: Optional[int] = None,
+        max_window_sec: Optional[float] = None,
+    ):
+        self.sample_rate = sample_rate
+        self.threshold_db = (
+            settings.LIVE_VAD_THRESHOLD_DB if threshold_db is None else threshold_db
+        )
+        self.frame_samples = sample_rate * _FRAME_MS // 1000
+        self.silence_frames = (silence_ms or settings.LIVE_SILENCE_MS) // _FRAME_MS
+        self.min_speech_frames = (
+            min_speech_ms or settings.LIVE_MIN_SPEECH_MS
+        ) // _FRAME_MS
+        self.max_frames = int(
+            (max_window_sec or settings.LIVE_MAX_WINDOW_SEC) * 1000 // _FRAME_MS
+        )
+        self.noise_db = -90.0
+        self._pending = b""
+        self._position = 0  # trames traitées depuis le début du flux
+        self._preroll: Deque[bytes] = deque(maxlen=_PREROLL_MS // _FRAME_MS)
+        self._frames: List[bytes] = []
+        self._window_start = 0
+        self._speech = 0
+        self._silence = 0
+        self._count = 0
+
+    def _is_speech(self, frame: bytes) -> bool:
+        energy = frame_energy_db(np.frombuffer(frame, dtype="<i2"))
+        if energy > max(self.threshold_db, self.noise_db + _NOISE_MARGIN_DB):
+            return True
+        self.noise_db += _NOISE_SMOOTHING * (energy - self.noise_db)
+        return False
+
+    def _close(self) -> Optional[AudioWindow]:
+        window = None
+        if self._speech >= self.min_speech_frames:
+            window = AudioWindow(
+                index=self._count,
+                start=self._window_start * _FRAME_MS / 1000,
+                pcm=b"".join(self._frames),
+                sample_rate=self.sample_rate,
+            )
+            self._count += 1
+        self._frames, self._speech, self._silence = [], 0, 0
+        self._preroll.clear()
+        return window
+
+    def feed(self, pcm: bytes) -> List[AudioWindow]:
+        """Ajoute de l'audio ; renvoie les fenêtres fermées par ce morceau."""
+        data = self._pending + pcm
+        step = self.frame_samples * 2
+        usable = len(data) - len(data) % step
+        self._pending = data[usable:]
+        closed = []
+        for offset in range(0, usable, step):
+            frame = data[offset : offset + step]
+            speech = self._is_speech(frame)
+            if not self._frames:
+                if speech:
+                    self._window_start = self._position - len(self._preroll)
+                    self._frames = [*self._preroll, frame]
+                    self._speech = 1
+                else:
+                    self._preroll.append(frame)
+            else:
+                self._frames.append(frame)
+                if speech:
+                    self._speech += 1
+                    self._silence = 0
+                else:
+                    self._silence += 1
+                if (
+                    self._silence >= self.silence_frames
+                    or len(self._frames) >= self.max_frames
+                ):
+                    window = self._close()
+                    if window is not None:
+                        closed.append(window)
+            self._position += 1
+        return closed
+
+    def flush(self) -> Optional[AudioWindow]:
+        """Fin du flux : ferme la fenêtre en cours."""
+        if self._pending and self._frames:
+            self._frames.append(self._pending)
+        self._pending = b""
+        return self._close() if self._frames else None
+
+
+class LiveTranscription:
+    """
+    Transcription d'un flux : les fenêtres sont transcrites en parallèle
+    (au plus LIVE_ASR_CONCURRENCY à la fois), leurs segments sont restitués
+    dans l'ordre du flux par results().
+    """
+
+    def __init__(self, sample_rate: int, language_hint: Optional[str] = None):
+        self.segmenter = SilenceSegmenter(sample_rate)
+        self.language_hint = language_hint
+        self.language: Optional[str] = None
+        self.segments: List[Dict[str, Any]] = []
+        self._semaphore = asyncio.Semaphore(settings.LIVE_ASR_CONCURRENCY)
+        self._queue: "asyncio.Queue[Optional[asyncio.Task]]" = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+
+    async def _transcribe(self, window: AudioWindow) -> List[Dict[str, Any]]:
+        async with self._semaphore:
+            _, segs, lang = await transcribe_audio(
+                window.wav_bytes(), f"live-{window.index:05d}.wav", self.language_hint
+            )
+        # quotas débités à chaque fenêtre, pas seulement en fin de réunion
+        await checkpoint()
+        if lang and not self.language:
+            self.language = lang
+        out = []
+        for s in segs:
+            text = (s.get("text") or "").strip()
+            if not text:
+                continue
+            # réponse sans timestamps (end = 0) : le segment couvre la fenêtre
+            start = min(float(s.get("start") or 0.0), window.duration)
+            end = float(s.get("end") or 0.0)
+            end = min(end, window.duration) if end > start else window.duration
+            out.append(
+                {
+                    "start": round(window.start + start, 3),
+                    "end": round(window.start + end, 3),
+                    "text": text,
+                    "speaker": s.get("speaker"),
+                }
+            )
+        return out
+
+    def _submit(self, window: AudioWindow) -> None:
+        task = asyncio.create_task(self._transcribe(window))
+        self._tasks.append(task)
+        self._queue.put_nowait(task)
+
+    def feed(self, pcm: bytes) -> None:
+        for window in self.segmenter.feed(pcm):
+            self._submit(window)
+
+    def finish(self) -> None:
+        """Fin du flux : la dernière fenêtre est transcrite, results() se termine."""
+        window = self.segmenter.flush()
+        if window is not None:
+            self._submit(window)
+        self._queue.put_nowait(None)
+
+    def cancel(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+
+    async def results(self) -> AsyncIterator[Any]:
+        """
+        Segments de chaque fenêtre, dans l'ordre du flux, dès qu'ils sont
+        disponibles. Une fenêtre en échec produit l'exception (pas d'arrêt).
+        """
+        while True:
+            task = await self._queue.get()
+            if task is None:
+                return
+            try:
+                segs = await task
+            except Exception as e:
+                yield e
+                continue
+            self.segments.extend(segs)
+            for s in segs:
+                yield s
+
+    @property
+    def text(self) -> str:
+        return " ".join(s["text"] for s in self.segments)
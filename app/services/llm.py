@@ -0,0 +1,175 @@
+"""
+Client LLM asynchrone partagé.
+
+Toutes les complétions passent par ce module : concurrence globale bornée
+(LLM_MAX_CONCURRENCY) et timeout par appel (LLM_TIMEOUT_SEC), pour que la
+génération de notes ne bloque jamais la boucle d'événements.
+"""
+
+import asyncio
+import contextlib
+import json
+import time
+import weakref
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    TypeVar,
+)
+
+from openai import AsyncOpenAI
+
+from app.core.config import settings
+from app.services.compaction import count_tokens
+from app.services.usage import record_llm_tokens
+
+
+T = TypeVar("T")
+
+
+class LLMError(Exception):
+    pass
+
+
+class LLMTimeoutError(LLMError):
+    pass
+
+
+_client: Optional[AsyncOpenAI] = None
+# Un sémaphore par boucle d'événements (asyncio.Semaphore est lié à sa boucle)
+_semaphores: (
+    "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]"
+) = weakref.WeakKeyDictionary()
+
+
+def get_async_client() -> AsyncOpenAI:
+    global _client
+    if _client is None:
+        _client = AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            base_url=settings.OPENAI_BASE_URL,
+        )
+    return _client
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+
+
+def _semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    sem = _semaphores.get(loop)
+    if sem is None:
+        sem = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+        _semaphores[loop] = sem
+    return sem
+
+
+@contextlib.asynccontextmanager
+async def llm_slot() -> AsyncIterator[None]:
+    """Réserve une place dans la limite globale de concurrence LLM."""
+    async with _semaphore():
+        yield
+
+
+async def chat_json(
+    system_prompt: str,
+    user_prompt: str,
+    model: Optional[str] = None,
+    temperature: float = 0.2,
+) -> Dict[str, Any]:
+    """Complétion JSON (response_format json_object), bornée et avec timeout."""
+    async with llm_slot():
+        try:
+            completion = await asyncio.wait_for(
+                get_async_client().chat.completions.create(
+                    model=model or settings.NOTES_MODEL_ID,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt},
+                    ],
+                    temperature=temperature,
+                    response_format={"type": "json_object"},
+                ),
+                timeout=settings.LLM_TIMEOUT_SEC,
+            )
+        except asyncio.TimeoutError:
+            raise LLMTimeoutError(
+                f"LLM call timed out after {settings.LLM_TIMEOUT_SEC}s"
+            )
+
+    content = completion.choices[0].message.content or "{}"
+    usage = getattr(completion, "usage", None)
+    if usage is not None and usage.total_tokens:
+        record_llm_tokens(usage.total_tokens)
+    else:  # endpoint compatible sans champ usage : estimation locale
+        record_llm_tokens(count_tokens(system_prompt + user_prompt + content))
+    try:
+        payload: Dict[str, Any] = json.loads(content)
+        return payload
+    except json.JSONDecodeError as e:
+        raise LLMError(f"LLM returned invalid JSON: {e}")
+
+
+async def stream_chat_json(
+    system_prompt: str,
+    user_prompt: str,
+    model: Optional[str] = None,
+    temperature: float = 0.2,
+) -> AsyncIterator[str]:
+    """
+    Complétion JSON en streaming : produit les fragments de texte au fil de
+    l'eau. Une place de la limite de concurrence n'est réservée que pendant
+    l'attente de l'API, et le timeout ne couvre que ces attentes : le temps
+    passé par le consommateur entre deux fragments n'est pas compté.
+    """
+    produced: List[str] = []
+    budget = settings.LLM_TIMEOUT_SEC
+
+    async def upstream(call: Callable[[], Awaitable[T]]) -> T:
+        nonlocal budget
+        async with llm_slot():
+            started = time.monotonic()
+            try:
+                async with asyncio.timeout(max(0.0, budget)):
+                    return await call()
+            except TimeoutError:
+                raise LLMTimeoutError(
+                    f"LLM call timed out after {settings.LLM_TIMEOUT_SEC}s"
+                )
+            finally:
+                budget -= time.monotonic() - started
+
+    stream = await upstream(
+        lambda: get_async_client().chat.completions.create(
+            model=model or settings.NOTES_MODEL_ID,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ],
+            temperature=temperature,
+            response_format={"type": "json_object"},
+            stream=True,
+        )
+    )
+    try:
+        while True:
+            try:
+                chunk = await upstream(stream.__anext__)
+            except StopAsyncIteration:
+                break
+            if chunk.choices and chunk.choices[0].delta.content:
+                produced.append(chunk.choices[0].delta.content)
+                yield chunk.choices[0].delta.content
+    finally:
+        await stream.close()
+        # pas de champ usage en streaming : estimation locale (prompt + sortie)
+        record_llm_tokens(count_tokens(system_prompt + user_prompt + "".join(produced)))
@@ -1,15 +1,44 @@
+import asyncio
+import hashlib
+import json
 import os
+import re
+import sys
 import uuid
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from collections import deque
+from typing import (
+    Dict,
+    Any,
+    AsyncIterator,
+    Deque,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+from xml.sax.saxutils import escape as xml_escape
 
 from markdown_it import MarkdownIt
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
 
+from app.core.config import settings
 from app.models.notes import MeetingSummary, Topic, ActionItem
-
-from openai import OpenAI
+from app.services import llm
+from app.services.compaction import (
+    COMPACTION_VERSION,
+    compact_segments,
+    compact_transcript,
+    count_tokens,
+    encode_segments,
+    format_ts,
+    speaker_legend,
+    speaker_tags,
+)
+from app.services.notes_cache import make_cache_key, notes_cache
+from app.utils.json_stream import JSONObjectStreamParser
 
 
 from reportlab.lib.pagesizes import A4
@@ -18,9 +47,7 @@ from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.lib import colors
 from app.models.notes import Topic, ActionItem, MeetingSummary
 
-client = OpenAI()
-
-#PROMPT 
+# PROMPT
 _SYSTEM_PROMPT = """You are a meeting notes generator.
 Given a raw meeting transcript (with optional timestamps), produce a clean, structured summary.
 
@@ -46,29 +73,196 @@ If unsure about owner/due, leave them null.
 If some sections are not clearly mentioned in the transcript, infer briefly or leave them empty.
 """
 
+_MAP_PROMPT = (
+    _SYSTEM_PROMPT
+    + """
+The transcript you receive is ONE SECTION of a longer meeting (lines are prefixed
+with [HH:MM:SS] timestamps when available). Extract notes for this section only;
+use the timestamps of the section for topic start/end. Do not invent content
+from other parts of the meeting.
+"""
+)
+
+_REDUCE_PROMPT = """You are a meeting notes generator.
+You receive partial notes (JSON) extracted from consecutive sections of ONE meeting,
+in chronological order. Merge them into a single structured summary.
+
+Respond in JSON with exactly the same keys as the partial notes:
+executive_summary, objectives, topics (title, description, start, end),
+decisions, actions (owner, action, due), outcomes, next_steps.
+
+- executive_summary: one concise summary of the whole meeting
+- merge duplicated objectives, topics, decisions, outcomes and next steps
+- a topic discussed across several sections keeps the earliest start and latest end
+- keep every distinct action item; keep owner/due when known, otherwise null
+Keep it concise and faithful to the partial notes. Keep the language of the notes.
+"""
+
+
+# Mode "sections" : extractions indépendantes lancées en parallèle
+# (groupe -> clés produites, schéma JSON attendu)
+_SECTION_GROUPS: Dict[str, Tuple[Tuple[str, ...], str]] = {
+    "overview": (
+        ("executive_summary", "objectives"),
+        """- executive_summary: string
+- objectives: array of strings""",
+    ),
+    "topics": (
+        ("topics",),
+        """- topics: array of objects
+  - title: string
+  - description: string (short summary of what was discussed on this topic)
+  - start: optional string timestamp, e.g. "00:12:34"
+  - end: optional string timestamp""",
+    ),
+    "decisions": (
+        ("decisions",),
+        """- decisions: array of strings (each is one important decision)""",
+    ),
+    "actions": (
+        ("actions",),
+        """- actions: array of objects
+  - owner: optional string (person responsible)
+  - action: string (what needs to be done)
+  - due: optional string (deadline or time frame)""",
+    ),
+    "outcomes": (
+        ("outcomes", "next_steps"),
+        """- outcomes: array of strings (what was achieved or the current status of main objectives)
+- next_steps: array of strings (clear next steps or follow-ups, including next meeting info if mentioned)""",
+    ),
+}
+
+_FANOUT_PROMPT = """You are a meeting notes generator.
+Given {source}, extract ONLY the following part of a structured summary.
+
+Respond in JSON with exactly these keys:
+
+{schema}
+
+Keep it concise and faithful to the {ref}. Keep language the same as the {ref}.
+If unsure about owner/due, leave them null.
+If nothing relevant is mentioned, leave the arrays empty.
+"""
+
+NOTES_STRATEGIES = ("single", "sections")
+
+
+def _fanout_prompt(group: str, reduce: bool) -> str:
+    if reduce:
+        source = (
+            "partial notes (JSON) extracted from consecutive sections of ONE meeting, "
+            "in chronological order (merge and deduplicate them)"
+        )
+        ref = "partial notes"
+    else:
+        source = "a raw meeting transcript (with optional timestamps)"
+        ref = "transcript"
+    return _FANOUT_PROMPT.format(
+        source=source, schema=_SECTION_GROUPS[group][1], ref=ref
+    )
+
+
+# Toute modification des prompts invalide automatiquement le cache des notes
+PROMPT_VERSION = make_cache_key(
+    _SYSTEM_PROMPT,
+    _MAP_PROMPT,
+    _REDUCE_PROMPT,
+    *(_fanout_prompt(g, r) for g in _SECTION_GROUPS for r in (False, True)),
+)[:12]
+
+
 def _build_user_prompt(transcript_text: str, lang: str = "auto") -> str:
     return f"""LANGUAGE: {lang}
 TRANSCRIPT:
 {transcript_text}
 """
 
-def generate_structured_notes(transcript_text: str, language: str = "auto") -> MeetingSummary:
-    completion = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": _SYSTEM_PROMPT},
-            {"role": "user", "content": _build_user_prompt(transcript_text, language)},
-        ],
-        temperature=0.2,
-        response_format={"type": "json_object"},
+
+def _text_to_segments(transcript_text: str) -> List[Dict[str, Any]]:
+    """Transcript brut sans timestamps : découpage en phrases (pseudo-segments)."""
+    parts = re.split(r"(?<=[.!?])\s+|\n+", transcript_text)
+    return [{"start": 0.0, "end": 0.0, "text": p.strip()} for p in parts if p.strip()]
+
+
+def _content_boundary(segment: Dict[str, Any], tokens: int, span: int) -> bool:
+    """
+    Frontière de section après ce tour, décidée par son seul contenu : tirage
+    pseudo-aléatoire (hash du texte) de probabilité tokens / span, soit en
+    moyenne une frontière tous les `span` tokens.
+    """
+    digest = hashlib.blake2b(
+        f"{segment.get('speaker') or ''}|{segment['text']}".encode("utf-8"),
+        digest_size=8,
+    ).digest()
+    return int.from_bytes(digest, "big") < (tokens / span) * 2**64
+
+
+def split_transcript_sections(
+    transcript_text: str,
+    segments: Optional[List[Dict[str, Any]]] = None,
+    max_tokens: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Découpe le transcript (compacté) en sections bornées en tokens, sans couper
+    un tour de parole.
+    Les frontières dépendent du contenu des tours (voir _content_boundary) et
+    non de leur position : après une correction, seules les sections touchées
+    changent, les suivantes retombent sur les mêmes frontières et leurs notes
+    partielles restent en cache.
+    Chaque section : {"index", "start", "end", "text"} (texte horodaté si possible).
+    """
+    max_tokens = max_tokens or settings.NOTES_SECTION_MAX_TOKENS
+    # sections de max_tokens / 2 au moins, ~3/4 de max_tokens en moyenne
+    min_tokens = max(1, max_tokens // 2)
+    span = max(1, max_tokens // 4)
+    timestamps = any(s.get("end") for s in segments or [])
+    segs = [s for s in (segments or []) if (s.get("text") or "").strip()]
+    if not segs:
+        segs = _text_to_segments(transcript_text)
+    segs = compact_segments(segs)
+    tags = speaker_tags(segs)
+    legend = speaker_legend(tags)
+
+    groups: List[List[Dict[str, Any]]] = []
+    current: List[Dict[str, Any]] = []
+    current_tokens = count_tokens(legend) if legend else 0
+    for s in segs:
+        tokens = count_tokens(encode_segments([s], tags, timestamps=timestamps)) + 1
+        if current and current_tokens + tokens > max_tokens:
+            groups.append(current)
+            current, current_tokens = [], count_tokens(legend) if legend else 0
+        current.append(s)
+        current_tokens += tokens
+        if current_tokens >= min_tokens and _content_boundary(s, tokens, span):
+            groups.append(current)
+            current, current_tokens = [], count_tokens(legend) if legend else 0
+    if current:
+        groups.append(current)
+
+    sections = []
+    for i, g in enumerate(groups):
+        body = encode_segments(g, tags, timestamps=timestamps)
+        sections.append(
+            {
+                "index": i,
+                "start": format_ts(g[0].get("start", 0.0)) if timestamps else None,
+                "end": format_ts(g[-1].get("end", 0.0)) if timestamps else None,
+                "text": f"{legend}\n{body}" if legend else body,
+            }
+        )
+    return sections
+
+
+async def _chat_json(system_prompt: str, user_prompt: str) -> Dict[str, Any]:
+    return await llm.chat_json(
+        system_prompt, user_prompt, model=settings.NOTES_MODEL_ID
     )
-    data = completion.choices[0].message.content
 
-    import json
-    parsed = json.loads(data)
 
-    topics = [Topic(**t) for t in parsed.get("topics", [])]
-    actions = [ActionItem(**a) for a in parsed.get("actions", [])]
+def _summary_from_json(parsed: Dict[str, Any]) -> MeetingSummary:
+    topics = [Topic(**t) for t in parsed.get("topics", []) or []]
+    actions = [ActionItem(**a) for a in parsed.get("actions", []) or []]
 
     return MeetingSummary(
         executive_summary=(parsed.get("executive_summary") or "").strip(),
@@ -81,80 +275,288 @@ def generate_structured_notes(transcript_text: str, language: str = "auto") -> M
     )
 
 
+async def _map_section(section: Dict[str, Any], language: str) -> Dict[str, Any]:
+    """
+    Notes partielles d'une section, en cache sous le hash de son prompt : le
+    prompt ne dépend que du contenu de la section (ni de son rang ni du
+    nombre total de sections), une section inchangée n'est pas recalculée.
+    """
+    header = "SECTION"
+    if section["start"]:
+        header += f" ({section['start']} - {section['end']})"
+    user_prompt = f"{header}\n" + _build_user_prompt(section["text"], language)
+    key = make_cache_key(
+        "map", user_prompt, settings.NOTES_MODEL_ID, PROMPT_VERSION, COMPACTION_VERSION
+    )
+    partial = None
+    if settings.NOTES_CACHE_ENABLED:
+        partial = await asyncio.to_thread(notes_cache.get, key)
+    if partial is None:
+        partial = await _chat_json(_MAP_PROMPT, user_prompt)
+        if settings.NOTES_CACHE_ENABLED:
+            await asyncio.to_thread(notes_cache.put, key, partial)
+    return {**partial, "section": section["index"] + 1}
+
+
+def _reduce_prompt(partials: List[Dict[str, Any]], language: str) -> str:
+    return f"LANGUAGE: {language}\nPARTIAL NOTES:\n" + json.dumps(
+        partials, ensure_ascii=False
+    )
+
+
+def notes_cache_key(
+    transcript_text: str,
+    language: str,
+    segments: Optional[List[Dict[str, Any]]] = None,
+    strategy: str = "single",
+) -> str:
+    """Clé de cache : transcript normalisé (espaces), langue, modèle, prompts."""
+    if segments:
+        content = "\n".join(
+            f"{int(s.get('start', 0) or 0)}|{s.get('speaker') or ''}|{s.get('text') or ''}"
+            for s in segments
+        )
+    else:
+        content = transcript_text
+    normalized = " ".join(content.split())
+    return make_cache_key(
+        normalized,
+        (language or "auto").lower(),
+        settings.NOTES_MODEL_ID,
+        PROMPT_VERSION,
+        COMPACTION_VERSION,
+        strategy,
+    )
+
+
+async def _final_prompt(
+    transcript_text: str,
+    language: str,
+    segments: Optional[List[Dict[str, Any]]],
+) -> Tuple[bool, str]:
+    """
+    Prompt utilisateur de l'étape qui produit le MeetingSummary : transcript
+    compacté pour un transcript court, sinon phase map puis notes partielles
+    à fusionner. Renvoie (reduce, prompt).
+    """
+    # Prompt compacté : hésitations/répétitions retirées, tours horodatés
+    compact = compact_transcript(transcript_text, segments)
+    if compact.tokens_after <= settings.NOTES_MAP_REDUCE_MIN_TOKENS:
+        return False, _build_user_prompt(compact.text, language)
+
+    sections = split_transcript_sections(transcript_text, segments)
+    partials = await asyncio.gather(*(_map_section(sec, language) for sec in sections))
+    return True, _reduce_prompt(list(partials), language)
+
+
+async def _extract_group(group: str, reduce: bool, user_prompt: str) -> Dict[str, Any]:
+    parsed = await _chat_json(_fanout_prompt(group, reduce), user_prompt)
+    return {k: parsed.get(k) for k in _SECTION_GROUPS[group][0] if k in parsed}
+
+
+def _resolve_strategy(strategy: Optional[str]) -> str:
+    strategy = strategy or settings.NOTES_STRATEGY
+    if strategy not in NOTES_STRATEGIES:
+        raise ValueError(f"Unknown notes strategy: {strategy}")
+    return strategy
+
+
+async def generate_structured_notes(
+    transcript_text: str,
+    language: str = "auto",
+    segments: Optional[List[Dict[str, Any]]] = None,
+    strategy: Optional[str] = None,
+) -> MeetingSummary:
+    """
+    Transcript court : un seul appel LLM.
+    Transcript long : map-reduce — notes partielles par section (en parallèle,
+    mises en cache par section), puis un appel de fusion vers un unique
+    MeetingSummary. Après une correction du transcript, seules les sections
+    modifiées et la fusion sont recalculées.
+    strategy="sections" : l'étape finale est éclatée en extractions
+    indépendantes (résumé, sujets, décisions, actions, suites) lancées en
+    parallèle — la génération des tokens de sortie n'est plus sérialisée.
+    Les appels LLM sont asynchrones et bornés par settings.LLM_MAX_CONCURRENCY.
+    Les résultats sont mis en cache (notes_cache) : une demande répétée sur le
+    même transcript ne relance pas le LLM.
+    """
+    language = language or "auto"
+    strategy = _resolve_strategy(strategy)
+    key = notes_cache_key(transcript_text, language, segments, strategy)
+    if settings.NOTES_CACHE_ENABLED:
+        cached = await asyncio.to_thread(notes_cache.get, key)
+        if cached is not None:
+            return MeetingSummary(**cached)
+
+    reduce, user_prompt = await _final_prompt(transcript_text, language, segments)
+    if strategy == "sections":
+        parsed: Dict[str, Any] = {}
+        for part in await asyncio.gather(
+            *(_extract_group(g, reduce, user_prompt) for g in _SECTION_GROUPS)
+        ):
+            parsed.update(part)
+    else:
+        parsed = await _chat_json(
+            _REDUCE_PROMPT if reduce else _SYSTEM_PROMPT, user_prompt
+        )
+
+    summary = _summary_from_json(parsed)
+    if settings.NOTES_CACHE_ENABLED:
+        await asyncio.to_thread(notes_cache.put, key, summary.model_dump())
+    return summary
+
+
+def _section_payload(name: str, value: Any) -> Any:
+    """Valeur d'une section normalisée via le schéma MeetingSummary."""
+    partial = _summary_from_json({name: value}).model_dump()
+    return partial.get(name, value)
+
+
+async def stream_structured_notes(
+    transcript_text: str,
+    language: str = "auto",
+    segments: Optional[List[Dict[str, Any]]] = None,
+    strategy: Optional[str] = None,
+) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Variante streaming de generate_structured_notes.
+    Produit ("section", {"name", "value"}) dès qu'une section du JSON est
+    complète (ou dès qu'une extraction parallèle se termine en mode
+    "sections"), puis ("summary", MeetingSummary) à la fin.
+    """
+    language = language or "auto"
+    strategy = _resolve_strategy(strategy)
+    key = notes_cache_key(transcript_text, language, segments, strategy)
+    if settings.NOTES_CACHE_ENABLED:
+        cached = await asyncio.to_thread(notes_cache.get, key)
+        if cached is not None:
+            summary = MeetingSummary(**cached)
+            for name, value in summary.model_dump().items():
+                yield "section", {"name": name, "value": value}
+            yield "summary", summary
+            return
+
+    reduce, user_prompt = await _final_prompt(transcript_text, language, segments)
+    parsed: Dict[str, Any] = {}
+    if strategy == "sections":
+        tasks = [
+            asyncio.create_task(_extract_group(g, reduce, user_prompt))
+            for g in _SECTION_GROUPS
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                for name, value in (await next_done).items():
+                    parsed[name] = value
+                    yield "section", {
+                        "name": name,
+                        "value": _section_payload(name, value),
+                    }
+        finally:
+            for task in tasks:
+                task.cancel()
+    else:
+        parser = JSONObjectStreamParser()
+        async for fragment in llm.stream_chat_json(
+            _REDUCE_PROMPT if reduce else _SYSTEM_PROMPT,
+            user_prompt,
+            model=settings.NOTES_MODEL_ID,
+        ):
+            for name, value in parser.feed(fragment):
+                parsed[name] = value
+                if name in MeetingSummary.model_fields:
+                    yield "section", {
+                        "name": name,
+                        "value": _section_payload(name, value),
+                    }
+
+    summary = _summary_from_json(parsed)
+    if settings.NOTES_CACHE_ENABLED:
+        await asyncio.to_thread(notes_cache.put, key, summary.model_dump())
+    yield "summary", summary
+
 
 def _ensure_dir(path: str):
     os.makedirs(path, exist_ok=True)
 
-def render_markdown(summary: MeetingSummary, transcript_text: str) -> str:
-    lines: List[str] = []
-    lines.append("# Meeting Report")
-    lines.append("")
+_STREAM_CHUNK = 64 * 1024
+
+
+def _iter_stripped(text: str, chunk_size: int = _STREAM_CHUNK) -> Iterator[str]:
+    """text.strip() par tranches, sans copie complète du texte."""
+    start, end = 0, len(text)
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    for i in range(start, end, chunk_size):
+        yield text[i : min(i + chunk_size, end)]
 
-    lines.append("## Summary")
-    lines.append(summary.executive_summary or "_(Not available)_")
-    lines.append("")
+
+def iter_markdown(summary: MeetingSummary, transcript_text: str) -> Iterator[str]:
+    """
+    Rapport Markdown produit morceau par morceau (lignes terminées par "\\n",
+    transcript découpé en tranches) pour l'écrire en flux dans un fichier.
+    """
+    yield "# Meeting Report\n"
+    yield "\n"
+
+    yield "## Summary\n"
+    yield f"{summary.executive_summary or '_(Not available)_'}\n"
+    yield "\n"
 
     if summary.objectives:
-        lines.append("## Meeting Objectives")
+        yield "## Meeting Objectives\n"
         for i, obj in enumerate(summary.objectives, start=1):
-            lines.append(f"{i}. {obj}")
-        lines.append("")
+            yield f"{i}. {obj}\n"
+        yield "\n"
 
     if summary.topics:
-        lines.append("## Key Discussion Points")
+        yield "## Key Discussion Points\n"
         for i, t in enumerate(summary.topics, start=1):
-            lines.append(f"### {i}. {t.title}")
+            yield f"### {i}. {t.title}\n"
             if t.description:
-                lines.append(t.description)
+                yield f"{t.description}\n"
             if t.start or t.end:
                 times = []
                 if t.start: times.append(f"start {t.start}")
                 if t.end: times.append(f"end {t.end}")
-                lines.append(f"_({', '.join(times)})_")
-            lines.append("")
-        lines.append("")
+                yield f"_({', '.join(times)})_\n"
+            yield "\n"
+        yield "\n"
 
     if summary.decisions:
-        lines.append("## Important Decisions")
+        yield "## Important Decisions\n"
         for i, d in enumerate(summary.decisions, start=1):
-            lines.append(f"{i}. {d}")
-        lines.append("")
+            yield f"{i}. {d}\n"
+        yield "\n"
 
     if summary.actions:
-        lines.append("## Action Items")
+        yield "## Action Items\n"
         for i, a in enumerate(summary.actions, start=1):
             who = f"**{a.owner}** - " if a.owner else ""
             due = f" _(due {a.due})_" if a.due else ""
-            lines.append(f"{i}. {who}{a.action}{due}")
-        lines.append("")
+            yield f"{i}. {who}{a.action}{due}\n"
+        yield "\n"
 
     if summary.outcomes:
-        lines.append("## Meeting Outcomes")
+        yield "## Meeting Outcomes\n"
         for i, o in enumerate(summary.outcomes, start=1):
-            lines.append(f"{i}. {o}")
-        lines.append("")
+            yield f"{i}. {o}\n"
+        yield "\n"
 
     if summary.next_steps:
-        lines.append("## Next Steps")
+        yield "## Next Steps\n"
         for i, s in enumerate(summary.next_steps, start=1):
-            lines.append(f"{i}. {s}")
-        lines.append("")
-
-    lines.append("---")
-    lines.append("## Full Transcript")
-    lines.append("")
-    lines.append("```text")
-    lines.append(transcript_text.strip())
-    lines.append("```")
-    return "\n".join(lines)
+            yield f"{i}. {s}\n"
+        yield "\n"
 
+    yield "---\n"
+    yield "## Full Transcript\n"
+    yield "\n"
+    yield "```text\n"
+    yield from _iter_stripped(transcript_text)
+    yield "\n```"
 
-def save_markdown(md_text: str, out_dir: str) -> str:
-    _ensure_dir(out_dir)
-    md_path = os.path.join(out_dir, "meeting-notes.md")
-    with open(md_path, "w", encoding="utf-8") as f:
-        f.write(md_text)
-    return md_path
 
 def save_pdf_simple(md_text: str, out_dir: str) -> str:
     """
@@ -191,7 +593,150 @@ def make_report_id() -> str:
     rid = uuid.uuid4().hex[:6]
     return f"{ts}_{rid}"
 
-def generate_pdf_report(summary: MeetingSummary, transcript: str, pdf_path: str) -> str:
+
+class _LazyFlowables:
+    """
+    Séquence de flowables pour doc.build() alimentée par un générateur.
+    reportlab consomme la liste par la tête (flowables[0], del flowables[0],
+    réinsertion des morceaux découpés) : un deque matérialisé par petits lots
+    évite à la fois la liste complète en mémoire et le coût O(n) de del [0].
+    Les autres accès (indices négatifs, tranches ouvertes) matérialisent le
+    reste du générateur et restent corrects. len() compte aussi ce que le
+    générateur n'a pas encore produit : `tail_count` éléments annoncés (sans
+    lui, len() matérialise tout le générateur).
+    """
+
+    _PREFETCH = 32
+
+    def __init__(
+        self, head: List[Any], tail: Iterator[Any], tail_count: Optional[int] = None
+    ):
+        self._buf: Deque[Any] = deque(head)
+        self._tail = tail
+        self._pending = tail_count  # éléments restant à tirer du générateur
+
+    def _fill(self, n: int) -> None:
+        while len(self._buf) < n:
+            try:
+                self._buf.append(next(self._tail))
+            except StopIteration:
+                self._pending = 0
+                break
+            if self._pending is not None:
+                self._pending = max(0, self._pending - 1)
+
+    def _fill_for(self, i: Union[int, slice]) -> None:
+        """Matérialise ce qu'il faut du générateur pour résoudre l'indice `i`."""
+        if isinstance(i, slice):
+            bounds = [b for b in (i.start, i.stop) if b is not None]
+            if i.stop is None or (i.step or 1) < 0 or any(b < 0 for b in bounds):
+                self._fill(sys.maxsize)  # relatif à la fin : tout le générateur
+            else:
+                self._fill(max(bounds))
+        else:
+            self._fill(sys.maxsize if i < 0 else i + 1)
+
+    def __len__(self) -> int:
+        if self._pending is None:
+            self._fill(sys.maxsize)
+            return len(self._buf)
+        return len(self._buf) + self._pending
+
+    def __getitem__(self, i: Union[int, slice]) -> Any:
+        self._fill_for(i)
+        if isinstance(i, slice):
+            return list(self._buf)[i]
+        return self._buf[i]
+
+    def __delitem__(self, i: Union[int, slice]) -> None:
+        self._fill_for(i)
+        if not isinstance(i, slice):
+            del self._buf[i]
+            return
+        start, stop, step = i.indices(len(self._buf))
+        if step != 1:
+            items = list(self._buf)
+            del items[i]
+            self._buf = deque(items)
+            return
+        # tranche contiguë (le cas de reportlab : [0:n]) : rotation, sans copie
+        self._buf.rotate(-start)
+        for _ in range(max(0, stop - start)):
+            self._buf.popleft()
+        self._buf.rotate(start)
+
+    def __setitem__(self, i: Union[int, slice], value: Any) -> None:
+        self._fill_for(i)
+        if not isinstance(i, slice):
+            self._buf[i] = value
+            return
+        start, stop, step = i.indices(len(self._buf))
+        if step != 1:
+            items = list(self._buf)
+            items[i] = value
+            self._buf = deque(items)
+            return
+        # tranche contiguë (le cas de reportlab : [0:0] = morceaux découpés)
+        new_items = list(value)
+        self._buf.rotate(-start)
+        for _ in range(max(0, stop - start)):
+            self._buf.popleft()
+        self._buf.extendleft(reversed(new_items))
+        self._buf.rotate(start)
+
+    def insert(self, i: int, item: Any) -> None:
+        self._buf.insert(i, item)
+
+
+_PLAIN_CHUNK_RE = re.compile(r"\S.{0,1500}(?:[.!?](?=\s)|$)|\S.{0,1500}\S*", re.S)
+
+
+def _transcript_segments(
+    segments: Optional[List[Dict[str, Any]]],
+) -> List[Dict[str, Any]]:
+    return [s for s in (segments or []) if (s.get("text") or "").strip()]
+
+
+def _transcript_flowable_count(
+    transcript: str, segments: Optional[List[Dict[str, Any]]]
+) -> int:
+    """Nombre de flowables produits par _transcript_flowables (sans les créer)."""
+    segs = _transcript_segments(segments)
+    if segs:
+        return len(segs)
+    return sum(1 for _ in _PLAIN_CHUNK_RE.finditer(transcript))
+
+
+def _transcript_flowables(
+    transcript: str,
+    segments: Optional[List[Dict[str, Any]]],
+    style: Any,
+) -> Iterator[Any]:
+    segs = _transcript_segments(segments)
+    if segs:
+        timestamps = any(s.get("end") for s in segs)
+        for s in segs:
+            prefix = ""
+            if timestamps:
+                prefix += (
+                    f'<font color="#666666">[{format_ts(s.get("start", 0.0))}]</font> '
+                )
+            if s.get("speaker"):
+                prefix += f"<b>{xml_escape(str(s['speaker']))}</b> "
+            yield Paragraph(prefix + xml_escape(s["text"].strip()), style)
+        return
+
+    # Texte brut : paragraphes d'environ 1500 caractères coupés en fin de phrase
+    for m in _PLAIN_CHUNK_RE.finditer(transcript):
+        yield Paragraph(xml_escape(m.group(0).strip()), style)
+
+
+def generate_pdf_report(
+    summary: MeetingSummary,
+    transcript: str,
+    pdf_path: str,
+    segments: Optional[List[Dict[str, Any]]] = None,
+) -> str:
     """
     PDF structuré selon le template 
     """
@@ -283,7 +828,36 @@ def generate_pdf_report(summary: MeetingSummary, transcript: str, pdf_path: str)
 
     elements.append(Paragraph("Appendix – Full Transcript", styles["Heading2"]))
     elements.append(Spacer(1, 6))
-    elements.append(Paragraph(transcript[:20000], body_style))
 
-    doc.build(elements)
+    # Transcript complet : un flowable par segment, produit à la demande
+    # pendant la mise en page (temps linéaire, mémoire bornée)
+    doc.build(
+        _LazyFlowables(
+            elements,
+            _transcript_flowables(transcript, segments, body_style),
+            _transcript_flowable_count(transcript, segments),
+        )
+    )
+    return pdf_path
+
+
+def render_pdf_file(
+    summary_data: Dict[str, Any],
+    transcript: str,
+    pdf_path: str,
+    segments: Optional[List[Dict[str, Any]]] = None,
+) -> str:
+    """
+    Point d'entrée du pool de rendu (processus worker) : arguments picklables,
+    écriture atomique pour qu'un PDF partiel ne soit jamais servi.
+    """
+    tmp_path = f"{pdf_path}.{os.getpid()}.tmp"
+    try:
+        generate_pdf_report(
+            MeetingSummary(**summary_data), transcript, tmp_path, segments
+        )
+        os.replace(tmp_path, pdf_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
     return pdf_path
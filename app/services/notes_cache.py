@@ -0,0 +1,112 @@
+"""
+Cache disque des notes structurées.
+
+Une entrée = un fichier JSON nommé par sa clé (hash du transcript normalisé,
+de la langue, du modèle et de la version des prompts). Éviction LRU dès que
+la taille totale dépasse `max_bytes`.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+
+
+def make_cache_key(*parts: str) -> str:
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+class NotesCache:
+    """Cache JSON sur disque, borné en taille, thread-safe."""
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # clé -> taille en octets, dans l'ordre LRU (le plus ancien en tête)
+        self._index: Optional["OrderedDict[str, int]"] = None
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.json")
+
+    def _load_index(self) -> "OrderedDict[str, int]":
+        if self._index is None:
+            os.makedirs(self.root, exist_ok=True)
+            entries = []
+            for entry in os.scandir(self.root):
+                if entry.is_file() and entry.name.endswith(".json"):
+                    st = entry.stat()
+                    entries.append((st.st_mtime, entry.name[:-5], st.st_size))
+            entries.sort()
+            self._index = OrderedDict((key, size) for _, key, size in entries)
+            self._bytes = sum(self._index.values())
+        return self._index
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            index = self._load_index()
+            if key not in index:
+                self.misses += 1
+                return None
+            path = self._path(key)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    value: Dict[str, Any] = json.load(f)
+                os.utime(path)
+            except (OSError, ValueError):
+                self._bytes -= index.pop(key)
+                self.misses += 1
+                return None
+            index.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        data = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        with self._lock:
+            index = self._load_index()
+            path = self._path(key)
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+
+            self._bytes += len(data) - index.pop(key, 0)
+            index[key] = len(data)
+            while self._bytes > self.max_bytes and len(index) > 1:
+                old_key, size = index.popitem(last=False)
+                try:
+                    os.remove(self._path(old_key))
+                except FileNotFoundError:
+                    pass
+                self._bytes -= size
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            index = self._load_index()
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(index),
+                "bytes_stored": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+notes_cache = NotesCache(settings.NOTES_CACHE_DIR, settings.NOTES_CACHE_MAX_BYTES)
@@ -0,0 +1,91 @@
+"""
+Pool de processus borné pour les tâches CPU (rendu PDF, hachage bcrypt).
+
+Les tâches tournent hors de la boucle d'événements, dans un
+ProcessPoolExecutor. Au-delà de `max_workers + queue_limit` tâches en
+attente, submit() lève PoolSaturated (l'API répond 503).
+"""
+
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class PoolSaturated(Exception):
+    pass
+
+
+class BoundedProcessPool:
+    def __init__(self, max_workers: int, queue_limit: int, name: str = "process"):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.queue_limit = max(0, queue_limit)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self._tasks: Set[asyncio.Future] = set()
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.queue_limit
+
+    def saturated(self) -> bool:
+        return self._pending >= self.capacity
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn : pas de fork d'un processus multi-thread (boucle, clients HTTP)
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> "asyncio.Future[Any]":
+        """
+        Planifie fn(*args) dans un processus worker. Le résultat peut être
+        attendu ou ignoré (les erreurs sont alors journalisées).
+        """
+        if self.saturated():
+            self.rejected += 1
+            raise PoolSaturated(
+                f"{self.name} pool is full ({self._pending} pending jobs)"
+            )
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._get_executor(), fn, *args)
+        self._pending += 1
+        self._tasks.add(future)
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _on_done(self, future: "asyncio.Future[Any]") -> None:
+        self._pending -= 1
+        self._tasks.discard(future)
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            self.failed += 1
+            logger.error("%s job failed", self.name, exc_info=future.exception())
+        else:
+            self.completed += 1
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "workers": self.max_workers,
+            "capacity": self.capacity,
+            "pending": self._pending,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,437 @@
+"""
+Limitation de débit et quotas par utilisateur des endpoints coûteux
+(/reports/transcribe, /reports/notes, ouverture d'upload, WebSocket
+/reports/live, PUT des parties d'upload).
+
+Un middleware ASGI identifie l'appelant à partir des seuls en-têtes et de
+la query string ("user:<id>" si le JWT est valide, "token:<sha256>" pour
+un en-tête X-API-Token, sinon "ip:<adresse>") et consulte des seaux à
+jetons :
+- requêtes : RATE_LIMIT_BURST d'affilée, puis RATE_LIMIT_REQUESTS_PER_MINUTE ;
+- parties d'upload : seau séparé (RATE_LIMIT_UPLOAD_PARTS_PER_MINUTE), sans
+  quota ni entrée au journal de consommation ;
+- audio et tokens LLM : débités après coup de la consommation réelle
+  (usage.py), ils peuvent passer en négatif ; l'appelant est refusé tant
+  que le seau n'est pas revenu à zéro.
+
+Un refus (429 + Retry-After) est décidé avant la lecture du corps : ni
+upload multipart, ni décodage audio, ni appel LLM. Un WebSocket refusé est
+fermé (code 1008) avant d'être accepté ; une session acceptée est débitée
+à chaque fenêtre transcrite (usage.checkpoint), pas seulement à la fin.
+
+Les seaux sont en mémoire (par processus) ou dans Redis (partagés entre
+réplicas, mise à jour atomique par script Lua) ; le store est injectable.
+"""
+
+import hashlib
+import logging
+import math
+import re
+import time
+from abc import ABC, abstractmethod
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    MutableMapping,
+    Optional,
+    Pattern,
+    Tuple,
+)
+from urllib.parse import parse_qs
+
+from jose import JWTError, jwt
+from starlette.responses import JSONResponse
+
+from app.core.config import settings
+from app.services.usage import UsageLedger, UsageMeter, metered, usage_ledger
+from app.utils.lru_cache import TTLCache
+
+try:  # dépendance optionnelle (RATE_LIMIT_BACKEND="redis")
+    from redis import asyncio as redis_asyncio
+except ImportError:  # pragma: no cover
+    redis_asyncio = None
+
+logger = logging.getLogger(__name__)
+
+LIMITED_PATHS = (
+    "/reports/transcribe",
+    "/reports/notes",
+    "/reports/notes/stream",
+    "/reports/uploads",
+)
+LIMITED_WEBSOCKETS = ("/reports/live",)
+# PUT /reports/uploads/{upload_id}/parts/{part_number}
+LIMITED_UPLOAD_PARTS = re.compile(r"^/reports/uploads/[^/]+/parts/[^/]+$")
+
+
+class RateLimitStore(ABC):
+    @abstractmethod
+    async def take(
+        self,
+        key: str,
+        cost: float,
+        rate: float,
+        capacity: float,
+        allow_debt: bool = False,
+    ) -> float:
+        """
+        Retire `cost` jetons du seau `key` (remplissage `rate` jetons/s,
+        au plus `capacity`). Renvoie 0 si c'est accepté, sinon le nombre de
+        secondes avant que ça le soit. allow_debt : toujours accepté, le
+        seau peut passer en négatif.
+        """
+
+    async def close(self) -> None:
+        pass
+
+
+class MemoryRateLimitStore(RateLimitStore):
+    def __init__(self, max_keys: int = 100_000):
+        # un seau plein n'est pas conservé : l'entrée expire quand il l'est
+        self._buckets: TTLCache[Tuple[float, float]] = TTLCache(max_keys, 7 * 86400.0)
+
+    async def take(
+        self,
+        key: str,
+        cost: float,
+        rate: float,
+        capacity: float,
+        allow_debt: bool = False,
+    ) -> float:
+        now = time.monotonic()
+        state = self._buckets.get(key)
+        tokens = (
+            capacity
+            if state is None
+            else min(capacity, state[0] + (now - state[1]) * rate)
+        )
+        if not allow_debt and tokens < cost:
+            return (cost - tokens) / rate
+        tokens -= cost
+        self._buckets.put(key, (tokens, now), (capacity - tokens) / rate)
+        return 0.0
+
+
+# ARGV : rate, capacity, cost, allow_debt ; horloge du serveur Redis (commune
+# aux réplicas). Résultat en chaîne : Lua tronque les nombres renvoyés.
+_REDIS_TAKE = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = capacity
+if state[1] then
+  tokens = math.min(capacity, tonumber(state[1]) + (now - tonumber(state[2])) * rate)
+end
+if ARGV[4] == '0' and tokens < cost then
+  return tostring((cost - tokens) / rate)
+end
+tokens = tokens - cost
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.max(1, math.ceil((capacity - tokens) / rate * 1000)))
+return '0'
+"""
+
+
+class RedisRateLimitStore(RateLimitStore):
+    def __init__(self, client: Any = None, prefix: str = "ratelimit:"):
+        self._client = client
+        self.prefix = prefix
+        self._script: Any = None
+
+    @property
+    def client(self) -> Any:
+        if self._client is None:
+            if redis_asyncio is None:
+                raise RuntimeError(
+                    "RATE_LIMIT_BACKEND='redis' requires the redis package"
+                )
+            self._client = redis_asyncio.Redis.from_url(settings.RATE_LIMIT_REDIS_URL)
+        return self._client
+
+    async def take(
+        self,
+        key: str,
+        cost: float,
+        rate: float,
+        capacity: float,
+        allow_debt: bool = False,
+    ) -> float:
+        if self._script is None:
+            # EVALSHA, avec repli sur EVAL si le script n'est pas en cache
+            self._script = self.client.register_script(_REDIS_TAKE)
+        wait = await self._script(
+            keys=[self.prefix + key], args=[rate, capacity, cost, int(allow_debt)]
+        )
+        return float(wait)
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def make_store() -> RateLimitStore:
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        return RedisRateLimitStore()
+    if settings.RATE_LIMIT_BACKEND != "memory":
+        raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {settings.RATE_LIMIT_BACKEND!r}")
+    return MemoryRateLimitStore()
+
+
+class RateLimiter:
+    def __init__(self, store: Optional[RateLimitStore] = None):
+        self._store = store
+
+    @property
+    def store(self) -> RateLimitStore:
+        if self._store is None:
+            self._store = make_store()
+        return self._store
+
+    def _quotas(self) -> Iterable[Tuple[str, float]]:
+        """(type, quantité par heure) des quotas actifs."""
+        for kind, per_hour in (
+            ("audio", settings.QUOTA_AUDIO_SECONDS_PER_HOUR),
+            ("llm", float(settings.QUOTA_LLM_TOKENS_PER_HOUR)),
+        ):
+            if per_hour > 0:
+                yield kind, per_hour
+
+    async def check(self, principal: str) -> float:
+        """0 si la requête est acceptée, sinon le délai (s) avant de réessayer."""
+        # quotas d'abord : ils ne consomment rien (coût nul, refus si négatif)
+        for kind, per_hour in self._quotas():
+            wait = await self.store.take(
+                f"{kind}:{principal}", 0, per_hour / 3600, per_hour
+            )
+            if wait > 0:
+                return wait
+        if settings.RATE_LIMIT_REQUESTS_PER_MINUTE <= 0:
+            return 0.0
+        return await self.store.take(
+            f"req:{principal}",
+            1,
+            settings.RATE_LIMIT_REQUESTS_PER_MINUTE / 60,
+            max(1, settings.RATE_LIMIT_BURST),
+        )
+
+    async def check_upload_part(self, principal: str) -> float:
+        """Comme check(), pour un PUT de partie : seau séparé, sans quotas."""
+        per_minute = settings.RATE_LIMIT_UPLOAD_PARTS_PER_MINUTE
+        if per_minute <= 0:
+            return 0.0
+        # une minute de parties d'affilée : un upload repris repart vite
+        return await self.store.take(
+            f"part:{principal}", 1, per_minute / 60, max(1.0, per_minute)
+        )
+
+    async def charge(self, principal: str, meter: UsageMeter) -> None:
+        """Débite la consommation réelle d'une requête terminée."""
+        used = {"audio": meter.audio_seconds, "llm": float(meter.llm_tokens)}
+        for kind, per_hour in self._quotas():
+            if used[kind] > 0:
+                await self.store.take(
+                    f"{kind}:{principal}",
+                    used[kind],
+                    per_hour / 3600,
+                    per_hour,
+                    allow_debt=True,
+                )
+
+
+def _bearer_token(
+    scope: MutableMapping[str, Any], headers: Dict[bytes, bytes]
+) -> Optional[str]:
+    authorization = headers.get(b"authorization", b"").decode("latin-1")
+    if not authorization:
+        # les navigateurs n'envoient pas d'en-tête sur un WebSocket : ?token=
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        authorization = (query.get("token") or [""])[0]
+        if authorization and not authorization.startswith("Bearer "):
+            authorization = f"Bearer {authorization}"
+    parts = authorization.split(" ")
+    return parts[1] if len(parts) == 2 and parts[0] == "Bearer" else None
+
+
+def request_principal(scope: MutableMapping[str, Any]) -> Tuple[str, Optional[int]]:
+    """(clé de limitation, id utilisateur) d'après les en-têtes et la query string."""
+    headers = dict(scope.get("headers") or [])
+    token = _bearer_token(scope, headers)
+    if token is not None:
+        try:
+            payload = jwt.decode(
+                token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+            )
+            user_id = int(payload["user_id"])
+            return f"user:{user_id}", user_id
+        except (JWTError, KeyError, TypeError, ValueError):
+            pass  # jeton invalide : l'endpoint répondra 401, limité par adresse
+    api_token = headers.get(b"x-api-token")
+    if api_token:
+        # pas de base ici : clé dérivée du jeton, qui n'est jamais conservé ;
+        # un jeton inconnu est refusé par l'endpoint (401)
+        return f"token:{hashlib.sha256(api_token).hexdigest()}", None
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}", None
+
+
+Message = MutableMapping[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+
+
+class RateLimitMiddleware:
+    """
+    Limite, compte et journalise les requêtes POST sur `paths` et les
+    sessions WebSocket sur `websocket_paths` ; limite seulement les PUT dont
+    le chemin correspond à `upload_parts`.
+    """
+
+    def __init__(
+        self,
+        app: Any,
+        paths: Iterable[str] = LIMITED_PATHS,
+        limiter: Optional[RateLimiter] = None,
+        ledger: Optional[UsageLedger] = None,
+        websocket_paths: Iterable[str] = LIMITED_WEBSOCKETS,
+        upload_parts: Pattern[str] = LIMITED_UPLOAD_PARTS,
+    ):
+        self.app = app
+        self.paths = frozenset(paths)
+        self.websocket_paths = frozenset(websocket_paths)
+        self.upload_parts = upload_parts
+        self._limiter = limiter
+        self._ledger = ledger
+        self.rejected = 0
+
+    @property
+    def limiter(self) -> RateLimiter:
+        return self._limiter or rate_limiter
+
+    @property
+    def ledger(self) -> UsageLedger:
+        return self._ledger or usage_ledger
+
+    async def __call__(
+        self, scope: MutableMapping[str, Any], receive: Receive, send: Send
+    ) -> None:
+        if (
+            scope["type"] == "http"
+            and scope["method"] == "PUT"
+            and self.upload_parts.match(scope["path"])
+        ):
+            await self._limit_upload_part(scope, receive, send)
+            return
+        websocket = (
+            scope["type"] == "websocket" and scope["path"] in self.websocket_paths
+        )
+        if not websocket and (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or scope["path"] not in self.paths
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        principal, owner_id = request_principal(scope)
+        if settings.RATE_LIMIT_ENABLED:
+            try:
+                wait = await self.limiter.check(principal)
+            except Exception:
+                # store indisponible (Redis) : on laisse passer plutôt que
+                # de rendre l'API indisponible
+                logger.exception("rate limit check failed")
+                wait = 0.0
+            if wait > 0:
+                self.rejected += 1
+                if websocket:
+                    # avant accept : le client reçoit un refus de la poignée de main
+                    await send(
+                        {
+                            "type": "websocket.close",
+                            "code": 1008,
+                            "reason": "Rate limit or usage quota exceeded",
+                        }
+                    )
+                    return
+                await self._reject(wait, scope, receive, send)
+                return
+
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "websocket.accept":
+                status_code = 101
+            elif message["type"] == "websocket.close" and status_code == 500:
+                status_code = 403  # refusé par l'endpoint avant accept
+            await send(message)
+
+        charged = UsageMeter()
+
+        async def charge(meter: UsageMeter) -> None:
+            """Débite ce qui a été consommé depuis le dernier débit."""
+            used = UsageMeter(
+                meter.audio_seconds - charged.audio_seconds,
+                meter.llm_tokens - charged.llm_tokens,
+            )
+            charged.audio_seconds, charged.llm_tokens = (
+                meter.audio_seconds,
+                meter.llm_tokens,
+            )
+            if settings.RATE_LIMIT_ENABLED:
+                try:
+                    await self.limiter.charge(principal, used)
+                except Exception:
+                    logger.exception("usage charge failed")
+
+        with metered() as meter:
+            meter.on_checkpoint = charge
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                self.ledger.add(principal, owner_id, scope["path"], status_code, meter)
+                await charge(meter)
+
+    async def _limit_upload_part(
+        self, scope: MutableMapping[str, Any], receive: Receive, send: Send
+    ) -> None:
+        # sans quota audio/LLM à débiter ni entrée au journal : un upload
+        # compte des centaines de parties
+        if settings.RATE_LIMIT_ENABLED:
+            principal, _ = request_principal(scope)
+            try:
+                wait = await self.limiter.check_upload_part(principal)
+            except Exception:
+                logger.exception("rate limit check failed")
+                wait = 0.0
+            if wait > 0:
+                self.rejected += 1
+                await self._reject(wait, scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+    async def _reject(
+        self,
+        wait: float,
+        scope: MutableMapping[str, Any],
+        receive: Receive,
+        send: Send,
+    ) -> None:
+        response = JSONResponse(
+            {"detail": "Rate limit or usage quota exceeded, retry later"},
+            status_code=429,
+            headers={"Retry-After": str(math.ceil(wait))},
+        )
+        await response(scope, receive, send)
+
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,13 @@
+"""
+Pool de processus pour le rendu des exports (PDF).
+
+Le rendu reportlab est du CPU pur : il tourne dans un BoundedProcessPool ;
+une fois la file pleine, submit() lève PoolSaturated (l'API répond 503).
+"""
+
+from app.core.config import settings
+from app.services.process_pool import BoundedProcessPool
+
+pdf_pool = BoundedProcessPool(
+    settings.PDF_RENDER_WORKERS, settings.PDF_RENDER_QUEUE_LIMIT, name="pdf"
+)
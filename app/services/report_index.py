@@ -0,0 +1,110 @@
+"""
+Index des rapports en base (table reports).
+
+Une ligne par rapport, écrite à la fin de /reports/notes avec les lignes
+de report_chunks (même transaction, voir search.index_report) ; les exports
+rendus à la demande y ajoutent leur chemin et leur taille. Le listing est
+paginé par curseur (created_at, id) sur l'index (owner_id, created_at, id) :
+le coût d'une page ne dépend pas de sa position dans la liste.
+"""
+
+import base64
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import literal, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.report import Report
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _duration(segments: Optional[List[Dict[str, Any]]]) -> Optional[float]:
+    ends = [float(s.get("end") or 0.0) for s in segments or []]
+    return max(ends) if ends and max(ends) > 0 else None
+
+
+async def record_report(
+    db: AsyncSession,
+    report_id: str,
+    source_path: str,
+    source_bytes: int,
+    language: Optional[str],
+    segments: Optional[List[Dict[str, Any]]] = None,
+    owner_id: Optional[int] = None,
+    status: str = "ready",
+) -> Report:
+    report = Report(
+        id=report_id,
+        owner_id=owner_id,
+        created_at=datetime.utcnow(),
+        duration_sec=_duration(segments),
+        language=language,
+        status=status,
+        source_path=source_path,
+        artifacts={
+            os.path.basename(source_path): {"path": source_path, "bytes": source_bytes}
+        },
+    )
+    # validé par l'appelant, dans la même transaction que l'indexation
+    db.add(report)
+    return report
+
+
+async def record_artifact(
+    db: AsyncSession, report_id: str, path: str, size: int
+) -> None:
+    """Ajoute un export rendu (clé de stockage, taille) à la ligne du rapport."""
+    report = await db.get(Report, report_id)
+    if report is None:  # rapport créé avant l'index
+        return
+    artifacts = dict(report.artifacts or {})
+    artifacts[os.path.basename(path)] = {"path": path, "bytes": size}
+    await db.execute(
+        update(Report).where(Report.id == report_id).values(artifacts=artifacts)
+    )
+    await db.commit()
+
+
+def encode_cursor(report: Report) -> str:
+    raw = f"{report.created_at.isoformat()}|{report.id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        created_at, report_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), report_id
+    except (ValueError, UnicodeError):
+        raise InvalidCursor("Invalid cursor")
+
+
+async def list_reports(
+    db: AsyncSession,
+    owner_id: int,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+) -> Tuple[List[Report], Optional[str]]:
+    """
+    Rapports d'un utilisateur, du plus récent au plus ancien.
+    Renvoie (page, curseur de la page suivante ou None).
+    """
+    query = select(Report).where(Report.owner_id == owner_id)
+    if cursor:
+        created_at, report_id = decode_cursor(cursor)
+        # comparaison de tuples : SQLite/PostgreSQL en font une borne d'index,
+        # contrairement à la forme "a < x OR (a = x AND b < y)"
+        query = query.where(
+            tuple_(Report.created_at, Report.id)
+            < tuple_(literal(created_at), literal(report_id))
+        )
+    query = query.order_by(Report.created_at.desc(), Report.id.desc()).limit(limit + 1)
+
+    rows = list((await db.execute(query)).scalars())
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
@@ -0,0 +1,356 @@
+"""
+Rétention des rapports du stockage (tâche de fond lancée par le lifespan).
+
+Politiques :
+- âge : un rapport non consulté depuis RETENTION_MAX_AGE_DAYS est supprimé
+  (répertoire et lignes en base), ainsi que les transcripts enregistrés
+  plus anciens ;
+- taille : au-delà de RETENTION_MAX_BYTES, les exports rendus (Markdown,
+  PDF, sous-titres et leurs variantes compressées, recalculables depuis
+  report.json) sont évincés du moins récemment consulté au plus récent,
+  puis, si cela ne suffit pas, les rapports eux-mêmes.
+
+Les sessions d'upload expirées (et leur audio) sont purgées au passage.
+Les lignes en base sont supprimées avant les fichiers : un échec de la base
+laisse le rapport intact, et il est repris au passage suivant.
+
+La dernière consultation d'un rapport est connue du stockage, partagé par
+les réplicas (mtime du répertoire en local, mis à jour à chaque
+téléchargement par record_access ; objet marqueur en S3, réécrit au plus
+une fois par heure : l'âge y est connu à l'heure près). Chaque
+passage examine au plus RETENTION_SCAN_BATCH rapports et effectue au
+plus RETENTION_DELETE_BATCH suppressions : l'index en mémoire (usage par
+rapport) se complète sur plusieurs passages, la politique de taille
+n'agit qu'une fois un parcours complet terminé.
+"""
+
+import asyncio
+import heapq
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, select, update
+
+from app.core.config import settings
+from app.models.report import Report, ReportChunk, StoredTranscript
+from app.services.artifacts import (
+    REPORT_SOURCE,
+    ArtifactNotFound,
+    artifact_store,
+    report_key,
+)
+from app.services.similarity import remove_chunks
+from app.services.storage import ACCESS_MARKER, ObjectInfo, Storage, get_storage
+from app.services.uploads import purge_expired_uploads
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Usage:
+    last_access: float
+    source_bytes: int
+    render_bytes: int
+
+    @property
+    def bytes(self) -> int:
+        return self.source_bytes + self.render_bytes
+
+
+def _is_source(obj: ObjectInfo) -> bool:
+    return obj.key.rsplit("/", 1)[-1] == REPORT_SOURCE
+
+
+def _is_render(obj: ObjectInfo) -> bool:
+    return obj.key.rsplit("/", 1)[-1] not in (REPORT_SOURCE, ACCESS_MARKER)
+
+
+def _measure(storage: Storage, prefix: str) -> Optional[_Usage]:
+    objects = list(storage.list(prefix))
+    if not objects:  # supprimé pendant le parcours
+        return None
+    source = sum(obj.size for obj in objects if _is_source(obj))
+    render = sum(obj.size for obj in objects if _is_render(obj))
+    return _Usage(storage.accessed_at(prefix, objects), source, render)
+
+
+class RetentionManager:
+    def __init__(
+        self,
+        storage: Optional[Storage] = None,
+        max_bytes: Optional[int] = None,
+        max_age_days: Optional[float] = None,
+        scan_batch: Optional[int] = None,
+        delete_batch: Optional[int] = None,
+        grace_sec: Optional[float] = None,
+        session_factory: Optional[Callable[[], Any]] = None,
+    ):
+        self._storage = storage
+        self.max_bytes = (
+            settings.RETENTION_MAX_BYTES if max_bytes is None else max_bytes
+        )
+        self.max_age_days = (
+            settings.RETENTION_MAX_AGE_DAYS if max_age_days is None else max_age_days
+        )
+        self.scan_batch = scan_batch or settings.RETENTION_SCAN_BATCH
+        self.delete_batch = delete_batch or settings.RETENTION_DELETE_BATCH
+        self.grace_sec = (
+            settings.RETENTION_GRACE_SEC if grace_sec is None else grace_sec
+        )
+        self._session_factory = session_factory
+        self._lock = threading.Lock()
+        self._entries: Dict[str, _Usage] = {}
+        self._scan: Optional[Iterator[str]] = None
+        self._seen: Set[str] = set()
+        self.scan_complete = False
+        self.passes = 0
+        self.bytes_reclaimed = 0
+        self.reports_deleted = 0
+        self.renders_evicted = 0
+        self.transcripts_deleted = 0
+        self.uploads_deleted = 0
+
+    @property
+    def storage(self) -> Storage:
+        return self._storage or get_storage()
+
+    # ---------- accès ----------
+
+    def record_access(self, report_id: str) -> None:
+        """Marque le rapport comme consulté (LRU), en mémoire et dans le stockage."""
+        try:
+            prefix = report_key(report_id)
+        except ArtifactNotFound:
+            return
+        self.storage.touch(prefix)
+        now = time.time()
+        with self._lock:
+            usage = self._entries.get(report_id)
+            if usage is not None:
+                usage.last_access = now
+
+    # ---------- parcours ----------
+
+    def _scan_step(self) -> None:
+        """Mesure au plus scan_batch rapports, reprend au passage suivant."""
+        if self._scan is None:
+            self._scan = self.storage.list_prefixes()
+            self._seen = set()
+        for _ in range(self.scan_batch):
+            report_id = next(self._scan, None)
+            if report_id is None:
+                self._scan = None
+                with self._lock:
+                    for gone in self._entries.keys() - self._seen:
+                        del self._entries[gone]
+                self.scan_complete = True
+                self.passes += 1
+                return
+            try:
+                prefix = report_key(report_id)
+            except ArtifactNotFound:  # pas un rapport
+                continue
+            usage = _measure(self.storage, prefix)
+            if usage is None:
+                continue
+            self._seen.add(report_id)
+            with self._lock:
+                known = self._entries.get(report_id)
+                if known is not None:
+                    usage.last_access = max(usage.last_access, known.last_access)
+                self._entries[report_id] = usage
+
+    def _plan(self, now: float) -> Tuple[List[str], List[str]]:
+        """(rapports dont évincer les exports, rapports à supprimer), bornés par delete_batch."""
+        with self._lock:
+            candidates = [
+                (rid, u)
+                for rid, u in self._entries.items()
+                if u.last_access < now - self.grace_sec
+                and not artifact_store.rendering(rid)
+            ]
+            budget = self.delete_batch
+            deletions: List[str] = []
+            if self.max_age_days:
+                cutoff = now - self.max_age_days * 86400
+                deletions = [rid for rid, u in candidates if u.last_access < cutoff][
+                    :budget
+                ]
+                budget -= len(deletions)
+
+            evictions: List[str] = []
+            excess = sum(u.bytes for u in self._entries.values()) - sum(
+                self._entries[rid].bytes for rid in deletions
+            )
+            excess -= self.max_bytes
+            if self.max_bytes and self.scan_complete and excess > 0 and budget > 0:
+                chosen = set(deletions)
+                rendered = [
+                    (rid, u)
+                    for rid, u in candidates
+                    if u.render_bytes and rid not in chosen
+                ]
+                for rid, u in heapq.nsmallest(
+                    budget, rendered, key=lambda c: c[1].last_access
+                ):
+                    if excess <= 0:
+                        break
+                    evictions.append(rid)
+                    excess -= u.render_bytes
+                budget -= len(evictions)
+                if excess > 0 and budget > 0:
+                    # exports évincés et toujours trop gros : rapports les plus anciens
+                    evicted = set(evictions)
+                    rest = [(rid, u) for rid, u in candidates if rid not in chosen]
+                    for rid, u in heapq.nsmallest(
+                        budget, rest, key=lambda c: c[1].last_access
+                    ):
+                        if excess <= 0:
+                            break
+                        deletions.append(rid)
+                        excess -= u.source_bytes if rid in evicted else u.bytes
+            return evictions, deletions
+
+    def _evict_renders(self, report_id: str) -> int:
+        renders = [
+            obj for obj in self.storage.list(report_key(report_id)) if _is_render(obj)
+        ]
+        self.storage.delete(obj.key for obj in renders)
+        with self._lock:
+            usage = self._entries.get(report_id)
+            if usage is not None:
+                usage.render_bytes = 0
+        return sum(obj.size for obj in renders)
+
+    def _delete_report(self, report_id: str) -> int:
+        self.storage.delete_prefix(report_key(report_id))
+        with self._lock:
+            usage = self._entries.pop(report_id, None)
+        return usage.bytes if usage else 0
+
+    def _scan_and_plan(self, now: float) -> Tuple[List[str], List[str]]:
+        self._scan_step()
+        return self._plan(now)
+
+    def _sweep(self, evictions: List[str], deletions: List[str]) -> None:
+        for rid in evictions:
+            self.bytes_reclaimed += self._evict_renders(rid)
+        for rid in deletions:
+            self.bytes_reclaimed += self._delete_report(rid)
+        self.renders_evicted += len(evictions)
+        self.reports_deleted += len(deletions)
+
+    # ---------- base de données ----------
+
+    async def _sync_db(
+        self, evictions: List[str], deletions: List[str], now: float
+    ) -> List[int]:
+        """Met la base à jour ; renvoie les ids des report_chunks supprimés."""
+        factory = self._session_factory
+        if factory is None:
+            from app.db.session import sessionmanager
+
+            factory = sessionmanager.session
+        async with factory() as db:
+            chunk_ids: List[int] = []
+            if deletions:
+                chunk_ids = list(
+                    (
+                        await db.execute(
+                            select(ReportChunk.id).where(
+                                ReportChunk.report_id.in_(deletions)
+                            )
+                        )
+                    ).scalars()
+                )
+                # pas de ON DELETE CASCADE effectif sur SQLite sans PRAGMA foreign_keys
+                await db.execute(
+                    delete(ReportChunk).where(ReportChunk.report_id.in_(deletions))
+                )
+                await db.execute(delete(Report).where(Report.id.in_(deletions)))
+            for rid in evictions:
+                report = await db.get(Report, rid)
+                if report is not None:
+                    source = os.path.basename(report.source_path)
+                    artifacts = {
+                        k: v for k, v in (report.artifacts or {}).items() if k == source
+                    }
+                    await db.execute(
+                        update(Report)
+                        .where(Report.id == rid)
+                        .values(artifacts=artifacts)
+                    )
+            if self.max_age_days:
+                cutoff = datetime.utcfromtimestamp(now) - timedelta(
+                    days=self.max_age_days
+                )
+                expired = (
+                    select(StoredTranscript.id)
+                    .where(StoredTranscript.created_at < cutoff)
+                    .limit(self.delete_batch)
+                )
+                result = await db.execute(
+                    delete(StoredTranscript).where(StoredTranscript.id.in_(expired))
+                )
+                self.transcripts_deleted += result.rowcount or 0
+            self.uploads_deleted += await purge_expired_uploads(
+                db, self.storage, datetime.utcfromtimestamp(now), self.delete_batch
+            )
+            await db.commit()
+        return chunk_ids
+
+    # ---------- boucle ----------
+
+    async def tick(self, now: Optional[float] = None) -> None:
+        now = now or time.time()
+        evictions, deletions = await asyncio.to_thread(self._scan_and_plan, now)
+        # lignes d'abord : si la base échoue, les fichiers restent et le
+        # rapport est replanifié au passage suivant ; /reports ne liste
+        # jamais un rapport dont les fichiers ont disparu
+        chunk_ids = await self._sync_db(evictions, deletions, now)
+        await asyncio.to_thread(self._sweep, evictions, deletions)
+        # vecteurs des lignes supprimées : hors des résultats, puis retirés
+        # du segment à la prochaine compaction
+        await remove_chunks(chunk_ids)
+        if evictions or deletions:
+            logger.info(
+                "retention: %d renders evicted, %d reports deleted",
+                len(evictions),
+                len(deletions),
+            )
+
+    async def run(self, interval: Optional[float] = None) -> None:
+        interval = interval or settings.RETENTION_INTERVAL_SEC
+        while True:
+            try:
+                await self.tick()
+            except Exception:
+                logger.exception("retention sweep failed")
+            await asyncio.sleep(interval)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            usages = list(self._entries.values())
+        return {
+            "reports": len(usages),
+            "bytes_used": sum(u.bytes for u in usages),
+            "source_bytes": sum(u.source_bytes for u in usages),
+            "render_bytes": sum(u.render_bytes for u in usages),
+            "max_bytes": self.max_bytes,
+            "max_age_days": self.max_age_days,
+            "scan_complete": self.scan_complete,
+            "passes": self.passes,
+            "bytes_reclaimed": self.bytes_reclaimed,
+            "renders_evicted": self.renders_evicted,
+            "reports_deleted": self.reports_deleted,
+            "transcripts_deleted": self.transcripts_deleted,
+            "uploads_deleted": self.uploads_deleted,
+        }
+
+
+retention = RetentionManager()
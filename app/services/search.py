@@ -0,0 +1,244 @@
+"""
+Recherche plein texte dans les transcripts et les notes.
+
+Indexation : à la création d'un rapport, chaque segment du transcript
+(avec ses timestamps) et chaque champ du résumé devient une ligne de
+report_chunks. L'index dépend du moteur (voir app/models/report.py) :
+FTS5 + bm25 sur SQLite, tsvector + GIN + ts_rank sur PostgreSQL.
+L'extrait renvoyé avec chaque résultat est construit en Python : le
+snippet() de FTS5 impose de réévaluer la requête pour chaque ligne.
+"""
+
+import re
+import unicodedata
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.notes import MeetingSummary
+from app.models.report import ReportChunk
+
+# Texte brut sans segments : morceaux d'environ 1000 caractères
+_PLAIN_CHUNK_RE = re.compile(r"\S.{0,1000}(?:[.!?](?=\s)|$)|\S.{0,1000}\S*", re.S)
+_TS_RE = re.compile(r"^(\d+):(\d{2}):(\d{2})$")
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class SearchUnavailable(RuntimeError):
+    """Moteur de base de données sans index plein texte (ni SQLite ni PostgreSQL)."""
+
+
+# Les termes très fréquents correspondent à une grande partie de l'index :
+# le score n'est calculé que pour les `candidates` correspondances les plus
+# récentes de l'utilisateur (parcours par id décroissant, arrêt anticipé).
+_SQLITE_SEARCH = text(
+    """
+    SELECT c.report_id, c.kind, c.field, c.start, c."end", c.speaker, c.text,
+           -m.score AS score
+    FROM (
+        SELECT f.rowid AS id, bm25(report_chunks_fts) AS score
+        FROM report_chunks_fts AS f
+        JOIN report_chunks AS o ON o.id = f.rowid
+        WHERE report_chunks_fts MATCH :query AND o.owner_id = :owner_id
+        ORDER BY f.rowid DESC
+        LIMIT :candidates
+    ) AS m
+    JOIN report_chunks AS c ON c.id = m.id
+    ORDER BY m.score
+    LIMIT :limit
+    """
+)
+
+_POSTGRES_SEARCH = text(
+    """
+    SELECT c.report_id, c.kind, c.field, c.start, c."end", c.speaker, c.text,
+           ts_rank(c.tsv, m.q) AS score
+    FROM (
+        SELECT o.id, q
+        FROM report_chunks AS o, websearch_to_tsquery('simple', :query) AS q
+        WHERE o.tsv @@ q AND o.owner_id = :owner_id
+        ORDER BY o.id DESC
+        LIMIT :candidates
+    ) AS m
+    JOIN report_chunks AS c ON c.id = m.id
+    ORDER BY score DESC
+    LIMIT :limit
+    """
+)
+
+
+def _parse_ts(value: Optional[str]) -> Optional[float]:
+    m = _TS_RE.match(value or "")
+    if not m:
+        return None
+    h, mnt, s = (int(g) for g in m.groups())
+    return float(h * 3600 + mnt * 60 + s)
+
+
+def _summary_chunks(summary: MeetingSummary) -> List[Dict[str, Any]]:
+    chunks: List[Dict[str, Any]] = []
+
+    def add(
+        field: str,
+        value: Optional[str],
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+    ) -> None:
+        if value and value.strip():
+            chunks.append(
+                {
+                    "kind": "summary",
+                    "field": field,
+                    "text": value.strip(),
+                    "start": start,
+                    "end": end,
+                }
+            )
+
+    add("executive_summary", summary.executive_summary)
+    for field in ("objectives", "decisions", "outcomes", "next_steps"):
+        for item in getattr(summary, field):
+            add(field, item)
+    for topic in summary.topics:
+        body = (
+            f"{topic.title}. {topic.description}" if topic.description else topic.title
+        )
+        add("topics", body, _parse_ts(topic.start), _parse_ts(topic.end))
+    for action in summary.actions:
+        owner = f"{action.owner}: " if action.owner else ""
+        add("actions", f"{owner}{action.action}")
+    return chunks
+
+
+def _transcript_chunks(
+    transcript_text: str, segments: Optional[List[Dict[str, Any]]]
+) -> List[Dict[str, Any]]:
+    segs = [s for s in segments or [] if (s.get("text") or "").strip()]
+    if segs:
+        return [
+            {
+                "kind": "segment",
+                "text": s["text"].strip(),
+                "start": s.get("start"),
+                "end": s.get("end"),
+                "speaker": s.get("speaker"),
+            }
+            for s in segs
+        ]
+    return [
+        {"kind": "segment", "text": m.group(0).strip()}
+        for m in _PLAIN_CHUNK_RE.finditer(transcript_text or "")
+    ]
+
+
+async def index_report(
+    db: AsyncSession,
+    report_id: str,
+    summary: MeetingSummary,
+    transcript_text: str,
+    segments: Optional[List[Dict[str, Any]]] = None,
+    owner_id: Optional[int] = None,
+) -> List[Tuple[int, str]]:
+    """
+    Insère les segments et champs du résumé dans l'index.
+    Renvoie les (id, texte) des lignes créées (indexation vectorielle).
+    """
+    rows = _summary_chunks(summary) + _transcript_chunks(transcript_text, segments)
+    if not rows:
+        return []
+    defaults = {"field": None, "start": None, "end": None, "speaker": None}
+    result = await db.execute(
+        insert(ReportChunk).returning(ReportChunk.id, ReportChunk.text),
+        [
+            {**defaults, **row, "report_id": report_id, "owner_id": owner_id}
+            for row in rows
+        ],
+    )
+    # validé par l'appelant, avec la ligne du rapport (record_report)
+    return [(row.id, row.text) for row in result]
+
+
+def _fold(word: str) -> str:
+    """Normalisation du tokenizer FTS5 (unicode61 remove_diacritics) : casse, accents."""
+    decomposed = unicodedata.normalize("NFKD", word.casefold())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def fts5_query(query: str) -> str:
+    """
+    Requête utilisateur -> syntaxe FTS5 : chaque mot entre guillemets (pas
+    d'opérateurs injectés), ET implicite, préfixe sur le dernier mot.
+    """
+    words = _WORD_RE.findall(query)
+    if not words:
+        return ""
+    terms = [f'"{w}"' for w in words]
+    if len(words[-1]) >= 2:  # index de préfixes : 2 à 4 caractères
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+def make_snippet(text_: str, query: str, width: int = 16) -> str:
+    """
+    Extrait d'environ `width` mots autour de la première correspondance,
+    termes trouvés entre crochets (même rendu que snippet() de FTS5).
+    """
+    words = [_fold(w) for w in _WORD_RE.findall(query)]
+    if not words:
+        return text_[:200]
+    last = words[-1]
+
+    def matches(token: str) -> bool:
+        folded = _fold(token)
+        return folded in words or folded.startswith(last)
+
+    tokens = text_.split()
+    hits = [
+        i
+        for i, tok in enumerate(tokens)
+        if any(matches(w) for w in _WORD_RE.findall(tok))
+    ]
+    first = hits[0] if hits else 0
+    start = max(0, min(first - width // 4, len(tokens) - width))
+    window = tokens[start : start + width]
+    out = [
+        f"[{tok}]" if any(matches(w) for w in _WORD_RE.findall(tok)) else tok
+        for tok in window
+    ]
+    prefix = "… " if start > 0 else ""
+    suffix = " …" if start + width < len(tokens) else ""
+    return f"{prefix}{' '.join(out)}{suffix}"
+
+
+async def search_chunks(
+    db: AsyncSession,
+    query: str,
+    owner_id: int,
+    limit: int = 20,
+    candidates: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Résultats classés par pertinence : rapport, champ/segment, timestamps, extrait."""
+    params = {
+        "owner_id": owner_id,
+        "limit": limit,
+        "candidates": max(limit, candidates or settings.SEARCH_MAX_CANDIDATES),
+    }
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        match = fts5_query(query)
+        if not match:
+            return []
+        result = await db.execute(_SQLITE_SEARCH, {**params, "query": match})
+    elif dialect == "postgresql":
+        result = await db.execute(_POSTGRES_SEARCH, {**params, "query": query})
+    else:
+        raise SearchUnavailable(f"Full-text search is not supported on {dialect}")
+
+    hits = []
+    for row in result.mappings():
+        hit = dict(row)
+        hit["snippet"] = make_snippet(hit.pop("text"), query)
+        hits.append(hit)
+    return hits
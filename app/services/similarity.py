@@ -0,0 +1,141 @@
+"""
+Recherche par similarité entre réunions.
+
+Chaque ligne de report_chunks (segment du transcript, sujet ou champ du
+résumé) reçoit un embedding, ajouté à l'index IVF local avec l'id de la
+ligne et le propriétaire du rapport. Les résultats sont relus en base.
+"""
+
+import asyncio
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.report import ReportChunk
+from app.services.embeddings import get_embedding_backend
+from app.services.vector_index import VectorIndex
+
+logger = logging.getLogger(__name__)
+
+_index: Optional[VectorIndex] = None
+_index_lock = threading.Lock()
+
+# champs du résumé qui décrivent le mieux les sujets d'une réunion
+_TOPIC_FIELDS = ("topics", "executive_summary")
+
+
+def get_vector_index() -> VectorIndex:
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = VectorIndex(
+                settings.VECTOR_INDEX_DIR,
+                settings.EMBEDDING_DIM,
+                backend=get_embedding_backend().key,
+                nprobe=settings.VECTOR_NPROBE,
+                delta_min=settings.VECTOR_DELTA_MIN,
+            )
+        return _index
+
+
+async def index_chunks(chunks: List[Tuple[int, str]], owner_id: Optional[int]) -> None:
+    if not chunks:
+        return
+    vectors = await get_embedding_backend().embed([text for _, text in chunks])
+    ids = np.fromiter(
+        (chunk_id for chunk_id, _ in chunks), dtype=np.int64, count=len(chunks)
+    )
+    owners = np.full(len(chunks), -1 if owner_id is None else owner_id, dtype=np.int32)
+    index = await asyncio.to_thread(get_vector_index)
+    if index.read_only:  # un autre processus écrit l'index (voir vector_index)
+        logger.debug("vector index is read-only here, %d chunks not indexed", len(ids))
+        return
+    await asyncio.to_thread(index.add, ids, vectors, owners)
+
+
+async def remove_chunks(chunk_ids: List[int]) -> None:
+    """Retire de l'index les lignes de report_chunks supprimées (rétention)."""
+    if not chunk_ids:
+        return
+    index = await asyncio.to_thread(get_vector_index)
+    if index.read_only:
+        return
+    await asyncio.to_thread(index.remove, np.asarray(chunk_ids, dtype=np.int64))
+
+
+def _snippet(text: str, width: int = 200) -> str:
+    return text if len(text) <= width else text[:width].rsplit(" ", 1)[0] + " …"
+
+
+async def _hits(
+    db: AsyncSession, ids: np.ndarray, scores: np.ndarray
+) -> List[Dict[str, Any]]:
+    if not len(ids):
+        return []
+    rows = await db.execute(select(ReportChunk).where(ReportChunk.id.in_(ids.tolist())))
+    by_id = {chunk.id: chunk for chunk in rows.scalars()}
+    hits = []
+    for chunk_id, score in zip(ids.tolist(), scores.tolist()):
+        chunk = by_id.get(chunk_id)
+        if chunk is None:  # rapport supprimé depuis l'indexation
+            continue
+        hits.append(
+            {
+                "report_id": chunk.report_id,
+                "kind": chunk.kind,
+                "field": chunk.field,
+                "start": chunk.start,
+                "end": chunk.end,
+                "speaker": chunk.speaker,
+                "snippet": _snippet(str(chunk.text)),
+                "score": score,
+            }
+        )
+    return hits
+
+
+async def similar_chunks(
+    db: AsyncSession, query: str, owner_id: int, limit: int = 10
+) -> List[Dict[str, Any]]:
+    """Segments et champs de résumé les plus proches d'un texte libre."""
+    vector = (await get_embedding_backend().embed([query]))[0]
+    index = await asyncio.to_thread(get_vector_index)
+    ids, scores = await asyncio.to_thread(index.search, vector, limit, owner_id)
+    return await _hits(db, ids, scores)
+
+
+async def similar_reports(
+    db: AsyncSession, report_id: str, owner_id: int, limit: int = 10
+) -> List[Dict[str, Any]]:
+    """
+    Réunions aux sujets proches d'un rapport : moyenne des embeddings de ses
+    sujets (ou de tout son contenu à défaut), meilleur passage par réunion.
+    """
+    rows = await db.execute(
+        select(ReportChunk.field, ReportChunk.text).where(
+            ReportChunk.report_id == report_id, ReportChunk.owner_id == owner_id
+        )
+    )
+    chunks = rows.all()
+    texts = [text for field, text in chunks if field in _TOPIC_FIELDS] or [
+        text for _, text in chunks
+    ]
+    if not texts:
+        return []
+    vectors = await get_embedding_backend().embed(texts)
+    query = vectors.mean(axis=0)
+    query /= np.linalg.norm(query) or 1.0
+
+    index = await asyncio.to_thread(get_vector_index)
+    # plusieurs passages par réunion : on élargit avant de regrouper
+    ids, scores = await asyncio.to_thread(index.search, query, limit * 20, owner_id)
+    best: Dict[str, Dict[str, Any]] = {}
+    for hit in await _hits(db, ids, scores):
+        if hit["report_id"] != report_id and hit["report_id"] not in best:
+            best[hit["report_id"]] = hit
+    return list(best.values())[:limit]
@@ -0,0 +1,115 @@
+"""
+Liaison des speakers entre fenêtres de diarisation.
+
+Chaque fenêtre est diarisée indépendamment (labels locaux) ; SpeakerLinker
+les relie à des speakers globaux par similarité cosinus de leurs embeddings,
+pour que "SPEAKER_00" désigne la même personne sur toute la réunion.
+link_windows replace ensuite les segments de chaque fenêtre sur l'axe
+temporel de la réunion.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+# (segments locaux, temps relatifs à la fenêtre ; embedding par speaker local)
+WindowResult = Tuple[List[Dict[str, Any]], Dict[str, np.ndarray]]
+
+
+class SpeakerLinker:
+    """
+    Relie les labels locaux de chaque fenêtre à des speakers globaux en
+    comparant leurs embeddings (similarité cosinus) aux centroïdes globaux.
+    """
+
+    def __init__(self, threshold: Optional[float] = None):
+        self.threshold = (
+            settings.SPEAKER_LINK_THRESHOLD if threshold is None else threshold
+        )
+        self._centroids: List[np.ndarray] = []
+        self._weights: List[float] = []
+
+    @staticmethod
+    def _normalize(v: np.ndarray) -> np.ndarray:
+        norm = float(np.linalg.norm(v))
+        return v / norm if norm > 0 else v
+
+    def _new_speaker(self, emb: np.ndarray, weight: float) -> int:
+        self._centroids.append(self._normalize(emb))
+        self._weights.append(weight)
+        return len(self._centroids) - 1
+
+    def link(
+        self,
+        embeddings: Dict[str, np.ndarray],
+        durations: Dict[str, float],
+    ) -> Dict[str, str]:
+        """
+        Renvoie {label_local: "SPEAKER_XX"} pour une fenêtre.
+        Appariement glouton par similarité décroissante : deux speakers d'une
+        même fenêtre ne peuvent pas être fusionnés dans le même speaker global.
+        """
+        local = {k: self._normalize(v) for k, v in embeddings.items()}
+        mapping: Dict[str, int] = {}
+
+        if self._centroids and local:
+            labels = list(local)
+            sims = np.stack([local[k] for k in labels]) @ np.stack(self._centroids).T
+            used: set[int] = set()
+            for flat in np.argsort(-sims, axis=None):
+                i, j = np.unravel_index(flat, sims.shape)
+                if sims[i, j] < self.threshold:
+                    break
+                label = labels[i]
+                if label in mapping or j in used:
+                    continue
+                mapping[label] = int(j)
+                used.add(int(j))
+
+        for label, emb in local.items():
+            weight = durations.get(label, 1.0)
+            if label not in mapping:
+                mapping[label] = self._new_speaker(emb, weight)
+                continue
+            # mise à jour du centroïde (moyenne pondérée par la durée de parole)
+            j = mapping[label]
+            total = self._weights[j] + weight
+            self._centroids[j] = self._normalize(
+                (self._centroids[j] * self._weights[j] + emb * weight) / total
+            )
+            self._weights[j] = total
+
+        return {label: f"SPEAKER_{idx:02d}" for label, idx in mapping.items()}
+
+
+def link_windows(
+    windows: Iterable[Tuple[float, WindowResult]],
+    linker: Optional[SpeakerLinker] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Segments globaux de la réunion à partir des résultats par fenêtre
+    (décalage en secondes, résultat), reçus dans l'ordre chronologique pour
+    que l'attribution des labels soit déterministe.
+    """
+    linker = linker or SpeakerLinker()
+    segments: List[Dict[str, Any]] = []
+    for offset, (local_segs, embeddings) in windows:
+        durations: Dict[str, float] = {}
+        for s in local_segs:
+            durations[s["speaker"]] = (
+                durations.get(s["speaker"], 0.0) + s["end"] - s["start"]
+            )
+        mapping = linker.link(embeddings, durations)
+        for s in local_segs:
+            segments.append(
+                {
+                    "start": s["start"] + offset,
+                    "end": s["end"] + offset,
+                    # speaker sans embedding exploitable (parole trop courte)
+                    "speaker": mapping.get(s["speaker"], "UNKNOWN"),
+                }
+            )
+    segments.sort(key=lambda s: s["start"])
+    return segments
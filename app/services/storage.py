@@ -0,0 +1,711 @@
+"""
+Stockage des rapports (source report.json et exports rendus).
+
+Backends interchangeables (STORAGE_BACKEND) :
+- "local" : répertoire DATA_ROOT (un nœud, ou un volume partagé) ;
+- "s3"    : object store compatible S3 (AWS, MinIO...), partagé entre les
+  réplicas de l'API. Le client (boto3 par défaut) est injectable : les
+  tests utilisent un équivalent en mémoire.
+
+Les clés sont de la forme "<report_id>/<fichier>". Les écritures se font en
+flux et sont atomiques : un objet n'est visible qu'une fois complet
+(renommage en local, multipart upload complété à la fermeture en S3, au
+plus S3_PART_SIZE octets en mémoire). Les lectures se font en flux, par
+plages d'octets.
+"""
+
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from types import TracebackType
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Type
+
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+
+from app.core.config import settings
+from app.utils.lru_cache import TTLCache
+from app.utils.file_response import (
+    ENCODINGS,
+    IMMUTABLE_CACHE_CONTROL,
+    accepted_encodings,
+    content_disposition,
+    immutable_file_response,
+    not_modified,
+    parse_range,
+)
+
+try:  # dépendance optionnelle (STORAGE_BACKEND="s3")
+    import boto3
+except ImportError:  # pragma: no cover
+    boto3 = None
+
+_READ_CHUNK = 64 * 1024
+_DELETE_BATCH = 1000  # limite de DeleteObjects
+
+# Objet vide dont la date d'écriture est la dernière consultation d'un rapport
+# (backends sans date d'accès partagée) ; réécrit au plus une fois par
+# _TOUCH_INTERVAL_SEC, pas à chaque téléchargement.
+ACCESS_MARKER = ".accessed"
+_TOUCH_INTERVAL_SEC = 3600.0
+
+
+@dataclass(frozen=True)
+class ObjectInfo:
+    key: str
+    size: int
+    mtime: float
+    etag: Optional[str] = None  # ETag du backend (entre guillemets), si fourni
+
+
+class ObjectWriter(ABC):
+    """
+    Écriture en flux d'un objet, publié à la sortie du bloc `with` ;
+    abandonné en cas d'exception ou après discard().
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self.size = 0
+        self._discarded = False
+
+    def write(self, data: bytes) -> None:
+        if data:
+            self._write(data)
+            self.size += len(data)
+
+    def discard(self) -> None:
+        self._discarded = True
+
+    @abstractmethod
+    def _write(self, data: bytes) -> None: ...
+
+    @abstractmethod
+    def _commit(self) -> None: ...
+
+    @abstractmethod
+    def _abort(self) -> None: ...
+
+    def __enter__(self) -> "ObjectWriter":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> None:
+        if exc_type is None and not self._discarded:
+            self._commit()
+        else:
+            self._abort()
+
+
+class Storage(ABC):
+    @abstractmethod
+    def open_write(self, key: str) -> ObjectWriter: ...
+
+    @abstractmethod
+    def put_file(self, key: str, path: str) -> None:
+        """Publie un fichier local (consommé : déplacé ou supprimé après envoi)."""
+
+    @abstractmethod
+    def staging_path(self, key: str) -> str:
+        """Chemin local où préparer un fichier destiné à put_file(key, ...)."""
+
+    @abstractmethod
+    def iter_range(
+        self, key: str, start: int = 0, end: Optional[int] = None
+    ) -> Iterator[bytes]:
+        """Octets [start, end) de l'objet, en flux ; FileNotFoundError s'il n'existe pas."""
+
+    @abstractmethod
+    def stat(self, key: str) -> Optional[ObjectInfo]: ...
+
+    @abstractmethod
+    def list(self, prefix: str) -> Iterator[ObjectInfo]: ...
+
+    @abstractmethod
+    def list_prefixes(self) -> Iterator[str]:
+        """Premiers niveaux de clé ("répertoires" de rapport)."""
+
+    @abstractmethod
+    def delete(self, keys: Iterable[str]) -> None: ...
+
+    def delete_prefix(self, prefix: str) -> None:
+        self.delete([obj.key for obj in self.list(prefix)])
+
+    def read_bytes(self, key: str) -> bytes:
+        return b"".join(self.iter_range(key))
+
+    def touch(self, prefix: str) -> None:
+        """Marque un rapport comme consulté, de façon visible par tous les réplicas."""
+
+    def accessed_at(self, prefix: str, objects: List[ObjectInfo]) -> float:
+        """Dernière consultation d'un rapport (ACCESS_MARKER), à défaut dernière écriture."""
+        return max((obj.mtime for obj in objects), default=0.0)
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Chemin du fichier si l'objet est servi depuis le disque local."""
+        return None
+
+    # Envoi en parties par le client (sessions d'upload) : les parties sont
+    # numérotées à partir de 1 et assemblées par complete_upload().
+
+    @abstractmethod
+    def create_upload(self, key: str) -> str:
+        """Ouvre un envoi en parties ; renvoie son identifiant côté stockage."""
+
+    @abstractmethod
+    def part_url(
+        self, key: str, upload_id: str, part_number: int, expires_sec: int
+    ) -> Optional[str]:
+        """URL présignée (PUT) pour envoyer la partie sans passer par l'API ; None si non supporté."""
+
+    @abstractmethod
+    def put_part(self, key: str, upload_id: str, part_number: int, path: str) -> None:
+        """Enregistre une partie depuis un fichier local (consommé)."""
+
+    @abstractmethod
+    def list_parts(self, key: str, upload_id: str) -> Dict[int, int]:
+        """Parties reçues : numéro -> taille."""
+
+    @abstractmethod
+    def complete_upload(self, key: str, upload_id: str) -> None: ...
+
+    @abstractmethod
+    def abort_upload(self, key: str, upload_id: str) -> None: ...
+
+
+# ---------- local ----------
+
+
+class _LocalWriter(ObjectWriter):
+    def __init__(self, key: str, path: str):
+        super().__init__(key)
+        self.path = path
+        self.tmp = f"{path}.{os.getpid()}.tmp"
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._file = open(self.tmp, "wb")
+
+    def _write(self, data: bytes) -> None:
+        self._file.write(data)
+
+    def _commit(self) -> None:
+        self._file.close()
+        os.replace(self.tmp, self.path)
+
+    def _abort(self) -> None:
+        self._file.close()
+        if os.path.exists(self.tmp):
+            os.remove(self.tmp)
+
+
+class LocalStorage(Storage):
+    def __init__(self, root: Optional[str] = None):
+        self._root = root
+
+    @property
+    def root(self) -> str:
+        return self._root or settings.DATA_ROOT
+
+    def _path(self, key: str) -> str:
+        parts = key.strip("/").split("/")
+        if any(part in ("", ".", "..") for part in parts):
+            raise ValueError(f"Invalid storage key: {key!r}")
+        return os.path.join(self.root, *parts)
+
+    def open_write(self, key: str) -> ObjectWriter:
+        return _LocalWriter(key, self._path(key))
+
+    def put_file(self, key: str, path: str) -> None:
+        target = self._path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        try:
+            os.replace(path, target)
+        except OSError:  # autre système de fichiers : copie puis renommage
+            with open(path, "rb") as src, self.open_write(key) as out:
+                while chunk := src.read(_READ_CHUNK):
+                    out.write(chunk)
+            os.remove(path)
+
+    def staging_path(self, key: str) -> str:
+        # à côté de la cible : put_file n'est qu'un renommage
+        target = self._path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        return f"{target}.{uuid.uuid4().hex[:8]}.tmp"
+
+    def iter_range(
+        self, key: str, start: int = 0, end: Optional[int] = None
+    ) -> Iterator[bytes]:
+        with open(self._path(key), "rb") as f:
+            f.seek(start)
+            remaining = None if end is None else end - start
+            while remaining is None or remaining > 0:
+                chunk = f.read(
+                    _READ_CHUNK if remaining is None else min(_READ_CHUNK, remaining)
+                )
+                if not chunk:
+                    return
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+    def stat(self, key: str) -> Optional[ObjectInfo]:
+        try:
+            st = os.stat(self._path(key))
+        except FileNotFoundError:
+            return None
+        return ObjectInfo(key, st.st_size, st.st_mtime)
+
+    def list(self, prefix: str) -> Iterator[ObjectInfo]:
+        base = prefix.rstrip("/")
+        try:
+            with os.scandir(self._path(base)) as it:
+                entries = [
+                    (e.name, e.stat(follow_symlinks=False))
+                    for e in it
+                    if e.is_file(follow_symlinks=False) and not e.name.endswith(".tmp")
+                ]
+        except FileNotFoundError:
+            return
+        for name, st in entries:
+            yield ObjectInfo(f"{base}/{name}", st.st_size, st.st_mtime)
+
+    def list_prefixes(self) -> Iterator[str]:
+        os.makedirs(self.root, exist_ok=True)
+        with os.scandir(self.root) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    yield entry.name
+
+    def delete(self, keys: Iterable[str]) -> None:
+        for key in keys:
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def delete_prefix(self, prefix: str) -> None:
+        shutil.rmtree(self._path(prefix.rstrip("/")), ignore_errors=True)
+
+    def touch(self, prefix: str) -> None:
+        now = time.time()
+        try:
+            os.utime(self._path(prefix.rstrip("/")), (now, now))
+        except OSError:
+            pass
+
+    def accessed_at(self, prefix: str, objects: List[ObjectInfo]) -> float:
+        # mtime du répertoire : mise à jour par touch() à chaque téléchargement
+        try:
+            return os.stat(self._path(prefix.rstrip("/"))).st_mtime
+        except FileNotFoundError:
+            return super().accessed_at(prefix, objects)
+
+    def local_path(self, key: str) -> Optional[str]:
+        return self._path(key)
+
+    def _parts_dir(self, key: str, upload_id: str) -> str:
+        if not upload_id.isalnum():
+            raise ValueError(f"Invalid upload id: {upload_id!r}")
+        return f"{self._path(key)}.parts-{upload_id}"
+
+    def create_upload(self, key: str) -> str:
+        upload_id = uuid.uuid4().hex
+        os.makedirs(self._parts_dir(key, upload_id))
+        return upload_id
+
+    def part_url(
+        self, key: str, upload_id: str, part_number: int, expires_sec: int
+    ) -> Optional[str]:
+        return None  # les parties passent par l'API
+
+    def put_part(self, key: str, upload_id: str, part_number: int, path: str) -> None:
+        parts_dir = self._parts_dir(key, upload_id)
+        if not os.path.isdir(parts_dir):
+            os.remove(path)
+            raise FileNotFoundError(f"Unknown upload: {upload_id}")
+        os.replace(path, os.path.join(parts_dir, f"{part_number:05d}"))
+
+    def list_parts(self, key: str, upload_id: str) -> Dict[int, int]:
+        try:
+            with os.scandir(self._parts_dir(key, upload_id)) as it:
+                return {
+                    int(e.name): e.stat().st_size
+                    for e in it
+                    if e.name.isdigit() and e.is_file(follow_symlinks=False)
+                }
+        except FileNotFoundError:
+            return {}
+
+    def complete_upload(self, key: str, upload_id: str) -> None:
+        parts_dir = self._parts_dir(key, upload_id)
+        with self.open_write(key) as out:
+            for number in sorted(self.list_parts(key, upload_id)):
+                with open(os.path.join(parts_dir, f"{number:05d}"), "rb") as part:
+                    while chunk := part.read(_READ_CHUNK * 16):
+                        out.write(chunk)
+        shutil.rmtree(parts_dir, ignore_errors=True)
+
+    def abort_upload(self, key: str, upload_id: str) -> None:
+        shutil.rmtree(self._parts_dir(key, upload_id), ignore_errors=True)
+
+
+# ---------- S3 ----------
+
+
+def _is_missing(error: Exception) -> bool:
+    code = getattr(error, "response", {}).get("Error", {}).get("Code")
+    return code in ("NoSuchKey", "NoSuchUpload", "404", "NotFound")
+
+
+class _S3Writer(ObjectWriter):
+    """
+    Tampon d'au plus part_size octets : un seul PutObject pour un petit
+    objet, un multipart upload (parties envoyées au fil de l'eau) sinon.
+    """
+
+    def __init__(self, storage: "S3Storage", key: str):
+        super().__init__(key)
+        self._storage = storage
+        self._client = storage.client
+        self._full_key = storage._full(key)
+        self._buffer = bytearray()
+        self._upload_id: Optional[str] = None
+        self._parts: List[Dict[str, Any]] = []
+
+    def _upload_part(self, data: bytes) -> None:
+        if self._upload_id is None:
+            created = self._client.create_multipart_upload(
+                Bucket=self._storage.bucket, Key=self._full_key
+            )
+            self._upload_id = created["UploadId"]
+        number = len(self._parts) + 1
+        part = self._client.upload_part(
+            Bucket=self._storage.bucket,
+            Key=self._full_key,
+            UploadId=self._upload_id,
+            PartNumber=number,
+            Body=data,
+        )
+        self._parts.append({"PartNumber": number, "ETag": part["ETag"]})
+
+    def _write(self, data: bytes) -> None:
+        self._buffer += data
+        part_size = self._storage.part_size
+        while len(self._buffer) >= part_size:
+            self._upload_part(bytes(self._buffer[:part_size]))
+            del self._buffer[:part_size]
+
+    def _commit(self) -> None:
+        bucket = self._storage.bucket
+        if self._upload_id is None:
+            self._client.put_object(
+                Bucket=bucket, Key=self._full_key, Body=bytes(self._buffer)
+            )
+            return
+        if self._buffer:  # la dernière partie peut être plus petite
+            self._upload_part(bytes(self._buffer))
+        self._client.complete_multipart_upload(
+            Bucket=bucket,
+            Key=self._full_key,
+            UploadId=self._upload_id,
+            MultipartUpload={"Parts": self._parts},
+        )
+
+    def _abort(self) -> None:
+        self._buffer.clear()
+        if self._upload_id is not None:
+            self._client.abort_multipart_upload(
+                Bucket=self._storage.bucket,
+                Key=self._full_key,
+                UploadId=self._upload_id,
+            )
+
+
+class S3Storage(Storage):
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str = "",
+        client: Any = None,
+        part_size: Optional[int] = None,
+    ):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.part_size = part_size or settings.S3_PART_SIZE
+        self._client = client
+        self._touched: TTLCache[bool] = TTLCache(100_000, _TOUCH_INTERVAL_SEC)
+
+    @property
+    def client(self) -> Any:
+        if self._client is None:
+            if boto3 is None:
+                raise RuntimeError("STORAGE_BACKEND='s3' requires the boto3 package")
+            self._client = boto3.client(
+                "s3",
+                endpoint_url=settings.S3_ENDPOINT_URL,
+                region_name=settings.S3_REGION,
+            )
+        return self._client
+
+    def _full(self, key: str) -> str:
+        return self.prefix + key
+
+    def _info(
+        self, key: str, size: int, last_modified: Any, etag: Optional[str]
+    ) -> ObjectInfo:
+        return ObjectInfo(key, int(size), last_modified.timestamp(), etag)
+
+    def open_write(self, key: str) -> ObjectWriter:
+        return _S3Writer(self, key)
+
+    def put_file(self, key: str, path: str) -> None:
+        try:
+            with open(path, "rb") as src, self.open_write(key) as out:
+                while chunk := src.read(self.part_size):
+                    out.write(chunk)
+        finally:
+            os.remove(path)
+
+    def staging_path(self, key: str) -> str:
+        fd, path = tempfile.mkstemp(suffix=f"-{os.path.basename(key)}.tmp")
+        os.close(fd)
+        return path
+
+    def iter_range(
+        self, key: str, start: int = 0, end: Optional[int] = None
+    ) -> Iterator[bytes]:
+        kwargs: Dict[str, Any] = {"Bucket": self.bucket, "Key": self._full(key)}
+        if start or end is not None:
+            kwargs["Range"] = f"bytes={start}-{'' if end is None else end - 1}"
+        try:
+            body = self.client.get_object(**kwargs)["Body"]
+        except Exception as e:
+            if _is_missing(e):
+                raise FileNotFoundError(key) from e
+            raise
+        try:
+            yield from body.iter_chunks(_READ_CHUNK)
+        finally:
+            body.close()
+
+    def stat(self, key: str) -> Optional[ObjectInfo]:
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=self._full(key))
+        except Exception as e:
+            if _is_missing(e):
+                return None
+            raise
+        return self._info(
+            key, head["ContentLength"], head["LastModified"], head.get("ETag")
+        )
+
+    def _pages(self, **kwargs: Any) -> Iterator[Dict[str, Any]]:
+        token = None
+        while True:
+            page = self.client.list_objects_v2(
+                Bucket=self.bucket,
+                **kwargs,
+                **({"ContinuationToken": token} if token else {}),
+            )
+            yield page
+            if not page.get("IsTruncated"):
+                return
+            token = page["NextContinuationToken"]
+
+    def list(self, prefix: str) -> Iterator[ObjectInfo]:
+        for page in self._pages(Prefix=self._full(prefix)):
+            for obj in page.get("Contents", []):
+                key = obj["Key"][len(self.prefix) :]
+                yield self._info(key, obj["Size"], obj["LastModified"], obj.get("ETag"))
+
+    def list_prefixes(self) -> Iterator[str]:
+        for page in self._pages(Prefix=self.prefix, Delimiter="/"):
+            for common in page.get("CommonPrefixes", []):
+                yield common["Prefix"][len(self.prefix) :].rstrip("/")
+
+    def touch(self, prefix: str) -> None:
+        # partagé par tous les réplicas : la rétention le voit au prochain LIST
+        key = f"{prefix.rstrip('/')}/{ACCESS_MARKER}"
+        if self._touched.get(key):
+            return
+        self.client.put_object(Bucket=self.bucket, Key=self._full(key), Body=b"")
+        self._touched.put(key, True)
+
+    def create_upload(self, key: str) -> str:
+        created = self.client.create_multipart_upload(
+            Bucket=self.bucket, Key=self._full(key)
+        )
+        upload_id: str = created["UploadId"]
+        return upload_id
+
+    def part_url(
+        self, key: str, upload_id: str, part_number: int, expires_sec: int
+    ) -> Optional[str]:
+        url: str = self.client.generate_presigned_url(
+            "upload_part",
+            Params={
+                "Bucket": self.bucket,
+                "Key": self._full(key),
+                "UploadId": upload_id,
+                "PartNumber": part_number,
+            },
+            ExpiresIn=expires_sec,
+        )
+        return url
+
+    def put_part(self, key: str, upload_id: str, part_number: int, path: str) -> None:
+        try:
+            with open(path, "rb") as body:
+                self.client.upload_part(
+                    Bucket=self.bucket,
+                    Key=self._full(key),
+                    UploadId=upload_id,
+                    PartNumber=part_number,
+                    Body=body,
+                )
+        finally:
+            os.remove(path)
+
+    def _parts(self, key: str, upload_id: str) -> List[Dict[str, Any]]:
+        parts: List[Dict[str, Any]] = []
+        marker = 0
+        while True:
+            page = self.client.list_parts(
+                Bucket=self.bucket,
+                Key=self._full(key),
+                UploadId=upload_id,
+                PartNumberMarker=marker,
+            )
+            parts.extend(page.get("Parts", []))
+            if not page.get("IsTruncated"):
+                return parts
+            marker = page["NextPartNumberMarker"]
+
+    def list_parts(self, key: str, upload_id: str) -> Dict[int, int]:
+        return {p["PartNumber"]: p["Size"] for p in self._parts(key, upload_id)}
+
+    def complete_upload(self, key: str, upload_id: str) -> None:
+        parts = sorted(self._parts(key, upload_id), key=lambda p: p["PartNumber"])
+        self.client.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=self._full(key),
+            UploadId=upload_id,
+            MultipartUpload={
+                "Parts": [
+                    {"PartNumber": p["PartNumber"], "ETag": p["ETag"]} for p in parts
+                ]
+            },
+        )
+
+    def abort_upload(self, key: str, upload_id: str) -> None:
+        try:
+            self.client.abort_multipart_upload(
+                Bucket=self.bucket, Key=self._full(key), UploadId=upload_id
+            )
+        except Exception as e:
+            if not _is_missing(e):
+                raise
+
+    def delete(self, keys: Iterable[str]) -> None:
+        keys = list(keys)
+        for i in range(0, len(keys), _DELETE_BATCH):
+            self.client.delete_objects(
+                Bucket=self.bucket,
+                Delete={
+                    "Objects": [
+                        {"Key": self._full(k)} for k in keys[i : i + _DELETE_BATCH]
+                    ],
+                    "Quiet": True,
+                },
+            )
+
+
+_storage: Optional[Storage] = None
+
+
+def get_storage() -> Storage:
+    global _storage
+    if _storage is None:
+        if settings.STORAGE_BACKEND == "s3":
+            _storage = S3Storage(settings.S3_BUCKET, settings.S3_PREFIX)
+        elif settings.STORAGE_BACKEND == "local":
+            _storage = LocalStorage()
+        else:
+            raise ValueError(f"Unknown storage backend: {settings.STORAGE_BACKEND!r}")
+    return _storage
+
+
+# ---------- téléchargement ----------
+
+
+async def storage_response(
+    request: Request,
+    storage: Storage,
+    key: str,
+    media_type: str,
+    filename: Optional[str] = None,
+) -> Response:
+    """
+    Réponse de téléchargement d'un objet immuable : même contrat que
+    immutable_file_response (ETag, 304, plages, variante compressée).
+    Depuis le disque local : FileResponse ; sinon, flux lu par plages.
+    """
+    path = storage.local_path(key)
+    if path is not None:
+        return await immutable_file_response(request, path, media_type, filename)
+
+    prefix = key.rsplit("/", 1)[0] + "/"
+    # un seul LIST : objet, variantes compressées, tailles et ETags
+    objects = {
+        obj.key: obj
+        for obj in await asyncio.to_thread(lambda: list(storage.list(prefix)))
+    }
+    if key not in objects:
+        raise FileNotFoundError(key)
+    accepted = accepted_encodings(request.headers.get("accept-encoding"))
+    chosen, encoding = objects[key], None
+    has_variants = False
+    for coding, suffix in ENCODINGS:
+        variant = objects.get(key + suffix)
+        if variant is not None:
+            has_variants = True
+            if encoding is None and coding in accepted:
+                chosen, encoding = variant, coding
+
+    etag = chosen.etag or f'"{int(chosen.mtime)}-{chosen.size}"'
+    headers = {"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+    if has_variants:
+        headers["Vary"] = "Accept-Encoding"
+    if not_modified(request, etag, chosen.mtime):
+        return Response(status_code=304, headers=headers)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    if filename:
+        headers["Content-Disposition"] = content_disposition(filename)
+    headers["Accept-Ranges"] = "bytes"
+
+    try:
+        byte_range = parse_range(request, etag, chosen.size)
+    except ValueError:
+        headers["Content-Range"] = f"bytes */{chosen.size}"
+        return Response(status_code=416, headers=headers)
+    start, end = byte_range or (0, chosen.size)
+    status_code = 200
+    if byte_range is not None:
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end - 1}/{chosen.size}"
+    headers["Content-Length"] = str(end - start)
+    return StreamingResponse(
+        storage.iter_range(chosen.key, start, end),
+        status_code=status_code,
+        media_type=media_type,
+        headers=headers,
+    )
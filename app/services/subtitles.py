@@ -0,0 +1,44 @@
+"""
+Sous-titres SRT / WebVTT à partir des segments du transcript.
+
+Les cues sont produites par des générateurs : l'écriture se fait en flux,
+sans construire le document complet en mémoire.
+"""
+
+from typing import Any, Dict, Iterable, Iterator
+
+
+def _timestamp(seconds: float, sep: str) -> str:
+    ms = max(0, int(round((seconds or 0.0) * 1000)))
+    h, ms = divmod(ms, 3_600_000)
+    m, ms = divmod(ms, 60_000)
+    s, ms = divmod(ms, 1000)
+    return f"{h:02d}:{m:02d}:{s:02d}{sep}{ms:03d}"
+
+
+def _cues(segments: Iterable[Dict[str, Any]]) -> Iterator[tuple]:
+    for s in segments:
+        text = " ".join((s.get("text") or "").split())
+        if not text:
+            continue
+        start = float(s.get("start", 0.0) or 0.0)
+        end = max(start, float(s.get("end", start) or start))
+        yield start, end, s.get("speaker"), text
+
+
+def iter_srt(segments: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    for i, (start, end, speaker, text) in enumerate(_cues(segments), start=1):
+        prefix = f"{speaker}: " if speaker else ""
+        yield (
+            f"{i}\n{_timestamp(start, ',')} --> {_timestamp(end, ',')}\n"
+            f"{prefix}{text}\n\n"
+        )
+
+
+def iter_vtt(segments: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    yield "WEBVTT\n\n"
+    for start, end, speaker, text in _cues(segments):
+        # "&", "<" et "-->" interdits dans le texte d'une cue
+        text = text.replace("&", "&amp;").replace("<", "&lt;").replace("-->", "--&gt;")
+        voice = f"<v {speaker}>" if speaker else ""
+        yield f"{_timestamp(start, '.')} --> {_timestamp(end, '.')}\n{voice}{text}\n\n"
@@ -1,3 +1,4 @@
+import asyncio
 import io
 from typing import Tuple, List, Dict
 
@@ -10,6 +11,7 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Dict, Any, Tuple, Optional
 
 from app.core.config import settings
+from app.services.usage import record_audio_seconds
 
 OPENAI_API_KEY = settings.OPENAI_API_KEY
 ASR_MODEL_ID = settings.ASR_MODEL_ID or "gpt-4o-mini-transcribe"
@@ -27,19 +29,33 @@ class TranscriptionError(Exception):
 from openai import OpenAI
 
 def _make_openai_client() -> OpenAI:
-    
+
     api_key = settings.OPENAI_API_KEY
     if not api_key:
         raise TranscriptionError("OPENAI_API_KEY is missing.")
     return OpenAI(api_key=api_key)
 
 
-def _load_and_resample(file_bytes: bytes, filename: str) -> AudioSegment:
-    buf = io.BytesIO(file_bytes)
-    buf.name = filename or "audio.bin"
-    audio = AudioSegment.from_file(buf)
+def _load_and_resample(file_bytes: bytes | str, filename: str) -> AudioSegment:
+    if isinstance(file_bytes, str):
+        # chemin local (upload par référence) : ffmpeg lit le fichier directement
+        audio = AudioSegment.from_file(file_bytes)
+    else:
+        buf = io.BytesIO(file_bytes)
+        buf.name = filename or "audio.bin"
+        audio = AudioSegment.from_file(buf)
     return audio.set_channels(1).set_frame_rate(16000)
 
+
+def chunk_bounds(total_ms: int, chunk_sec: int = CHUNK_SEC) -> List[Tuple[int, int]]:
+    """
+    Plan de découpage (start_ms, end_ms) utilisé pour l'ASR.
+    Partagé avec la diarisation pour que les fenêtres soient alignées.
+    """
+    step = chunk_sec * 1000
+    return [(i, min(i + step, total_ms)) for i in range(0, total_ms, step)]
+
+
 def _export_chunk_wav(seg: AudioSegment) -> bytes:
     out = io.BytesIO()
     seg.export(out, format="wav")
@@ -62,7 +78,7 @@ def _openai_stt_bytes(client: OpenAI, audio_bytes: bytes, fname: str, language_h
     )
 
 def _parse_verbose_json(data: dict, language_hint: str | None):
-  
+
     text = data.get("text") or ""
     language = data.get("language") or language_hint or "unknown"
 
@@ -86,12 +102,16 @@ def _parse_verbose_json(data: dict, language_hint: str | None):
 
     return text, segments, language
 
-def _openai_transcribe_chunked(file_bytes: bytes, filename: str, language_hint: str | None):
+
+def _openai_transcribe_chunked(
+    file_bytes: bytes | str, filename: str, language_hint: str | None
+):
     if not OPENAI_API_KEY:
         raise TranscriptionError("OPENAI_API_KEY is missing.")
     client = _make_openai_client()
 
     audio = _load_and_resample(file_bytes, filename)
+    record_audio_seconds(len(audio) / 1000)
 
     single = _export_chunk_wav(audio)
     if len(single) <= MAX_BYTES:
@@ -103,9 +123,7 @@ def _openai_transcribe_chunked(file_bytes: bytes, filename: str, language_hint:
         }
         return _parse_verbose_json(data, language_hint)
 
-    total_ms = len(audio)
-    step = CHUNK_SEC * 1000
-    chunks: list[AudioSegment] = [audio[i:i+step] for i in range(0, total_ms, step)]
+    chunks: list[AudioSegment] = [audio[s:e] for s, e in chunk_bounds(len(audio))]
 
     full_text_parts: list[str] = []
     all_segments: list[Dict] = []
@@ -129,7 +147,6 @@ def _openai_transcribe_chunked(file_bytes: bytes, filename: str, language_hint:
 
         running_ms += len(seg)
 
-
     full_text_parts = []
     all_segments = []
     language_final = language_hint or "unknown"
@@ -213,13 +230,18 @@ def _openai_transcribe_chunked(file_bytes: bytes, filename: str, language_hint:
     if not all_segments:
         all_segments = [{"start": 0.0, "end": 0.0, "text": full_text}]
     return full_text, all_segments, language_final
-        
-    
 
-async def transcribe_audio(file_bytes: bytes, filename: str, language_hint: str | None = None):
+
+async def transcribe_audio(
+    file_bytes: bytes | str, filename: str, language_hint: str | None = None
+):
+    """file_bytes : contenu du fichier, ou chemin local (upload par référence)."""
     if BACKEND != "openai":
         raise TranscriptionError("Set BACKEND=openai to use OpenAI STT.")
-    return _openai_transcribe_chunked(file_bytes, filename, language_hint)
+    # ffmpeg + client OpenAI synchrone : exécutés hors de la boucle d'événements
+    return await asyncio.to_thread(
+        _openai_transcribe_chunked, file_bytes, filename, language_hint
+    )
 
 
 '''async def transcribe_audio_with_advanced_diarization(
@@ -0,0 +1,54 @@
+"""
+Transcripts persistés (table transcripts).
+
+/reports/transcribe enregistre son résultat et renvoie un transcript_id ;
+/reports/notes le recharge (texte, segments avec locuteurs, langue) au lieu
+de retranscrire l'audio.
+"""
+
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.report import StoredTranscript
+
+
+class TranscriptNotFound(LookupError):
+    pass
+
+
+async def save_transcript(
+    db: AsyncSession,
+    text: str,
+    segments: Optional[List[Dict[str, Any]]],
+    language: Optional[str],
+    owner_id: Optional[int] = None,
+) -> str:
+    transcript_id = uuid.uuid4().hex
+    db.add(
+        StoredTranscript(
+            id=transcript_id,
+            owner_id=owner_id,
+            created_at=datetime.utcnow(),
+            language=language,
+            text=text,
+            segments=list(segments or []),
+        )
+    )
+    await db.commit()
+    return transcript_id
+
+
+async def load_transcript(
+    db: AsyncSession, transcript_id: str, owner_id: Optional[int] = None
+) -> StoredTranscript:
+    """
+    Transcript `transcript_id` ; celui d'un utilisateur n'est visible que
+    par lui (même réponse qu'un id inconnu).
+    """
+    record = await db.get(StoredTranscript, transcript_id)
+    if record is None or (record.owner_id is not None and record.owner_id != owner_id):
+        raise TranscriptNotFound(transcript_id)
+    return record
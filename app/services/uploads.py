@@ -0,0 +1,282 @@
+"""
+Sessions d'upload audio : envoi en parties directement vers le stockage,
+puis traitement par référence.
+
+1. POST /reports/uploads (nom, taille) ouvre une session : un multipart
+   upload côté stockage et une cible par partie (URL présignée en S3 :
+   l'audio ne traverse pas l'API ; en local, PUT relayé par l'API en flux).
+2. Le client envoie les parties, dans n'importe quel ordre, et peut
+   reprendre après une coupure : GET /reports/uploads/{id} liste celles
+   déjà reçues.
+3. POST .../complete assemble l'objet ; /reports/transcribe et
+   /reports/notes le lisent ensuite via upload_id, sans corps multipart.
+
+Les sessions expirées (UPLOAD_TTL_HOURS) sont purgées par la rétention.
+"""
+
+import asyncio
+import math
+import os
+import re
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, List, Optional
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.report import UploadSession
+from app.services.storage import Storage
+
+# préfixe hors des identifiants de rapport : ignoré par le parcours de rétention
+UPLOAD_PREFIX = ".uploads"
+MAX_PARTS = 10000  # limite S3
+_EXTENSION_RE = re.compile(r"^\.[0-9A-Za-z]{1,8}$")
+
+
+class UploadNotFound(LookupError):
+    pass
+
+
+class UploadIncomplete(ValueError):
+    def __init__(self, missing: List[int]):
+        super().__init__(f"Missing or incomplete parts: {missing[:20]}")
+        self.missing = missing
+
+
+def _upload_key(upload_id: str, filename: str) -> str:
+    # l'extension d'origine aide ffmpeg à reconnaître le format
+    ext = os.path.splitext(filename)[1].lower()
+    return f"{UPLOAD_PREFIX}/{upload_id}/audio{ext if _EXTENSION_RE.match(ext) else ''}"
+
+
+def upload_key(session: UploadSession) -> str:
+    return _upload_key(str(session.id), str(session.filename))
+
+
+def part_count(session: UploadSession) -> int:
+    return max(1, math.ceil(int(session.size) / int(session.part_size)))
+
+
+def expected_part_size(session: UploadSession, part_number: int) -> int:
+    part_size = int(session.part_size)
+    if part_number < part_count(session):
+        return part_size
+    return int(session.size) - part_size * (part_count(session) - 1)
+
+
+async def create_upload(
+    db: AsyncSession,
+    storage: Storage,
+    filename: str,
+    size: int,
+    content_type: Optional[str] = None,
+    owner_id: Optional[int] = None,
+) -> UploadSession:
+    if size <= 0 or size > settings.UPLOAD_MAX_BYTES:
+        raise ValueError(
+            f"Upload size must be between 1 and {settings.UPLOAD_MAX_BYTES} bytes"
+        )
+    # parties plus grandes pour les très gros fichiers (au plus MAX_PARTS)
+    part_size = max(settings.UPLOAD_PART_SIZE, math.ceil(size / MAX_PARTS))
+    upload_id = uuid.uuid4().hex
+    filename = os.path.basename(filename)[:255] or "audio"
+    storage_upload_id = await asyncio.to_thread(
+        storage.create_upload, _upload_key(upload_id, filename)
+    )
+    now = datetime.utcnow()
+    session = UploadSession(
+        id=upload_id,
+        owner_id=owner_id,
+        created_at=now,
+        expires_at=now + timedelta(hours=settings.UPLOAD_TTL_HOURS),
+        filename=filename,
+        content_type=content_type,
+        size=size,
+        part_size=part_size,
+        status="pending",
+        storage_upload_id=storage_upload_id,
+    )
+    db.add(session)
+    await db.commit()
+    await db.refresh(session)
+    return session
+
+
+async def load_upload(
+    db: AsyncSession, upload_id: str, owner_id: Optional[int] = None
+) -> UploadSession:
+    """
+    Session `upload_id` ; celle d'un utilisateur n'est visible que par lui,
+    une session expirée n'existe plus (même réponse qu'un id inconnu).
+    """
+    session = await db.get(UploadSession, upload_id)
+    if (
+        session is None
+        or (session.owner_id is not None and session.owner_id != owner_id)
+        or session.expires_at <= datetime.utcnow()
+    ):
+        raise UploadNotFound(upload_id)
+    return session
+
+
+def part_targets(
+    storage: Storage, session: UploadSession, received: Dict[int, int]
+) -> Dict[int, Optional[str]]:
+    """URL présignée de chaque partie manquante (None : PUT relayé par l'API)."""
+    expires = max(1, int((session.expires_at - datetime.utcnow()).total_seconds()))
+    key = upload_key(session)
+    return {
+        n: storage.part_url(key, str(session.storage_upload_id), n, expires)
+        for n in range(1, part_count(session) + 1)
+        if received.get(n) != expected_part_size(session, n)
+    }
+
+
+async def list_received(storage: Storage, session: UploadSession) -> Dict[int, int]:
+    if session.status == "complete":
+        return {
+            n: expected_part_size(session, n) for n in range(1, part_count(session) + 1)
+        }
+    return await asyncio.to_thread(
+        storage.list_parts, upload_key(session), str(session.storage_upload_id)
+    )
+
+
+async def receive_part(
+    storage: Storage,
+    session: UploadSession,
+    part_number: int,
+    chunks: AsyncIterator[bytes],
+) -> int:
+    """
+    Partie relayée par l'API : le corps est écrit en flux dans un fichier
+    local, puis publié dans le stockage. Renvoie sa taille.
+    """
+    if session.status != "pending":
+        raise ValueError("Upload is already complete")
+    if not 1 <= part_number <= part_count(session):
+        raise ValueError(f"Part number must be between 1 and {part_count(session)}")
+    expected = expected_part_size(session, part_number)
+    key = upload_key(session)
+    path = storage.staging_path(key)
+    received = 0
+    try:
+        # écritures hors de la boucle d'événements : disque lent ou partie de
+        # plusieurs centaines de Mo ne bloquent pas les autres requêtes
+        out = await asyncio.to_thread(open, path, "wb")
+        try:
+            async for chunk in chunks:
+                received += len(chunk)
+                if received > expected:
+                    raise ValueError(f"Part {part_number} exceeds {expected} bytes")
+                await asyncio.to_thread(out.write, chunk)
+        finally:
+            await asyncio.to_thread(out.close)
+        if received != expected:
+            raise ValueError(
+                f"Part {part_number} must be {expected} bytes, got {received}"
+            )
+        await asyncio.to_thread(
+            storage.put_part, key, str(session.storage_upload_id), part_number, path
+        )
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+    return received
+
+
+async def complete_upload(
+    db: AsyncSession, storage: Storage, session: UploadSession
+) -> None:
+    if session.status == "complete":
+        return
+    received = await list_received(storage, session)
+    missing = [
+        n
+        for n in range(1, part_count(session) + 1)
+        if received.get(n) != expected_part_size(session, n)
+    ]
+    if missing:
+        raise UploadIncomplete(missing)
+    await asyncio.to_thread(
+        storage.complete_upload, upload_key(session), str(session.storage_upload_id)
+    )
+    await db.execute(
+        update(UploadSession)
+        .where(UploadSession.id == session.id)
+        .values(status="complete")
+    )
+    await db.commit()
+    await db.refresh(session)
+
+
+async def _discard(storage: Storage, session: UploadSession) -> None:
+    key = upload_key(session)
+    if session.status == "complete":
+        await asyncio.to_thread(storage.delete, [key])
+    else:
+        await asyncio.to_thread(
+            storage.abort_upload, key, str(session.storage_upload_id)
+        )
+
+
+async def abort_upload(
+    db: AsyncSession, storage: Storage, session: UploadSession
+) -> None:
+    await _discard(storage, session)
+    await db.delete(session)
+    await db.commit()
+
+
+async def purge_expired_uploads(
+    db: AsyncSession, storage: Storage, now: datetime, limit: int
+) -> int:
+    """Supprime au plus `limit` sessions expirées et leur audio (appelé par la rétention)."""
+    rows = await db.execute(
+        select(UploadSession).where(UploadSession.expires_at <= now).limit(limit)
+    )
+    sessions = list(rows.scalars())
+    for session in sessions:
+        await _discard(storage, session)
+    if sessions:
+        await db.execute(
+            delete(UploadSession).where(UploadSession.id.in_([s.id for s in sessions]))
+        )
+    return len(sessions)
+
+
+@asynccontextmanager
+async def uploaded_audio(
+    storage: Storage, session: UploadSession
+) -> AsyncIterator[str]:
+    """
+    Chemin local de l'audio envoyé, pour ffmpeg : le fichier lui-même en
+    stockage local, sinon une copie téléchargée en flux (supprimée ensuite).
+    """
+    if session.status != "complete":
+        raise UploadIncomplete([])
+    key = upload_key(session)
+    path = storage.local_path(key)
+    if path is not None:
+        yield path
+        return
+
+    def download() -> str:
+        staging = storage.staging_path(key)
+        try:
+            with open(staging, "wb") as out:
+                for chunk in storage.iter_range(key):
+                    out.write(chunk)
+        except BaseException:
+            os.remove(staging)
+            raise
+        return staging
+
+    path = await asyncio.to_thread(download)
+    try:
+        yield path
+    finally:
+        os.remove(path)
@@ -0,0 +1,157 @@
+"""
+Comptage de la consommation des requêtes coûteuses.
+
+Pendant une requête limitée (voir rate_limit.py), un UsageMeter est placé
+dans le contexte : la transcription y ajoute les secondes d'audio décodées,
+le client LLM les tokens consommés (appels parallèles compris, le contexte
+étant hérité par les tâches). En fin de requête, la consommation est
+débitée des quotas et ajoutée au journal (table usage_events). Une session
+longue (WebSocket /reports/live) est débitée au fil de l'eau : checkpoint()
+après chaque fenêtre transcrite.
+
+Le journal est mis en mémoire tampon et écrit par lots (un INSERT multi-
+lignes toutes les USAGE_FLUSH_INTERVAL_SEC, ou dès USAGE_FLUSH_BATCH
+événements) plutôt qu'une ligne par requête.
+"""
+
+import asyncio
+import contextlib
+import logging
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.models.report import UsageEvent
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class UsageMeter:
+    audio_seconds: float = 0.0
+    llm_tokens: int = 0
+    # appelé par checkpoint() : débit intermédiaire d'une session longue
+    on_checkpoint: Optional[Callable[["UsageMeter"], Awaitable[None]]] = None
+
+
+_meter: ContextVar[Optional[UsageMeter]] = ContextVar("usage_meter", default=None)
+
+
+@contextlib.contextmanager
+def metered() -> Iterator[UsageMeter]:
+    """Compte la consommation du code exécuté dans ce contexte."""
+    meter = UsageMeter()
+    token = _meter.set(meter)
+    try:
+        yield meter
+    finally:
+        _meter.reset(token)
+
+
+def record_audio_seconds(seconds: float) -> None:
+    meter = _meter.get()
+    if meter is not None:
+        meter.audio_seconds += seconds
+
+
+def record_llm_tokens(tokens: int) -> None:
+    meter = _meter.get()
+    if meter is not None:
+        meter.llm_tokens += tokens
+
+
+async def checkpoint() -> None:
+    """Débite dès maintenant la consommation comptée jusqu'ici (si prévu)."""
+    meter = _meter.get()
+    if meter is not None and meter.on_checkpoint is not None:
+        await meter.on_checkpoint(meter)
+
+
+class UsageLedger:
+    def __init__(
+        self,
+        batch_size: Optional[int] = None,
+        session_factory: Optional[Callable[[], Any]] = None,
+    ):
+        self.batch_size = batch_size or settings.USAGE_FLUSH_BATCH
+        self._session_factory = session_factory
+        self._pending: List[Dict[str, Any]] = []
+        self._full = asyncio.Event()
+        self.written = 0
+        self.dropped = 0
+
+    def add(
+        self,
+        principal: str,
+        owner_id: Optional[int],
+        endpoint: str,
+        status_code: int,
+        meter: UsageMeter,
+    ) -> None:
+        self._pending.append(
+            {
+                "created_at": datetime.utcnow(),
+                "principal": principal,
+                "owner_id": owner_id,
+                "endpoint": endpoint,
+                "status_code": status_code,
+                "audio_seconds": meter.audio_seconds,
+                "llm_tokens": meter.llm_tokens,
+            }
+        )
+        if len(self._pending) >= self.batch_size:
+            self._full.set()
+
+    async def flush(self) -> int:
+        """Écrit les événements en attente en un seul INSERT ; renvoie leur nombre."""
+        rows, self._pending = self._pending, []
+        self._full.clear()
+        if not rows:
+            return 0
+        factory = self._session_factory
+        if factory is None:
+            from app.db.session import sessionmanager
+
+            factory = sessionmanager.session
+        try:
+            async with factory() as db:
+                await db.execute(insert(UsageEvent), rows)
+                await db.commit()
+        except Exception:
+            # remis en tête pour le prochain passage, dans la limite de dix
+            # lots : une base indisponible ne fait pas grossir la mémoire sans fin
+            keep = max(0, 10 * self.batch_size - len(self._pending))
+            self.dropped += max(0, len(rows) - keep)
+            self._pending[:0] = rows[:keep]
+            raise
+        self.written += len(rows)
+        return len(rows)
+
+    async def run(self, interval: Optional[float] = None) -> None:
+        interval = interval or settings.USAGE_FLUSH_INTERVAL_SEC
+        try:
+            while True:
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._full.wait(), timeout=interval)
+                try:
+                    await self.flush()
+                except Exception:
+                    logger.exception("usage ledger flush failed")
+        finally:
+            # arrêt de l'application : dernier lot
+            with contextlib.suppress(Exception):
+                await self.flush()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": len(self._pending),
+            "written": self.written,
+            "dropped": self.dropped,
+        }
+
+
+usage_ledger = UsageLedger()
@@ -0,0 +1,517 @@
+"""
+Index vectoriel approximatif (IVF) sur disque, en NumPy.
+
+- segment principal : vecteurs float16 triés par liste (cellule de k-means
+  sphérique), ouverts en mémoire mappée (np.load(mmap_mode="r")) ; une
+  requête ne lit que les `nprobe` listes les plus proches ;
+- delta : vecteurs ajoutés depuis la dernière compaction, en fichiers
+  append-only, parcourus exhaustivement ;
+- suppressions : ids marqués dans un fichier append-only (tombstones),
+  écartés des résultats puis retirés physiquement à la compaction ;
+- compaction : quand le delta et les suppressions dépassent
+  max(delta_min, 10 % du principal), les vecteurs vivants sont réassignés
+  (et les centroïdes réentraînés si la taille a quadruplé) dans un nouveau
+  segment, publié par remplacement atomique du manifeste.
+
+Les lectures travaillent sur un instantané immuable, lu sous le verrou des
+écritures. Celui-ci n'est tenu que le temps d'un ajout au delta : la
+compaction (k-means, écriture du segment) tourne dans un thread, hors
+verrou, puis le nouveau segment est publié sous le verrou avec les ajouts
+et suppressions arrivés entre-temps.
+
+Un seul processus écrivain par répertoire : l'index est local au processus
+(état en mémoire + fichiers delta), deux écrivains se perdraient leurs
+ajouts à la compaction. Le premier processus prend un verrou exclusif
+(flock) sur le répertoire ; les suivants l'ouvrent en lecture seule, sur
+l'instantané chargé à l'ouverture. Avec plusieurs répliques, chacune doit
+donc avoir son propre VECTOR_INDEX_DIR, ou une seule réplique écrit.
+"""
+
+import json
+import logging
+import os
+import shutil
+import threading
+from dataclasses import dataclass
+from typing import IO, List, Optional, Tuple
+
+import numpy as np
+
+try:  # verrou inter-processus (POSIX uniquement)
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+_STORE_DTYPE = np.float16
+_NO_OWNER = -1
+_KMEANS_ITERS = 8
+_TRAIN_POINTS_PER_LIST = 40
+_LOCK_FILE = "writer.lock"
+
+
+class IndexReadOnly(RuntimeError):
+    """Répertoire verrouillé par un autre processus écrivain."""
+
+
+@dataclass(frozen=True)
+class _Segment:
+    vectors: np.ndarray  # (n, dim) float16
+    ids: np.ndarray  # (n,) int64
+    owners: np.ndarray  # (n,) int32
+    centroids: Optional[np.ndarray] = None  # (nlist, dim) float32
+    offsets: Optional[np.ndarray] = None  # (nlist + 1,) int64
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+def _empty(dim: int) -> _Segment:
+    return _Segment(
+        np.zeros((0, dim), dtype=_STORE_DTYPE),
+        np.zeros(0, dtype=np.int64),
+        np.zeros(0, dtype=np.int32),
+    )
+
+
+def _normalize(x: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    out: np.ndarray = x / norms
+    return out
+
+
+def train_centroids(
+    vectors: np.ndarray, nlist: int, rng: np.random.Generator
+) -> np.ndarray:
+    """k-means sphérique sur un échantillon (produit scalaire = cosinus)."""
+    n = len(vectors)
+    sample_size = min(n, nlist * _TRAIN_POINTS_PER_LIST)
+    sample = np.asarray(
+        vectors[np.sort(rng.choice(n, sample_size, replace=False))], dtype=np.float32
+    )
+    centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+    for _ in range(_KMEANS_ITERS):
+        assign = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, sample)
+        counts = np.bincount(assign, minlength=nlist)
+        empty = counts == 0
+        # cellule vide : réinitialisée sur un point tiré au hasard
+        sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+        centroids = _normalize(sums).astype(np.float32)
+    return centroids
+
+
+def assign_lists(
+    vectors: np.ndarray, centroids: np.ndarray, batch: int = 65536
+) -> np.ndarray:
+    out = np.empty(len(vectors), dtype=np.int32)
+    for i in range(0, len(vectors), batch):
+        chunk = np.asarray(vectors[i : i + batch], dtype=np.float32)
+        out[i : i + batch] = np.argmax(chunk @ centroids.T, axis=1)
+    return out
+
+
+class VectorIndex:
+    def __init__(
+        self,
+        root: str,
+        dim: int,
+        backend: str = "",
+        nprobe: int = 16,
+        delta_min: int = 10_000,
+        background: bool = True,
+    ):
+        self.root = root
+        self.dim = dim
+        self.backend = backend
+        self.nprobe = nprobe
+        self.delta_min = delta_min
+        self.background = background
+        self._lock = threading.Lock()
+        self._compact_lock = threading.Lock()  # une compaction à la fois
+        self._compactor: Optional[threading.Thread] = None
+        self._rng = np.random.default_rng(0)
+        self._trained_on = 0
+        self._version = 0
+        self._main = _empty(dim)
+        self._delta = _empty(dim)
+        self._tombstones = np.zeros(0, dtype=np.int64)  # triés, sans doublon
+        self._lock_file: Optional[IO[str]] = None
+        os.makedirs(root, exist_ok=True)
+        self.read_only = not self._acquire_writer()
+        self._load()
+
+    # ---------- persistance ----------
+
+    def _path(self, *parts: str) -> str:
+        return os.path.join(self.root, *parts)
+
+    def _delta_files(self) -> Tuple[str, str, str]:
+        return self._path("delta.vec"), self._path("delta.ids"), self._path("delta.own")
+
+    def _tombstones_file(self) -> str:
+        return self._path("tombstones.ids")
+
+    def _acquire_writer(self) -> bool:
+        if fcntl is None:
+            return True
+        lock_file = open(self._path(_LOCK_FILE), "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            logger.warning(
+                "vector index %s is locked by another process, opened read-only",
+                self.root,
+            )
+            return False
+        self._lock_file = lock_file
+        return True
+
+    def close(self) -> None:
+        """Attend la compaction en cours et libère le verrou d'écriture."""
+        self.wait_compaction()
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+        self.read_only = True
+
+    def _load(self) -> None:
+        try:
+            with open(self._path("manifest.json"), "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            manifest = None
+        if manifest and (manifest["dim"], manifest["backend"]) != (
+            self.dim,
+            self.backend,
+        ):
+            if self.read_only:  # réinitialisé par l'écrivain
+                return
+            logger.warning(
+                "vector index built for another embedding backend, resetting"
+            )
+            self._reset()
+            manifest = None
+
+        if manifest and manifest.get("segment"):
+            seg = self._path(manifest["segment"])
+            self._main = _Segment(
+                np.load(os.path.join(seg, "vectors.npy"), mmap_mode="r"),
+                np.load(os.path.join(seg, "ids.npy"), mmap_mode="r"),
+                np.load(os.path.join(seg, "owners.npy"), mmap_mode="r"),
+                np.load(os.path.join(seg, "centroids.npy")),
+                np.load(os.path.join(seg, "offsets.npy")),
+            )
+            self._version = manifest["version"]
+            self._trained_on = manifest["trained_on"]
+
+        vec_path, ids_path, own_path = self._delta_files()
+        if os.path.exists(vec_path):
+            row = self.dim * np.dtype(_STORE_DTYPE).itemsize
+            # écriture interrompue : on ne garde que les lignes complètes
+            n = min(
+                os.path.getsize(vec_path) // row,
+                os.path.getsize(ids_path) // 8,
+                os.path.getsize(own_path) // 4,
+            )
+            self._delta = _Segment(
+                np.fromfile(vec_path, dtype=_STORE_DTYPE, count=n * self.dim).reshape(
+                    n, self.dim
+                ),
+                np.fromfile(ids_path, dtype=np.int64, count=n),
+                np.fromfile(own_path, dtype=np.int32, count=n),
+            )
+
+        tomb_path = self._tombstones_file()
+        if os.path.exists(tomb_path):
+            n = os.path.getsize(tomb_path) // 8
+            self._tombstones = np.unique(
+                np.fromfile(tomb_path, dtype=np.int64, count=n)
+            )
+
+    def _reset(self) -> None:
+        for name in os.listdir(self.root):
+            if name == _LOCK_FILE:
+                continue
+            path = self._path(name)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                os.remove(path)
+
+    def _write_manifest(self, segment: Optional[str]) -> None:
+        manifest = {
+            "dim": self.dim,
+            "backend": self.backend,
+            "version": self._version,
+            "segment": segment,
+            "trained_on": self._trained_on,
+            "count": len(self._main),
+        }
+        tmp = self._path("manifest.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp, self._path("manifest.json"))
+
+    # ---------- écriture ----------
+
+    def __len__(self) -> int:
+        return len(self._main) + len(self._delta)
+
+    def _check_writable(self) -> None:
+        if self.read_only:
+            raise IndexReadOnly(f"vector index {self.root} is opened read-only")
+
+    def add(
+        self,
+        ids: np.ndarray,
+        vectors: np.ndarray,
+        owners: Optional[np.ndarray] = None,
+    ) -> None:
+        """Ajoute des vecteurs (normalisés L2) ; compacte si le delta est trop gros."""
+        self._check_writable()
+        ids = np.asarray(ids, dtype=np.int64)
+        vectors = np.asarray(vectors, dtype=_STORE_DTYPE).reshape(len(ids), self.dim)
+        if owners is None:
+            owners = np.full(len(ids), _NO_OWNER, dtype=np.int32)
+        owners = np.asarray(owners, dtype=np.int32)
+
+        tombstones = self._tombstones
+        if len(tombstones) and np.isin(ids, tombstones).any():
+            # id réutilisé par la base : l'ancien vecteur est d'abord
+            # retiré, pour que la suppression ne masque pas le nouveau
+            self.compact()
+        with self._lock:
+            vec_path, ids_path, own_path = self._delta_files()
+            for path, array in (
+                (vec_path, vectors),
+                (ids_path, ids),
+                (own_path, owners),
+            ):
+                with open(path, "ab") as f:
+                    f.write(np.ascontiguousarray(array).tobytes())
+            delta = self._delta
+            self._delta = _Segment(
+                np.concatenate([delta.vectors, vectors]),
+                np.concatenate([delta.ids, ids]),
+                np.concatenate([delta.owners, owners]),
+            )
+        self._maybe_compact()
+
+    def remove(self, ids: np.ndarray) -> None:
+        """
+        Supprime des vecteurs : ils n'apparaissent plus dans les résultats et
+        sont retirés du segment à la prochaine compaction.
+        """
+        self._check_writable()
+        ids = np.asarray(ids, dtype=np.int64)
+        if not len(ids):
+            return
+        with self._lock:
+            with open(self._tombstones_file(), "ab") as f:
+                f.write(np.ascontiguousarray(ids).tobytes())
+            self._tombstones = np.union1d(self._tombstones, ids)
+        self._maybe_compact()
+
+    def _maybe_compact(self) -> None:
+        pending = len(self._delta) + len(self._tombstones)
+        if pending < max(self.delta_min, len(self._main) // 10):
+            return
+        if not self.background:
+            self.compact()
+            return
+        with self._lock:
+            if self._compactor is not None and self._compactor.is_alive():
+                return
+            self._compactor = threading.Thread(
+                target=self._compact_in_background,
+                name="vector-index-compaction",
+                daemon=True,
+            )
+            self._compactor.start()
+
+    def _compact_in_background(self) -> None:
+        try:
+            self.compact()
+        except Exception:
+            logger.exception("vector index compaction failed")
+
+    def wait_compaction(self) -> None:
+        """Attend la fin de la compaction lancée en arrière-plan, s'il y en a une."""
+        compactor = self._compactor
+        if compactor is not None:
+            compactor.join()
+
+    def compact(self) -> None:
+        """
+        Intègre le delta et les suppressions dans un nouveau segment : construit
+        hors verrou à partir d'un instantané, publié sous le verrou.
+        """
+        self._check_writable()
+        with self._compact_lock:
+            with self._lock:
+                main, delta, tombstones = self._main, self._delta, self._tombstones
+            if not len(delta) and not len(tombstones):
+                return
+            name, segment, trained_on = self._build_segment(main, delta, tombstones)
+            with self._lock:
+                self._publish(name, segment, trained_on, len(delta), tombstones)
+            if segment.centroids is not None:
+                logger.info(
+                    "vector index compacted: %d vectors, %d lists",
+                    len(segment),
+                    len(segment.centroids),
+                )
+
+    def _build_segment(
+        self, main: _Segment, delta: _Segment, tombstones: np.ndarray
+    ) -> Tuple[Optional[str], _Segment, int]:
+        """Renvoie (répertoire, segment, taille d'entraînement du k-means)."""
+        vectors = np.concatenate([np.asarray(main.vectors), delta.vectors])
+        ids = np.concatenate([np.asarray(main.ids), delta.ids])
+        owners = np.concatenate([np.asarray(main.owners), delta.owners])
+        if len(tombstones):
+            live = ~np.isin(ids, tombstones)
+            vectors, ids, owners = vectors[live], ids[live], owners[live]
+        total = len(ids)
+        if not total:
+            return None, _empty(self.dim), 0
+
+        centroids = main.centroids
+        trained_on = self._trained_on
+        if centroids is None or total >= 4 * trained_on:
+            nlist = int(np.clip(np.sqrt(total), 1, 4096))
+            centroids = train_centroids(vectors, nlist, self._rng)
+            trained_on = total
+        assign = assign_lists(vectors, centroids)
+        order = np.argsort(assign, kind="stable")
+        offsets = np.zeros(len(centroids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assign, minlength=len(centroids)), out=offsets[1:])
+
+        name = f"segment-{self._version + 1:06d}"
+        seg = self._path(name)
+        os.makedirs(seg, exist_ok=True)
+        np.save(os.path.join(seg, "vectors.npy"), vectors[order])
+        np.save(os.path.join(seg, "ids.npy"), ids[order])
+        np.save(os.path.join(seg, "owners.npy"), owners[order])
+        np.save(os.path.join(seg, "centroids.npy"), centroids)
+        np.save(os.path.join(seg, "offsets.npy"), offsets)
+        segment = _Segment(
+            np.load(os.path.join(seg, "vectors.npy"), mmap_mode="r"),
+            np.load(os.path.join(seg, "ids.npy"), mmap_mode="r"),
+            np.load(os.path.join(seg, "owners.npy"), mmap_mode="r"),
+            centroids,
+            offsets,
+        )
+        return name, segment, trained_on
+
+    def _publish(
+        self,
+        name: Optional[str],
+        segment: _Segment,
+        trained_on: int,
+        merged: int,
+        merged_tombstones: np.ndarray,
+    ) -> None:
+        self._main = segment
+        self._trained_on = trained_on
+        if name is not None:
+            self._version += 1
+        self._write_manifest(name)
+        # les `merged` premières lignes du delta et les suppressions de
+        # l'instantané sont dans le segment ; le reste est arrivé pendant la
+        # compaction et reste en attente
+        delta = self._delta
+        self._delta = _Segment(
+            delta.vectors[merged:], delta.ids[merged:], delta.owners[merged:]
+        )
+        self._tombstones = np.setdiff1d(
+            self._tombstones, merged_tombstones, assume_unique=True
+        )
+        self._rewrite_pending()
+        for old in os.listdir(self.root):
+            if old.startswith("segment-") and old != name:
+                shutil.rmtree(self._path(old), ignore_errors=True)
+
+    def _rewrite_pending(self) -> None:
+        delta = self._delta
+        files = (*self._delta_files(), self._tombstones_file())
+        arrays = (delta.vectors, delta.ids, delta.owners, self._tombstones)
+        for path, array in zip(files, arrays):
+            tmp = f"{path}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(np.ascontiguousarray(array).tobytes())
+            os.replace(tmp, path)
+
+    # ---------- recherche ----------
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int = 10,
+        owner_id: Optional[int] = None,
+        nprobe: Optional[int] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Renvoie (ids, scores) des k plus proches voisins, par score décroissant."""
+        q = np.asarray(query, dtype=np.float32).reshape(self.dim)
+        with self._lock:  # instantané cohérent (segment publié + delta restant)
+            main, delta, tombstones = self._main, self._delta, self._tombstones
+        cand_ids: List[np.ndarray] = []
+        cand_scores: List[np.ndarray] = []
+        found = 0
+
+        def scan(vectors: np.ndarray, ids: np.ndarray, owners: np.ndarray) -> None:
+            nonlocal found
+            scores = vectors.astype(np.float32) @ q
+            if owner_id is not None:
+                scores[owners != owner_id] = -np.inf
+            if len(tombstones):
+                scores[np.isin(ids, tombstones)] = -np.inf
+            found += int(np.isfinite(scores).sum())
+            cand_scores.append(scores)
+            cand_ids.append(ids)
+
+        if len(delta):
+            scan(delta.vectors, delta.ids, delta.owners)
+
+        if len(main):
+            centroids, offsets = main.centroids, main.offsets
+            assert centroids is not None and offsets is not None
+            lists = np.argsort(-(centroids @ q))
+            step = min(nprobe or self.nprobe, len(lists))
+            # listes par proximité décroissante, nprobe à la fois : on élargit
+            # tant que les filtres (propriétaire, suppressions) laissent moins
+            # de k résultats ; les listes sont des plages contiguës du fichier
+            for start in range(0, len(lists), step):
+                for l in lists[start : start + step]:
+                    a, b = offsets[l], offsets[l + 1]
+                    if a < b:
+                        scan(main.vectors[a:b], main.ids[a:b], main.owners[a:b])
+                if found >= k:
+                    break
+
+        if not cand_scores:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        scores = np.concatenate(cand_scores)
+        ids = np.concatenate(cand_ids)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        top = top[np.isfinite(scores[top])]
+        return ids[top], scores[top]
+
+    def stats(self) -> dict:
+        main = self._main
+        return {
+            "vectors": len(self),
+            "main": len(main),
+            "delta": len(self._delta),
+            "tombstones": len(self._tombstones),
+            "lists": 0 if main.centroids is None else len(main.centroids),
+            "dim": self.dim,
+            "backend": self.backend,
+        }
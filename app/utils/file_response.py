@@ -0,0 +1,220 @@
+"""
+Réponses HTTP pour des fichiers immuables, adaptées au cache.
+
+- ETag fort (hash du contenu) et Cache-Control longue durée ;
+- requêtes conditionnelles (If-None-Match / If-Modified-Since) : 304 ;
+- plages d'octets (Range / If-Range), gérées par le FileResponse de Starlette ;
+- variantes précompressées (``.br``, ``.gz``) écrites à côté du fichier
+  pendant le rendu (voir :func:`encoder`) et choisies selon Accept-Encoding.
+
+Les fonctions utilitaires (:func:`not_modified`, :func:`parse_range`...)
+servent aussi aux réponses lues depuis un object store.
+"""
+
+import asyncio
+import hashlib
+import os
+import zlib
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import Any, List, Optional, Protocol, Set, Tuple
+from urllib.parse import quote
+
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response
+
+try:  # dépendance optionnelle
+    import brotli  # type: ignore[import-untyped, import-not-found]
+except ImportError:  # pragma: no cover
+    brotli = None
+
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+# (content-coding, suffixe du fichier), par ordre de préférence
+ENCODINGS: Tuple[Tuple[str, str], ...] = (("br", ".br"), ("gzip", ".gz"))
+
+_MIN_COMPRESS_BYTES = 1024
+_BROTLI_QUALITY = 9  # 11 est plusieurs fois plus lent pour quelques % de gain
+_HASH_CHUNK = 1024 * 1024
+
+
+class Compressor(Protocol):
+    """Ce que renvoie :func:`encoder` (l'interface de ``zlib.compressobj``)."""
+
+    def compress(self, data: bytes, /) -> bytes: ...
+
+    def flush(self) -> bytes: ...
+
+
+class _Brotli:
+    def __init__(self) -> None:
+        self._compressor: Any = brotli.Compressor(quality=_BROTLI_QUALITY)
+
+    def compress(self, data: bytes, /) -> bytes:
+        out: bytes = self._compressor.process(data)
+        return out
+
+    def flush(self) -> bytes:
+        out: bytes = self._compressor.finish()
+        return out
+
+
+def available_encodings() -> List[Tuple[str, str]]:
+    """Couples (content-coding, suffixe) produits par cette installation."""
+    return [
+        (coding, suffix) for coding, suffix in ENCODINGS if coding != "br" or brotli
+    ]
+
+
+def encoder(encoding: str) -> Compressor:
+    """Compresseur en flux (``compress(bytes)`` / ``flush()``) d'un content-coding."""
+    if encoding == "gzip":
+        # conteneur gzip, mtime=0 : même entrée, mêmes octets (ETag stable)
+        return zlib.compressobj(9, zlib.DEFLATED, 31)
+    return _Brotli()
+
+
+def keep_variant(size: int, compressed_size: int) -> bool:
+    """Une variante n'est servie que si elle fait gagner au moins 10 %."""
+    return size >= _MIN_COMPRESS_BYTES and compressed_size <= size * 0.9
+
+
+@lru_cache(maxsize=4096)
+def _content_hash(path: str, mtime_ns: int, size: int) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(_HASH_CHUNK):
+            h.update(chunk)
+    return h.hexdigest()[:32]
+
+
+def strong_etag(path: str, stat_result: Optional[os.stat_result] = None) -> str:
+    """ETag entre guillemets, dérivé du contenu (hash en cache par mtime/taille)."""
+    st = stat_result or os.stat(path)
+    return f'"{_content_hash(path, st.st_mtime_ns, st.st_size)}"'
+
+
+def accepted_encodings(header: Optional[str]) -> Set[str]:
+    accepted: Set[str] = set()
+    for item in (header or "").split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding and q > 0:
+            accepted.add(coding)
+    if "*" in accepted:
+        accepted.update(coding for coding, _ in ENCODINGS)
+    return accepted
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # comparaison faible (RFC 9110 13.1.2)
+    if if_none_match.strip() == "*":
+        return True
+    tags = (t.strip() for t in if_none_match.split(","))
+    return etag in (t[2:] if t.startswith("W/") else t for t in tags)
+
+
+def not_modified(request: Request, etag: str, mtime: float) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(mtime) <= since
+    return False
+
+
+def parse_range(request: Request, etag: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Plage d'octets demandée, en (début, fin) avec ``fin`` exclue ; None pour
+    envoyer la représentation entière (pas de Range, If-Range périmé ou
+    plusieurs plages). Lève ValueError si la plage n'est pas satisfiable.
+    """
+    header = request.headers.get("range")
+    if not header or not header.startswith("bytes="):
+        return None
+    if_range = request.headers.get("if-range")
+    if if_range is not None and if_range.strip() != etag:
+        return None
+    spec = header[len("bytes=") :].strip()
+    if "," in spec:
+        return None
+    first, sep, last = spec.partition("-")
+    if not sep:
+        return None
+    try:
+        if not first:  # suffixe : les N derniers octets
+            start, end = max(0, size - int(last)), size
+        else:
+            start = int(first)
+            end = min(size, int(last) + 1) if last else size
+    except ValueError:
+        return None
+    if start >= end:
+        raise ValueError(f"Unsatisfiable range {header!r} for {size} bytes")
+    return start, end
+
+
+def content_disposition(filename: str) -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
+def _select(
+    path: str, accept_encoding: Optional[str]
+) -> Tuple[str, Optional[str], bool, os.stat_result, str]:
+    accepted = accepted_encodings(accept_encoding)
+    has_variants = False
+    chosen, encoding = path, None
+    for coding, suffix in ENCODINGS:
+        if os.path.isfile(path + suffix):
+            has_variants = True
+            if encoding is None and coding in accepted:
+                chosen, encoding = path + suffix, coding
+    st = os.stat(chosen)
+    return chosen, encoding, has_variants, st, strong_etag(chosen, st)
+
+
+async def immutable_file_response(
+    request: Request,
+    path: str,
+    media_type: str,
+    filename: Optional[str] = None,
+    cache_control: str = IMMUTABLE_CACHE_CONTROL,
+) -> Response:
+    """
+    Réponse pour un fichier qui ne change plus une fois écrit : 304 si la
+    copie du client est à jour, sinon la meilleure variante précompressée
+    (ou le fichier lui-même), avec prise en charge de Range.
+    """
+    chosen, encoding, has_variants, st, etag = await asyncio.to_thread(
+        _select, path, request.headers.get("accept-encoding")
+    )
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if has_variants:
+        headers["Vary"] = "Accept-Encoding"
+    if not_modified(request, etag, st.st_mtime):
+        return Response(status_code=304, headers=headers)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return FileResponse(
+        chosen,
+        media_type=media_type,
+        filename=filename,
+        headers=headers,
+        stat_result=st,
+    )
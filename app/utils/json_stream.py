@@ -0,0 +1,67 @@
+"""
+Incremental JSON object parser.
+"""
+
+import json
+from typing import Any, List, Tuple
+
+
+class JSONObjectStreamParser:
+    """
+    Parse a JSON object received in chunks and return each top-level member
+    as soon as its value is complete.
+
+    Only the top-level object is tracked: nested objects/arrays/strings are
+    skipped by depth and string state, and each finished ``"key": value``
+    member is decoded with ``json.loads``.
+    """
+
+    def __init__(self) -> None:
+        self._member: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self.done = False
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Consume a chunk, return the members completed by it."""
+        completed: List[Tuple[str, Any]] = []
+        for ch in chunk:
+            if self.done:
+                break
+            if self._in_string:
+                self._member.append(ch)
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+                if self._depth == 1:
+                    continue  # opening brace of the top-level object
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._flush(completed)
+                    self.done = True
+                    continue
+            elif ch == "," and self._depth == 1:
+                self._flush(completed)
+                continue
+
+            if self._depth >= 1:
+                self._member.append(ch)
+        return completed
+
+    def _flush(self, completed: List[Tuple[str, Any]]) -> None:
+        text = "".join(self._member).strip()
+        self._member = []
+        if not text:
+            return
+        completed.extend(json.loads("{" + text + "}").items())
@@ -1,11 +1,24 @@
 """
-LRU Cache implementation.
+LRU and TTL cache implementations.
 """
 
+import threading
+import time
 from collections import OrderedDict
-from typing import Any, Dict, Optional, TypeVar, Union, overload
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+    overload,
+)
 
 _T = TypeVar("_T")
+_V = TypeVar("_V")
 
 
 class LRUCache(OrderedDict[str, Dict[str, Any]]):
@@ -35,3 +48,59 @@ class LRUCache(OrderedDict[str, Dict[str, Any]]):
         self.move_to_end(key)
         if len(self) > self._capacity:
             self.popitem(last=False)
+
+
+class TTLCache(Generic[_V]):
+    """
+    Bounded LRU cache whose entries also expire after a time-to-live.
+
+    Safe to share between threads and coroutines: every operation holds a
+    lock for a few dictionary operations only and never awaits.
+    """
+
+    def __init__(
+        self, capacity: int, ttl: float, clock: Callable[[], float] = time.monotonic
+    ):
+        self._capacity = capacity
+        self._ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, _V]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[_V]:
+        """Get a live item and mark it as recently used."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= self._clock():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, value: _V, ttl: Optional[float] = None) -> None:
+        """Store an item for `ttl` seconds (default TTL, never longer)."""
+        ttl = self._ttl if ttl is None else min(ttl, self._ttl)
+        if ttl <= 0 or self._capacity <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self._clock() + ttl, value)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self._capacity:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: str) -> Optional[_V]:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        return None if entry is None else entry[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
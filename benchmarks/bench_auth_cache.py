@@ -0,0 +1,99 @@
+"""
+Requêtes authentifiées (JWT et jeton d'API) : débit avec et sans le cache
+des utilisateurs authentifiés, sur l'application réelle et une base SQLite
+temporaire.
+
+    python -m benchmarks.bench_auth_cache [--requests 2000] [--concurrency 32]
+"""
+
+import argparse
+import asyncio
+import os
+import secrets
+import tempfile
+import time
+from typing import Any, AsyncGenerator, Dict
+
+import httpx
+
+from app.core.security import create_access_token
+from app.db.base import Base
+from app.db.session import AsyncSession, DatabaseSessionManager, get_db
+from app.models.user import APIToken, User
+from app.services import auth as auth_service
+from app.utils.lru_cache import TTLCache
+from main import app
+
+
+async def _run(
+    client: httpx.AsyncClient,
+    url: str,
+    headers: Dict[str, str],
+    n: int,
+    concurrency: int,
+) -> float:
+    queue = iter(range(n))
+
+    async def worker() -> None:
+        for _ in queue:
+            response = await client.get(url, headers=headers)
+            assert response.status_code == 200, response.text
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return n / (time.perf_counter() - t0)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseSessionManager(
+            f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}"
+        )
+        async with db._engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+        async def bench_db() -> AsyncGenerator[AsyncSession, None]:
+            async with db.session() as session:
+                yield session
+
+        app.dependency_overrides[get_db] = bench_db
+        async with db.session() as session:
+            user = User(username="bench", hashed_password="x")
+            session.add(user)
+            await session.flush()
+            api_token = secrets.token_hex(32)
+            session.add(APIToken(token=api_token, user_id=user.id))
+            jwt_token = create_access_token(str(user.username), str(user.id))
+            await session.commit()
+
+        cases = {
+            "JWT (/auth/me)": ("/auth/me", {"Authorization": f"Bearer {jwt_token}"}),
+            "API token (/auth/api-me)": ("/auth/api-me", {"X-API-Token": api_token}),
+        }
+        caches: Dict[str, TTLCache[Dict[str, Any]]] = {
+            "no cache": TTLCache(0, 0.0),
+            "cache": TTLCache(10_000, 60.0),
+        }
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as client:
+            for label, (url, headers) in cases.items():
+                for mode, cache in caches.items():
+                    auth_service.principal_cache = cache
+                    await _run(client, url, headers, 50, 4)  # échauffement
+                    rate = await _run(
+                        client, url, headers, args.requests, args.concurrency
+                    )
+                    print(f"{label:<26} {mode:<9} {rate:8.0f} req/s")
+        app.dependency_overrides.pop(get_db, None)
+        await db.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
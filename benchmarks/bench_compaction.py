@@ -0,0 +1,71 @@
+"""
+Mesure la réduction de tokens apportée par la compaction du transcript.
+
+    python -m benchmarks.bench_compaction [transcript.json ...]
+
+Chaque fichier est une réponse de /reports/transcribe (ou son champ
+"transcript"). Sans argument, un transcript synthétique est utilisé.
+"""
+
+import json
+import random
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+from app.services.compaction import compact_transcript
+
+
+def _synthetic_meeting(minutes: int = 60) -> Tuple[str, List[Dict[str, Any]]]:
+    rng = random.Random(0)
+    fillers = ["euh,", "hum,", "bah", "um", "uh,"]
+    words = (
+        "budget planning livraison client sprint risque équipe recrutement "
+        "migration serveur sécurité réunion décision priorité"
+    ).split()
+    segments: List[Dict[str, Any]] = []
+    t = 0.0
+    while t < minutes * 60:
+        n = rng.randint(6, 25)
+        tokens = [rng.choice(words) for _ in range(n)]
+        for _ in range(rng.randint(0, 3)):
+            tokens.insert(rng.randrange(len(tokens)), rng.choice(fillers))
+        text = "  ".join(tokens) + "."
+        if rng.random() < 0.03:  # boucle d'hallucination ASR
+            text = " ".join(["merci"] * 12)
+        dur = n * 0.4
+        segments.append(
+            {
+                "start": t,
+                "end": t + dur,
+                "text": text,
+                "speaker": f"SPEAKER_0{rng.randint(0, 3)}",
+            }
+        )
+        t += dur + rng.uniform(0.1, 1.5)
+    return " ".join(s["text"] for s in segments), segments
+
+
+def _load(path: str) -> Tuple[str, List[Dict[str, Any]]]:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    data = data.get("transcript", data)
+    return data.get("text", ""), data.get("segments", [])
+
+
+def main() -> None:
+    inputs = [(p, *_load(p)) for p in sys.argv[1:]] or [
+        ("synthetic-60min", *_synthetic_meeting())
+    ]
+    for name, text, segments in inputs:
+        t0 = time.perf_counter()
+        compact = compact_transcript(text, segments)
+        elapsed = (time.perf_counter() - t0) * 1000
+        print(
+            f"{name}: {compact.tokens_before} -> {compact.tokens_after} tokens "
+            f"(-{compact.reduction:.0%}), compaction {elapsed:.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
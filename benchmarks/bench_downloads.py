@@ -0,0 +1,78 @@
+"""
+Téléchargement répété d'un export Markdown : octets transférés et latence
+pour une première vue (identité / gzip) et une revalidation (304).
+
+    python -m benchmarks.bench_downloads [--minutes 120] [--runs 50]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+import httpx
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+
+from app.models.notes import MeetingSummary
+from app.services.artifacts import _write_markdown
+from app.services.storage import LocalStorage
+from app.utils.file_response import immutable_file_response
+from benchmarks.bench_compaction import _synthetic_meeting
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--minutes", type=int, default=120)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    transcript, segments = _synthetic_meeting(args.minutes)
+    source = {
+        "summary": MeetingSummary(executive_summary="Benchmark").model_dump(),
+        "transcript_text": transcript,
+        "segments": segments,
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "r", "meeting-notes.md")
+        t0 = time.perf_counter()
+        _write_markdown(LocalStorage(tmp), source, "r/meeting-notes.md")
+        print(f"render + compressed variants: {time.perf_counter() - t0:.2f}s")
+
+        async def download(request: Request) -> Response:
+            return await immutable_file_response(
+                request, path, "text/markdown", "meeting-notes.md"
+            )
+
+        app = Starlette(routes=[Route("/file", download)])
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as client:
+            etag = (
+                await client.get("/file", headers={"Accept-Encoding": "gzip"})
+            ).headers["etag"]
+            cases = {
+                "identity": {"Accept-Encoding": "identity"},
+                "gzip": {"Accept-Encoding": "gzip"},
+                "revalidated (304)": {"Accept-Encoding": "gzip", "If-None-Match": etag},
+            }
+            for label, headers in cases.items():
+                timings, sent = [], 0
+                for _ in range(args.runs):
+                    t0 = time.perf_counter()
+                    async with client.stream("GET", "/file", headers=headers) as res:
+                        sent = sum([len(chunk) async for chunk in res.aiter_raw()])
+                    timings.append(time.perf_counter() - t0)
+                print(
+                    f"{label:>18}: {sent / 1e3:8.1f} kB, "
+                    f"median {statistics.median(timings) * 1000:.2f} ms"
+                )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
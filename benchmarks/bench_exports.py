@@ -0,0 +1,99 @@
+"""
+Exports Markdown / SRT d'un très long transcript : écriture en flux vs
+document complet construit en mémoire puis écrit d'un coup. L'écriture en
+flux est aussi mesurée vers un object store S3 (client sans réseau qui
+jette les parties) : la mémoire reste bornée par S3_PART_SIZE.
+
+    python -m benchmarks.bench_exports [--minutes 1200]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable
+
+from app.models.notes import MeetingSummary
+from app.services.artifacts import _write_markdown, _write_subtitles
+from app.services.notes import iter_markdown
+from app.services.storage import LocalStorage, S3Storage
+from app.services.subtitles import iter_srt
+from benchmarks.bench_compaction import _synthetic_meeting
+
+
+def _measure(label: str, fn: Callable[[], object]) -> None:
+    # temps et mémoire mesurés séparément : tracemalloc ralentit l'exécution
+    t0 = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - t0
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label}: {elapsed:.2f}s, peak Python memory {peak / 1e6:.1f} MB")
+
+
+def _in_memory(text: str, path: str) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+class _NullS3:
+    """Client S3 minimal : accepte les parties sans les conserver."""
+
+    def put_object(self, **kwargs: Any) -> dict:
+        return {}
+
+    def create_multipart_upload(self, **kwargs: Any) -> dict:
+        return {"UploadId": "bench"}
+
+    def upload_part(self, **kwargs: Any) -> dict:
+        return {"ETag": '"part"'}
+
+    def complete_multipart_upload(self, **kwargs: Any) -> None:
+        pass
+
+    def abort_multipart_upload(self, **kwargs: Any) -> None:
+        pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--minutes", type=int, default=1200)
+    args = parser.parse_args()
+
+    transcript, segments = _synthetic_meeting(args.minutes)
+    summary = MeetingSummary(executive_summary="Benchmark", decisions=["OK"])
+    source = {
+        "summary": summary.model_dump(),
+        "transcript_text": transcript,
+        "segments": segments,
+    }
+    print(
+        f"{args.minutes} min, {len(segments)} segments, {len(transcript) / 1e6:.1f}M chars"
+    )
+
+    s3 = S3Storage("bench", client=_NullS3())
+    with tempfile.TemporaryDirectory() as tmp:
+        local = LocalStorage(tmp)
+        md, srt = os.path.join(tmp, "out.md"), os.path.join(tmp, "out.srt")
+        _measure(
+            "markdown, in memory",
+            lambda: _in_memory("".join(iter_markdown(summary, transcript)), md),
+        )
+        _measure(
+            "markdown, streamed", lambda: _write_markdown(local, source, "r/out.md")
+        )
+        _measure(
+            "markdown, streamed to s3", lambda: _write_markdown(s3, source, "r/out.md")
+        )
+        _measure(
+            "srt, in memory",
+            lambda: _in_memory("".join(iter_srt(segments)), srt),
+        )
+        _measure("srt, streamed", lambda: _write_subtitles(local, source, "r/out.srt"))
+
+
+if __name__ == "__main__":
+    main()
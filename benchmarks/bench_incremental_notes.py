@@ -0,0 +1,70 @@
+"""
+Régénération des notes après correction de quelques lignes d'un long
+transcript : première génération (cache vide) puis régénération, contre un
+faux LLM local. Compte les appels LLM et les tokens de prompt envoyés.
+
+    python -m benchmarks.bench_incremental_notes [--minutes 180] [--edits 3]
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from app.core.config import settings
+from app.services import llm, notes
+from app.services.compaction import count_tokens
+from app.services.notes_cache import NotesCache
+from benchmarks.bench_compaction import _synthetic_meeting
+from benchmarks.fake_llm_server import start_fake_llm_server
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--minutes", type=int, default=180)
+    parser.add_argument("--edits", type=int, default=3)
+    parser.add_argument("--ms-per-token", type=float, default=5.0)
+    args = parser.parse_args()
+
+    settings.OPENAI_BASE_URL = start_fake_llm_server(args.ms_per_token / 1000)
+    settings.OPENAI_API_KEY = "fake"
+    text, segments = _synthetic_meeting(args.minutes)
+
+    calls: List[int] = []
+    chat_json = notes._chat_json
+
+    async def counting_chat_json(
+        system_prompt: str, user_prompt: str
+    ) -> Dict[str, Any]:
+        calls.append(count_tokens(system_prompt) + count_tokens(user_prompt))
+        return await chat_json(system_prompt, user_prompt)
+
+    notes._chat_json = counting_chat_json
+
+    # lignes consécutives corrigées au milieu de la réunion
+    edited = [dict(s) for s in segments]
+    middle = len(edited) // 2
+    for s in edited[middle : middle + args.edits]:
+        s["text"] = s["text"].replace("budget", "budget prévisionnel")
+    edited_text = " ".join(s["text"] for s in edited)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        notes.notes_cache = NotesCache(tmp, max_bytes=1 << 30)
+        for label, t, segs in (
+            ("first generation", text, segments),
+            (f"after {args.edits} edited lines", edited_text, edited),
+        ):
+            calls.clear()
+            t0 = time.perf_counter()
+            await notes.generate_structured_notes(t, "fr", segments=segs)
+            elapsed = time.perf_counter() - t0
+            print(
+                f"{label:>24}: {elapsed:.2f}s, {len(calls)} LLM calls, "
+                f"{sum(calls)} prompt tokens"
+            )
+    await llm.close_client()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
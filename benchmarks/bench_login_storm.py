@@ -0,0 +1,121 @@
+"""
+Rafale de connexions : débit de /auth/login et latence de /health pendant la
+rafale, bcrypt dans la boucle d'événements vs dans le pool de processus.
+
+    python -m benchmarks.bench_login_storm [--logins 64] [--rounds 12] [--workers N]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from typing import Any, AsyncGenerator, Callable, List
+
+import httpx
+
+from app.core.security import pwd_context
+from app.db.base import Base
+from app.db.session import AsyncSession, DatabaseSessionManager, get_db
+from app.models.user import User
+from app.services import auth as auth_service
+from app.services.process_pool import BoundedProcessPool
+from main import app
+
+
+class _InlinePool:
+    """Comportement d'avant : le hachage bloque la boucle d'événements."""
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> "asyncio.Future[Any]":
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(fn(*args))
+        return future
+
+
+async def _storm(client: httpx.AsyncClient, logins: int) -> None:
+    stop = asyncio.Event()
+    probes: List[float] = []
+
+    async def probe() -> None:
+        # retard mesuré depuis l'heure prévue du sondage : une boucle bloquée
+        # retarde le réveil lui-même, pas seulement la requête
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            await asyncio.sleep(0.005)
+            await client.get("/health")
+            probes.append(time.perf_counter() - t0 - 0.005)
+
+    async def login() -> None:
+        response = await client.post(
+            "/auth/login", json={"username": "bench", "password": "secret123"}
+        )
+        assert response.status_code == 200, response.text
+
+    prober = asyncio.create_task(probe())
+    t0 = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    await prober
+    probes.sort()
+    print(
+        f"  {logins / elapsed:6.1f} logins/s | /health p50 "
+        f"{statistics.median(probes) * 1000:7.1f} ms, p99 "
+        f"{probes[int(len(probes) * 0.99)] * 1000:7.1f} ms, max {probes[-1] * 1000:7.1f} ms "
+        f"({len(probes)} probes)"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseSessionManager(
+            f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}"
+        )
+        async with db._engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+        async def bench_db() -> AsyncGenerator[AsyncSession, None]:
+            async with db.session() as session:
+                yield session
+
+        app.dependency_overrides[get_db] = bench_db
+        # même coût que BCRYPT_ROUNDS : aucun rehash pendant la mesure
+        os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+        pwd_context.update(
+            bcrypt__default_rounds=args.rounds, bcrypt__min_desired_rounds=args.rounds
+        )
+        async with db.session() as session:
+            session.add(
+                User(username="bench", hashed_password=pwd_context.hash("secret123"))
+            )
+            await session.commit()
+
+        pool = BoundedProcessPool(args.workers, args.logins, name="password")
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as client:
+            for label, hashing in (
+                ("event loop", _InlinePool()),
+                (f"pool x{args.workers}", pool),
+            ):
+                auth_service.password_pool = hashing  # type: ignore[assignment]
+                await client.post(
+                    "/auth/login", json={"username": "bench", "password": "secret123"}
+                )
+                print(f"bcrypt in {label} (cost {args.rounds}):")
+                await _storm(client, args.logins)
+        pool.shutdown()
+        app.dependency_overrides.pop(get_db, None)
+        await db.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,53 @@
+"""
+Compare la génération de notes en un appel ("single") et en extractions
+parallèles par section ("sections") contre un faux LLM local.
+
+    python -m benchmarks.bench_notes_fanout [--ms-per-token 5] [--runs 3]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.core.config import settings
+from app.services import llm
+from app.services.notes import generate_structured_notes
+from benchmarks.bench_compaction import _synthetic_meeting
+from benchmarks.fake_llm_server import start_fake_llm_server
+
+
+async def _run(strategy: str, text: str, segments: list, runs: int) -> list:
+    timings = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        await generate_structured_notes(
+            text, "fr", segments=segments, strategy=strategy
+        )
+        timings.append(time.perf_counter() - t0)
+    return timings
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ms-per-token", type=float, default=5.0)
+    parser.add_argument("--minutes", type=int, default=30)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    settings.OPENAI_BASE_URL = start_fake_llm_server(args.ms_per_token / 1000)
+    settings.OPENAI_API_KEY = "fake"
+    settings.NOTES_CACHE_ENABLED = False
+    text, segments = _synthetic_meeting(args.minutes)
+
+    for strategy in ("single", "sections"):
+        timings = await _run(strategy, text, segments, args.runs)
+        print(
+            f"{strategy:>8}: median {statistics.median(timings):.2f}s "
+            f"(min {min(timings):.2f}s, max {max(timings):.2f}s)"
+        )
+    await llm.close_client()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
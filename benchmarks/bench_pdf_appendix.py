@@ -0,0 +1,90 @@
+"""
+Rendu PDF d'un transcript de 50k mots : annexe par segments (flowables
+produits à la demande) vs l'ancien paragraphe unique.
+
+    python -m benchmarks.bench_pdf_appendix [--words 50000] [--legacy-chars 20000]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from typing import Callable
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import Paragraph, SimpleDocTemplate
+
+from app.models.notes import MeetingSummary
+from app.services.notes import generate_pdf_report
+
+
+def _segments(words: int) -> list:
+    rng = random.Random(0)
+    vocab = "le budget du projet est validé par l'équipe pour la prochaine livraison client".split()
+    segments, t, left = [], 0.0, words
+    while left > 0:
+        n = min(left, rng.randint(8, 30))
+        text = " ".join(rng.choice(vocab) for _ in range(n)) + "."
+        segments.append(
+            {
+                "start": t,
+                "end": t + n * 0.4,
+                "text": text,
+                "speaker": f"SPEAKER_0{rng.randint(0, 3)}",
+            }
+        )
+        t += n * 0.4 + 0.5
+        left -= n
+    return segments
+
+
+def _measure(label: str, fn: Callable[[], object]) -> None:
+    # temps et mémoire mesurés séparément : tracemalloc ralentit fortement le rendu
+    t0 = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - t0
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label}: {elapsed:.2f}s, peak Python memory {peak / 1e6:.1f} MB")
+
+
+def _legacy(transcript: str, path: str) -> None:
+    body = getSampleStyleSheet()["BodyText"]
+    SimpleDocTemplate(path, pagesize=A4).build([Paragraph(transcript, body)])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--words", type=int, default=50_000)
+    parser.add_argument("--legacy-chars", type=int, default=20_000)
+    args = parser.parse_args()
+
+    segments = _segments(args.words)
+    transcript = " ".join(s["text"] for s in segments)
+    summary = MeetingSummary(executive_summary="Benchmark", decisions=["OK"])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        out = os.path.join(tmp, "report.pdf")
+        print(f"{args.words} words, {len(segments)} segments, {len(transcript)} chars")
+        _measure(
+            "segments (full transcript)",
+            lambda: generate_pdf_report(summary, transcript, out, segments),
+        )
+        print(f"  -> {os.path.getsize(out) / 1e6:.1f} MB PDF")
+        _measure(
+            "plain text (full transcript)",
+            lambda: generate_pdf_report(summary, transcript, out),
+        )
+        _measure(
+            f"legacy single paragraph ({args.legacy_chars} chars only)",
+            lambda: _legacy(transcript[: args.legacy_chars], out),
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Listing des rapports : pagination par curseur vs OFFSET, sur une base
+SQLite temporaire contenant des centaines de milliers de rapports.
+
+    python -m benchmarks.bench_report_listing [--reports 300000] [--owners 50]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable
+
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.db.base import Base
+from app.models.report import Report
+from app.models.user import User  # noqa: F401  (table users pour la clé étrangère)
+from app.services.report_index import encode_cursor, list_reports
+
+
+async def _seed(session: AsyncSession, reports: int, owners: int) -> None:
+    rng = random.Random(0)
+    t0 = datetime(2025, 1, 1)
+    await session.execute(
+        text(
+            "INSERT INTO users (id, username, hashed_password) VALUES "
+            + ", ".join(f"({i}, 'user{i}', 'x')" for i in range(1, owners + 1))
+        )
+    )
+    batch = []
+    for i in range(reports):
+        batch.append(
+            {
+                "id": f"r{i:08d}",
+                "owner_id": rng.randint(1, owners),
+                "created_at": t0 + timedelta(seconds=i * 7),
+                "status": "ready",
+                "source_path": f"/data/reports/r{i:08d}/report.json",
+                "artifacts": {},
+            }
+        )
+        if len(batch) == 10_000:
+            await session.execute(insert(Report), batch)
+            batch = []
+    if batch:
+        await session.execute(insert(Report), batch)
+    await session.commit()
+
+
+async def _timed(
+    label: str, coro_fn: Callable[[], Awaitable[Any]], repeat: int = 20
+) -> None:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        await coro_fn()
+    print(f"{label}: {(time.perf_counter() - t0) / repeat * 1000:.2f} ms/page")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--reports", type=int, default=300_000)
+    parser.add_argument("--owners", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(
+            f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}"
+        )
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with AsyncSession(engine) as session:
+            t0 = time.perf_counter()
+            await _seed(session, args.reports, args.owners)
+            print(f"seeded {args.reports} reports in {time.perf_counter() - t0:.1f}s")
+
+            owner = 1
+            total = await session.scalar(
+                select(func.count()).select_from(Report).where(Report.owner_id == owner)
+            )
+            # curseur sur la dernière page du propriétaire
+            deep_offset = max(0, total - args.limit)
+            last = (
+                await session.execute(
+                    select(Report)
+                    .where(Report.owner_id == owner)
+                    .order_by(Report.created_at.desc(), Report.id.desc())
+                    .offset(deep_offset - 1)
+                    .limit(1)
+                )
+            ).scalar_one()
+            deep_cursor = encode_cursor(last)
+            print(f"owner {owner}: {total} reports, deep page at offset {deep_offset}")
+
+            async def keyset_first() -> None:
+                await list_reports(session, owner, args.limit)
+
+            async def keyset_deep() -> None:
+                await list_reports(session, owner, args.limit, cursor=deep_cursor)
+
+            async def offset_deep() -> None:
+                await session.execute(
+                    select(Report)
+                    .where(Report.owner_id == owner)
+                    .order_by(Report.created_at.desc(), Report.id.desc())
+                    .offset(deep_offset)
+                    .limit(args.limit)
+                )
+
+            await _timed("keyset, first page", keyset_first)
+            await _timed("keyset, last page", keyset_deep)
+            await _timed("offset, last page", offset_deep)
+
+            plan = await session.execute(
+                text(
+                    "EXPLAIN QUERY PLAN SELECT * FROM reports WHERE owner_id = 1 "
+                    "AND (created_at, id) < ('2025-06-01', 'r1') "
+                    "ORDER BY created_at DESC, id DESC LIMIT 21"
+                )
+            )
+            for row in plan:
+                print("  plan:", row[-1])
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
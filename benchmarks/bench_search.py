@@ -0,0 +1,132 @@
+"""
+Latence de la recherche plein texte (FTS5) sur un corpus synthétique.
+
+    python -m benchmarks.bench_search [--reports 2000] [--segments 200]
+
+Vocabulaire de 20k pseudo-mots tirés selon une loi de Zipf : les requêtes
+portent sur des mots fréquents, moyens et rares.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.db.base import Base
+from app.models.notes import MeetingSummary
+from app.models.report import Report, ReportChunk  # noqa: F401
+from app.models.user import User  # noqa: F401  (table users pour la clé étrangère)
+from app.services.search import index_report, search_chunks
+
+_SYLLABLES = ["ba", "do", "ki", "lu", "me", "no", "pa", "ri", "so", "tu", "vé", "zo"]
+
+
+def _vocab(size: int, rng: random.Random) -> list:
+    words: set = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+async def _seed(
+    session: AsyncSession, args: argparse.Namespace, vocab: list, weights: list, rng: random.Random
+) -> None:
+    await session.execute(text("PRAGMA synchronous = OFF"))
+    await session.execute(
+        text(
+            "INSERT INTO users (id, username, hashed_password) VALUES "
+            + ", ".join(f"({i}, 'user{i}', 'x')" for i in range(1, args.owners + 1))
+        )
+    )
+    t0 = time.perf_counter()
+    for r in range(args.reports):
+        segments, t = [], 0.0
+        for _ in range(args.segments):
+            n = rng.randint(6, 25)
+            words = rng.choices(vocab, weights, k=n)
+            segments.append(
+                {
+                    "start": t,
+                    "end": t + n * 0.4,
+                    "text": " ".join(words) + ".",
+                    "speaker": f"SPEAKER_0{rng.randint(0, 3)}",
+                }
+            )
+            t += n * 0.4 + 0.5
+        summary = MeetingSummary(
+            executive_summary=" ".join(rng.choices(vocab, weights, k=40)),
+            decisions=[" ".join(rng.choices(vocab, weights, k=8)) for _ in range(3)],
+        )
+        report_id = f"r{r:06d}"
+        owner_id = r % args.owners + 1
+        session.add(
+            Report(
+                id=report_id,
+                owner_id=owner_id,
+                created_at=datetime(2025, 1, 1),
+                status="ready",
+                source_path="-",
+                artifacts={},
+            )
+        )
+        await index_report(session, report_id, summary, "", segments, owner_id=owner_id)
+        await session.commit()
+    chunks = args.reports * (args.segments + 4)
+    print(
+        f"indexed {args.reports} reports (~{chunks} chunks) in {time.perf_counter() - t0:.1f}s"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--reports", type=int, default=2000)
+    parser.add_argument("--segments", type=int, default=200)
+    parser.add_argument("--owners", type=int, default=10)
+    parser.add_argument(
+        "--db", help="base SQLite à conserver/réutiliser (défaut : temporaire)"
+    )
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    vocab = _vocab(20_000, rng)
+    weights = [1 / (rank + 1) for rank in range(len(vocab))]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.db or os.path.join(tmp, "bench.db")
+        seed = not os.path.exists(path)
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with AsyncSession(engine) as session:
+            if seed:
+                await _seed(session, args, vocab, weights, rng)
+            queries = {
+                "frequent word": vocab[0],
+                "medium word": vocab[200],
+                "rare word": vocab[15_000],
+                "two words": f"{vocab[3]} {vocab[150]}",
+                "prefix": vocab[50][:3],
+            }
+            for label, q in queries.items():
+                timings, hits = [], 0
+                for _ in range(20):
+                    t0 = time.perf_counter()
+                    hits = len(await search_chunks(session, q, owner_id=1, limit=20))
+                    timings.append((time.perf_counter() - t0) * 1000)
+                timings.sort()
+                print(
+                    f"{label:14s} {q!r:16s} hits={hits:2d}  "
+                    f"p50={statistics.median(timings):.1f} ms  p95={timings[18]:.1f} ms"
+                )
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
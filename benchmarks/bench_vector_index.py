@@ -0,0 +1,82 @@
+"""
+Index IVF : construction, latence de requête et rappel@10 sur un million
+de vecteurs synthétiques (mélange de gaussiennes normalisées), un cœur.
+
+    OPENBLAS_NUM_THREADS=1 python -m benchmarks.bench_vector_index [--vectors 1000000] [--dim 256]
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from app.services.vector_index import VectorIndex
+
+
+def _batch(
+    rng: np.random.Generator, centers: np.ndarray, n: int, noise: float
+) -> np.ndarray:
+    x = centers[rng.integers(0, len(centers), n)] + noise * rng.normal(
+        size=(n, centers.shape[1])
+    )
+    out: np.ndarray = x / np.linalg.norm(x, axis=1, keepdims=True)
+    return out.astype(np.float16)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vectors", type=int, default=1_000_000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[8, 16, 32])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(2000, args.dim)) / np.sqrt(args.dim)
+    noise = 1.0 / np.sqrt(args.dim)
+    batch = 100_000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = VectorIndex(tmp, args.dim, delta_min=10**12)
+        data = np.empty((args.vectors, args.dim), dtype=np.float16)
+        t0 = time.perf_counter()
+        for start in range(0, args.vectors, batch):
+            n = min(batch, args.vectors - start)
+            data[start : start + n] = _batch(rng, centers, n, noise)
+            index.add(np.arange(start, start + n), data[start : start + n])
+        t_add = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        index.compact()
+        t_compact = time.perf_counter() - t0
+        print(f"{index.stats()}  add {t_add:.1f}s, compact {t_compact:.1f}s")
+
+        # index rouvert depuis le disque (segment mappé)
+        index = VectorIndex(tmp, args.dim)
+        queries = _batch(rng, centers, args.queries, noise).astype(np.float32)
+        exact = []
+        for q in queries:
+            scores = np.empty(args.vectors, dtype=np.float32)
+            for start in range(0, args.vectors, batch):
+                scores[start : start + batch] = (
+                    data[start : start + batch].astype(np.float32) @ q
+                )
+            exact.append(set(np.argpartition(-scores, 10)[:10].tolist()))
+
+        for nprobe in args.nprobe:
+            timings, recall = [], []
+            for q, truth in zip(queries, exact):
+                t0 = time.perf_counter()
+                ids, _ = index.search(q, k=10, nprobe=nprobe)
+                timings.append((time.perf_counter() - t0) * 1000)
+                recall.append(len(truth & set(ids.tolist())) / 10)
+            timings.sort()
+            print(
+                f"nprobe={nprobe:3d}: p50 {statistics.median(timings):.1f} ms, "
+                f"p95 {timings[int(len(timings) * 0.95)]:.1f} ms, recall@10 {np.mean(recall):.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
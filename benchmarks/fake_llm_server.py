@@ -0,0 +1,135 @@
+"""
+Faux serveur compatible OpenAI (chat completions) pour les benchmarks.
+
+Simule la latence d'un LLM : délai de prefill proportionnel aux tokens du
+prompt, puis un délai par token de sortie. Les clés JSON produites sont
+celles demandées par le prompt système ("- <clé>:"), avec une taille de
+sortie réaliste par section. Supporte `stream=True` (SSE).
+"""
+
+import asyncio
+import json
+import socket
+import threading
+import time
+from typing import Any, AsyncIterator, Dict
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+# Tokens de sortie typiques par section d'un compte-rendu
+SECTION_TOKENS = {
+    "executive_summary": 120,
+    "objectives": 60,
+    "topics": 300,
+    "decisions": 90,
+    "actions": 160,
+    "outcomes": 70,
+    "next_steps": 70,
+}
+
+_WORDS = "budget planning livraison client risque équipe décision priorité".split()
+
+
+def _value(key: str, tokens: int) -> Any:
+    words = [_WORDS[i % len(_WORDS)] for i in range(tokens)]
+    if key == "executive_summary":
+        return " ".join(words)
+    if key == "topics":
+        per = 30
+        return [
+            {"title": f"Sujet {i + 1}", "description": " ".join(words[i : i + per])}
+            for i in range(0, tokens, per)
+        ]
+    if key == "actions":
+        per = 20
+        return [
+            {"owner": None, "action": " ".join(words[i : i + per]), "due": None}
+            for i in range(0, tokens, per)
+        ]
+    per = 15
+    return [" ".join(words[i : i + per]) for i in range(0, tokens, per)]
+
+
+def create_app(decode_sec_per_token: float, prefill_sec_per_token: float) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request) -> Response:
+        body = await request.json()
+        system = body["messages"][0]["content"]
+        prompt_chars = sum(len(m["content"]) for m in body["messages"])
+        keys = [k for k in SECTION_TOKENS if f"- {k}:" in system]
+        out_tokens = sum(SECTION_TOKENS[k] for k in keys)
+        content = json.dumps(
+            {k: _value(k, SECTION_TOKENS[k]) for k in keys}, ensure_ascii=False
+        )
+        prefill = prompt_chars / 4 * prefill_sec_per_token
+        base: Dict[str, Any] = {
+            "id": "chatcmpl-fake",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+        }
+
+        if not body.get("stream"):
+            await asyncio.sleep(prefill + out_tokens * decode_sec_per_token)
+            return JSONResponse(
+                {
+                    **base,
+                    "object": "chat.completion",
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": content},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                    "usage": {
+                        "prompt_tokens": prompt_chars // 4,
+                        "completion_tokens": out_tokens,
+                        "total_tokens": prompt_chars // 4 + out_tokens,
+                    },
+                }
+            )
+
+        async def events() -> AsyncIterator[str]:
+            await asyncio.sleep(prefill)
+            step = max(1, len(content) // max(1, out_tokens))
+            for i in range(0, len(content), step):
+                await asyncio.sleep(decode_sec_per_token)
+                chunk = {
+                    **base,
+                    "object": "chat.completion.chunk",
+                    "choices": [
+                        {"index": 0, "delta": {"content": content[i : i + step]}}
+                    ],
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def start_fake_llm_server(
+    decode_sec_per_token: float = 0.005,
+    prefill_sec_per_token: float = 0.00005,
+) -> str:
+    """Démarre le serveur dans un thread ; renvoie la base_url OpenAI."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    config = uvicorn.Config(
+        create_app(decode_sec_per_token, prefill_sec_per_token),
+        host="127.0.0.1",
+        port=port,
+        log_level="warning",
+    )
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}/v1"
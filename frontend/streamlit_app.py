@@ -1,7 +1,11 @@
+import json
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
 import streamlit as st
 import requests
 
 API_URL = "http://localhost:8000"
+PDF_WAIT_SEC = 120
 
 st.set_page_config(
     page_title="Meeting Report Generator",
@@ -59,12 +63,24 @@ with col_left:
     )
 
 
-
 lang_to_send = language_hint.strip() if language_hint.strip() else "auto"
 
 tabs = st.tabs(["Transcription", "Meeting Report"])
 
 
+def transcript_key() -> List[Any]:
+    # Le transcript enregistré n'est réutilisable que pour le même fichier
+    # et les mêmes réglages de transcription
+    return [
+        audio_file.name,
+        audio_file.size,
+        lang_to_send,
+        diarization,
+        gap_threshold,
+        max_speakers,
+    ]
+
+
 with tabs[0]:
     st.subheader("Transcription")
 
@@ -80,7 +96,8 @@ with tabs[0]:
             if language_hint:
                 params["language_hint"] = language_hint
 
-            files = {
+            # même variable dans l'onglet Meeting Report, où elle peut valoir None
+            files: Optional[Dict[str, Tuple[Any, ...]]] = {
                 "file": (
                     audio_file.name,
                     audio_file.getvalue(),
@@ -109,6 +126,10 @@ with tabs[0]:
                     else:
                         data = res.json()
                         transcript = data["transcript"]
+                        st.session_state["transcript"] = {
+                            "key": transcript_key(),
+                            "id": data.get("transcript_id"),
+                        }
 
                         st.success(f"Detected language: {transcript.get('language', 'unknown')}")
                         st.markdown("#### Full text")
@@ -124,6 +145,121 @@ with tabs[0]:
                             )
 
 
+SECTIONS = [
+    ("executive_summary", "Summary"),
+    ("objectives", "Objectives"),
+    ("topics", "Topics"),
+    ("decisions", "Decisions"),
+    ("actions", "Action items"),
+    ("outcomes", "Outcomes"),
+    ("next_steps", "Next steps"),
+]
+
+
+def iter_sse(res: requests.Response) -> Iterator[Tuple[str, Any]]:
+    """Itère sur les événements Server-Sent Events (event, data) d'une réponse."""
+    event: Optional[str] = None
+    data_lines: List[str] = []
+    for line in res.iter_lines(decode_unicode=True):
+        if not line:
+            if event:
+                yield event, json.loads("\n".join(data_lines) or "{}")
+            event, data_lines = None, []
+        elif line.startswith("event:"):
+            event = line[len("event:") :].strip()
+        elif line.startswith("data:"):
+            data_lines.append(line[len("data:") :].strip())
+
+
+def render_section(name: str, value: Any) -> None:
+    title = dict(SECTIONS)[name]
+    st.markdown(f"#### {title}")
+
+    if name == "executive_summary":
+        st.write(value)
+    elif name == "objectives":
+        if value:
+            for i, obj in enumerate(value, start=1):
+                st.markdown(f"{i}. {obj}")
+        else:
+            st.write("No objectives extracted.")
+    elif name == "topics":
+        if value:
+            for t in value:
+                title = t.get("title", "")
+                desc = t.get("description", "")
+                st.markdown(f"**{title}**")
+                if desc:
+                    st.write(desc)
+        else:
+            st.write("No topics extracted.")
+    elif name == "actions":
+        if value:
+            for a in value:
+                owner = a.get("owner") or "-"
+                action_txt = a.get("action") or ""
+                due = a.get("due") or "-"
+                st.markdown(f"- **{owner}**: {action_txt} _(deadline: {due})_")
+        else:
+            st.write("No action items extracted.")
+    else:
+        if value:
+            for item in value:
+                st.markdown(f"- {item}")
+        else:
+            st.write(f"No {title.lower()} extracted.")
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def fetch_export(url: str, timeout: float) -> bytes:
+    # Un export ne change plus une fois rendu : une URL = un contenu, pas de
+    # nouveau téléchargement à chaque rerun. Les erreurs ne sont pas mises en cache.
+    res = requests.get(url, timeout=timeout)
+    res.raise_for_status()
+    content: bytes = res.content
+    return content
+
+
+def render_downloads(result: Dict[str, Any]) -> None:
+    # Fichiers exportés (Markdown / PDF)
+    st.markdown("#### Download exports")
+    exports = result.get("exports", {})
+
+    md_url_rel = exports.get("markdown_url")
+    pdf_url_rel = exports.get("pdf_url")
+
+    if md_url_rel:
+        md_url = f"{API_URL}{md_url_rel}"
+        try:
+            st.download_button(
+                "Download Markdown",
+                fetch_export(md_url, 60),
+                file_name="meeting-notes.md",
+                mime="text/markdown",
+            )
+        except requests.HTTPError:
+            st.warning("Could not fetch Markdown file from backend.")
+        except requests.RequestException as e:
+            st.error(f"Error when downloading Markdown: {e}")
+
+    if pdf_url_rel:
+        pdf_url = f"{API_URL}{pdf_url_rel}"
+        try:
+            # Le PDF est rendu par le backend au premier téléchargement
+            with st.spinner("Rendering PDF..."):
+                pdf_content = fetch_export(pdf_url, PDF_WAIT_SEC)
+            st.download_button(
+                "Download PDF",
+                pdf_content,
+                file_name="meeting-report.pdf",
+                mime="application/pdf",
+            )
+        except requests.HTTPError:
+            st.warning("Could not fetch PDF file from backend.")
+        except requests.RequestException as e:
+            st.error(f"Error when downloading PDF: {e}")
+
+
 with tabs[1]:
     st.subheader("Meeting report")
 
@@ -131,140 +267,71 @@ with tabs[1]:
         if not audio_file:
             st.warning("Please upload an audio file first.")
         else:
-            files = {
-                "file": (
-                    audio_file.name,
-                    audio_file.getvalue(),
-                    audio_file.type or "audio/mpeg",
-                )
-            }
             data = {
                 "language_hint": lang_to_send,
                 "diarization": diarization,
                 "gap_threshold": str(gap_threshold),
                 "export_pdf": str(export_pdf).lower(),
             }
+            stored = st.session_state.get("transcript")
+            if stored and stored["id"] and stored["key"] == transcript_key():
+                # Transcript déjà produit par l'onglet Transcription : pas de
+                # nouvel envoi de l'audio ni de nouvelle transcription
+                files = None
+                data["transcript_id"] = stored["id"]
+                st.caption("Using the transcript from the Transcription tab.")
+            else:
+                files = {
+                    "file": (
+                        audio_file.name,
+                        audio_file.getvalue(),
+                        audio_file.type or "audio/mpeg",
+                    )
+                }
+
+            status = st.empty()
+            language_box = st.empty()
+            # Emplacements dans l'ordre du rapport : chaque section s'affiche
+            # dès qu'elle arrive dans le flux SSE
+            placeholders = {name: st.empty() for name, _ in SECTIONS}
+            result = None
 
             with st.spinner("Generating meeting report..."):
                 try:
-                    res = requests.post(
-                        f"{API_URL}/reports/notes",
+                    with requests.post(
+                        f"{API_URL}/reports/notes/stream",
                         files=files,
                         data=data,
                         timeout=3600,
-                    )
+                        stream=True,
+                    ) as res:
+                        if not res.ok:
+                            try:
+                                st.error(res.json().get("detail"))
+                            except Exception:
+                                st.error(f"HTTP {res.status_code}")
+                        else:
+                            for event, payload in iter_sse(res):
+                                if (
+                                    event == "section"
+                                    and payload.get("name") in placeholders
+                                ):
+                                    with placeholders[payload["name"]].container():
+                                        render_section(
+                                            payload["name"], payload.get("value")
+                                        )
+                                elif event == "report":
+                                    result = payload
+                                elif event == "error":
+                                    st.error(payload.get("detail"))
                 except requests.Timeout:
                     st.error("Timeout: the backend took too long to respond.")
                 except requests.RequestException as e:
                     st.error(f"Network error: {e}")
-                else:
-                    if not res.ok:
-                        try:
-                            st.error(res.json().get("detail"))
-                        except Exception:
-                            st.error(f"HTTP {res.status_code}")
-                    else:
-                        result = res.json()
-
-                        st.success("Report generated successfully.")
-
-                        st.markdown("#### Language")
-                        st.write(result.get("language"))
-
-                        st.markdown("#### Summary")
-                        summary = result.get("summary", {})
-                        st.write(summary.get("executive_summary"))
-
-                        st.markdown("#### Objectives")
-                        objectives = summary.get("objectives", [])
-                        if objectives:
-                            for i, obj in enumerate(objectives, start=1):
-                                st.markdown(f"{i}. {obj}")
-                        else:
-                            st.write("No objectives extracted.")
-
-                        st.markdown("#### Topics")
-                        topics = summary.get("topics", [])
-                        if topics:
-                            for t in topics:
-                                title = t.get("title", "")
-                                desc = t.get("description", "")
-                                st.markdown(f"**{title}**")
-                                if desc:
-                                    st.write(desc)
-                        else:
-                            st.write("No topics extracted.")
 
-                        st.markdown("#### Decisions")
-                        decisions = summary.get("decisions", [])
-                        if decisions:
-                            for d in decisions:
-                                st.markdown(f"- {d}")
-                        else:
-                            st.write("No decisions extracted.")
-
-                        st.markdown("#### Action items")
-                        actions = summary.get("actions", [])
-                        if actions:
-                            for a in actions:
-                                owner = a.get("owner") or "-"
-                                action_txt = a.get("action") or ""
-                                due = a.get("due") or "-"
-                                st.markdown(f"- **{owner}**: {action_txt} _(deadline: {due})_")
-                        else:
-                            st.write("No action items extracted.")
-
-                        st.markdown("#### Outcomes")
-                        outcomes = summary.get("outcomes", [])
-                        if outcomes:
-                            for o in outcomes:
-                                st.markdown(f"- {o}")
-                        else:
-                            st.write("No outcomes extracted.")
-
-                        st.markdown("#### Next steps")
-                        next_steps = summary.get("next_steps", [])
-                        if next_steps:
-                            for ns in next_steps:
-                                st.markdown(f"- {ns}")
-                        else:
-                            st.write("No next steps extracted.")
-
-                        # Fichiers exportés (Markdown / PDF)
-                        st.markdown("#### Download exports")
-                        exports = result.get("exports", {})
-
-                        md_url_rel = exports.get("markdown_url")
-                        pdf_url_rel = exports.get("pdf_url")
-
-                        if md_url_rel:
-                            md_url = f"{API_URL}{md_url_rel}"
-                            try:
-                                md_res = requests.get(md_url, timeout=60)
-                                if md_res.ok:
-                                    st.download_button(
-                                        "Download Markdown",
-                                        md_res.content,
-                                        file_name="meeting-notes.md",
-                                        mime="text/markdown",
-                                    )
-                                else:
-                                    st.warning("Could not fetch Markdown file from backend.")
-                            except requests.RequestException as e:
-                                st.error(f"Error when downloading Markdown: {e}")
-
-                        if pdf_url_rel:
-                            pdf_url = f"{API_URL}{pdf_url_rel}"
-                            try:
-                                pdf_res = requests.get(pdf_url, timeout=60)
-                                if pdf_res.ok:
-                                    st.download_button(
-                                        "Download PDF",
-                                        pdf_res.content,
-                                        file_name="meeting-report.pdf",
-                                        mime="application/pdf",
-                                    )
-                                else:
-                                    st.warning("Could not fetch PDF file from backend.")
-                            except requests.RequestException as e:
-                                st.error(f"Error when downloading PDF: {e}")
+            if result:
+                status.success("Report generated successfully.")
+                with language_box.container():
+                    st.markdown("#### Language")
+                    st.write(result.get("language"))
+                render_downloads(result)
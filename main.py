@@ -1,7 +1,6 @@
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 import os   
 
 from app.api.auth import router as auth_router
@@ -9,16 +8,37 @@ from app.api.health import router as health_router
 from app.core.config import settings
 from typing import AsyncGenerator
 from app.db.session import sessionmanager
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
+import asyncio
 import bcrypt
 from app.api.reports import router as reports_router
+from app.api.uploads import router as uploads_router
+from app.services.llm import close_client as close_llm_client
+from app.services.auth import password_pool
+from app.services.render_pool import pdf_pool
+from app.services.rate_limit import RateLimitMiddleware, rate_limiter
+from app.services.retention import retention
+from app.services.usage import usage_ledger
 
 if not hasattr(bcrypt, "__about__"):
     bcrypt.__about__ = type("about", (object,), {"__version__": bcrypt.__version__})
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
+    sweeper = (
+        asyncio.create_task(retention.run()) if settings.RETENTION_ENABLED else None
+    )
+    ledger = asyncio.create_task(usage_ledger.run())
     yield
+    for task in (sweeper, ledger):
+        if task is not None:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+    await rate_limiter.store.close()
+    await close_llm_client()
+    pdf_pool.shutdown()
+    password_pool.shutdown()
     if sessionmanager._engine is not None:
         await sessionmanager.close()
 
@@ -29,16 +49,14 @@ app = FastAPI(
     openapi_url=f"{settings.API_PREFIX}/openapi.json",
     docs_url=f"{settings.API_PREFIX}/docs",
     redoc_url=f"{settings.API_PREFIX}/redoc",
+    lifespan=lifespan,
 )
 
-DATA_ROOT = os.getenv("DATA_ROOT", "/data/reports")
-os.makedirs(DATA_ROOT, exist_ok=True)   
+if settings.STORAGE_BACKEND == "local":
+    os.makedirs(settings.DATA_ROOT, exist_ok=True)
 
-app.mount(
-    "/reports/files",
-    StaticFiles(directory=DATA_ROOT),
-    name="reports_files",
-)
+# Limites et quotas des endpoints coûteux (avant CORS : les 429 portent les en-têtes CORS)
+app.add_middleware(RateLimitMiddleware)
 
 # CORS
 app.add_middleware(
@@ -52,6 +70,7 @@ app.add_middleware(
 app.include_router(health_router, tags=["system"])
 app.include_router(auth_router, prefix="/auth", tags=["authentication"])
 app.include_router(reports_router)
+app.include_router(uploads_router)
 
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
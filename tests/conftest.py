@@ -1,5 +1,18 @@
+import os
+import tempfile
 from typing import AsyncGenerator
 
+# Répertoires de données isolés pour la session de tests (avant import de l'app)
+_TEST_DATA_DIR = tempfile.mkdtemp(prefix="meeting-ai-tests-")
+os.environ.setdefault("DATA_ROOT", os.path.join(_TEST_DATA_DIR, "reports"))
+os.environ.setdefault("NOTES_CACHE_DIR", os.path.join(_TEST_DATA_DIR, "cache", "notes"))
+os.environ.setdefault(
+    "VECTOR_INDEX_DIR", os.path.join(_TEST_DATA_DIR, "index", "vectors")
+)
+os.environ.setdefault("RETENTION_ENABLED", "false")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")  # activé par test_rate_limit
+os.environ.setdefault("BCRYPT_ROUNDS", "4")  # coût minimal : hachage rapide en tests
+
 import pytest_asyncio
 from httpx import ASGITransport, AsyncClient
 
@@ -7,10 +20,16 @@ from app.core.config import settings
 from app.db.base import Base
 
 # Import all models here for autogenerate support
-from app.db.session import AsyncSession, DatabaseSessionManager, get_db
+from app.db.session import (
+    AsyncSession,
+    DatabaseSessionManager,
+    get_db,
+    get_session_factory,
+)
 
 # DONT REMOVE
 from app.models.user import APIToken, User
+from app.models.report import Report, StoredTranscript, UploadSession, UsageEvent
 from main import app
 
 TEST_DATABASE_URL = settings.TEST_DATABASE_URL
@@ -33,6 +52,7 @@ async def override_get_db() -> AsyncGenerator[AsyncSession, None]:
 
 # Inject override into app
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_session_factory] = lambda: test_db.session
 
 
 @pytest_asyncio.fixture
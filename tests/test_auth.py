@@ -6,9 +6,14 @@ import pytest_asyncio
 from fastapi import status
 from httpx import AsyncClient
 from sqlalchemy import select
+from passlib.context import CryptContext
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.security import create_access_token, get_password_hash
+from app.core.security import (
+    create_access_token,
+    get_password_hash,
+    make_pwd_context,
+)
 from app.models.user import APIToken, User
 
 
@@ -155,3 +160,55 @@ async def test_me_unauthorized(async_client: AsyncClient) -> None:
 async def test_api_me_unauthorized(async_client: AsyncClient) -> None:
     response = await async_client.get("auth/api-me")
     assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_principal_cache_skips_db_until_revoked(
+    async_client: AsyncClient, jwt_token: str, api_token: str
+) -> None:
+    from app.services.auth import principal_cache
+
+    principal_cache.clear()
+    for headers in ({"X-API-Token": api_token}, {"Authorization": jwt_token}):
+        url = "auth/api-me" if "X-API-Token" in headers else "auth/me"
+        first = await async_client.get(url, headers=headers)
+        hits = principal_cache.hits
+        second = await async_client.get(url, headers=headers)
+        assert principal_cache.hits == hits + 1
+        assert second.json() == first.json()
+
+    revoked = await async_client.delete(
+        "auth/api-token", headers={"X-API-Token": api_token}
+    )
+    assert revoked.status_code == 204
+    response = await async_client.get("auth/api-me", headers={"X-API-Token": api_token})
+    assert response.status_code == 401
+
+
+def test_only_weaker_hashes_are_outdated() -> None:
+    weak, strong = (
+        CryptContext(schemes=["bcrypt"], bcrypt__rounds=r).hash("pw") for r in (4, 6)
+    )
+    policy = make_pwd_context(5)
+    assert policy.verify_and_update("pw", weak)[1].startswith("$2b$05$")
+    assert policy.verify_and_update("pw", strong) == (True, None)
+
+
+@pytest.mark.asyncio
+async def test_login_keeps_stronger_hash(
+    async_client: AsyncClient, session: AsyncSession
+) -> None:
+    # les tests tournent à BCRYPT_ROUNDS=4 : un hash de coût 5 est plus fort
+    strong_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=5).hash("strong123")
+    session.add(User(username="strong", hashed_password=strong_hash))
+    await session.commit()
+
+    response = await async_client.post(
+        "auth/login", json={"username": "strong", "password": "strong123"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    session.expire_all()
+    user = (
+        await session.execute(select(User).where(User.username == "strong"))
+    ).scalar_one()
+    assert user.hashed_password == strong_hash
@@ -0,0 +1,56 @@
+from app.services.compaction import (
+    clean_text,
+    compact_segments,
+    compact_transcript,
+    count_tokens,
+)
+
+
+def test_clean_text_removes_fillers_and_loops() -> None:
+    assert clean_text("Euh, donc   on  commence, hum, le budget .") == (
+        "donc on commence, le budget."
+    )
+    assert clean_text("merci merci merci merci beaucoup") == "merci beaucoup"
+    # une répétition double est conservée (emphase)
+    assert clean_text("très très bien") == "très très bien"
+    # nombres et identifiants répétés : contenu réel, non replié
+    assert clean_text("appelez le 555 555 555") == "appelez le 555 555 555"
+    assert clean_text("ticket A12 A12 A12 ouvert") == "ticket A12 A12 A12 ouvert"
+
+
+def test_compact_segments_drops_duplicates_and_merges_turns() -> None:
+    segs = [
+        {"start": 0.0, "end": 2.0, "text": "Bonjour à tous.", "speaker": "SPEAKER_00"},
+        {
+            "start": 2.0,
+            "end": 4.0,
+            "text": "On parle du budget.",
+            "speaker": "SPEAKER_00",
+        },
+        {"start": 4.0, "end": 5.0, "text": "Merci.", "speaker": "SPEAKER_01"},
+        {"start": 5.0, "end": 6.0, "text": "Merci.", "speaker": "SPEAKER_01"},
+        {"start": 6.0, "end": 7.0, "text": "euh", "speaker": "SPEAKER_01"},
+    ]
+    out = compact_segments(segs)
+    assert [s["text"] for s in out] == ["Bonjour à tous. On parle du budget.", "Merci."]
+    assert out[0]["end"] == 4.0
+
+
+def test_compact_transcript_reports_token_counts() -> None:
+    segs = [
+        {
+            "start": i * 5.0,
+            "end": i * 5.0 + 4.0,
+            "text": f"euh, alors, hum, le planning planning planning du lot {i}",
+            "speaker": "SPEAKER_00" if i % 3 else "SPEAKER_01",
+        }
+        for i in range(40)
+    ]
+    raw = " ".join(str(s["text"]) for s in segs)
+    compact = compact_transcript(raw, segs)
+
+    assert compact.text.startswith("SPEAKERS: S1=SPEAKER_01, S2=SPEAKER_00")
+    assert "[00:00:00] S1: alors, le planning du lot 0" in compact.text
+    assert compact.tokens_before == count_tokens(raw)
+    assert compact.tokens_after < compact.tokens_before
+    assert 0.0 < compact.reduction < 1.0
@@ -1,5 +1,10 @@
+from typing import Any
+
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import text
+
+from app.db.session import DatabaseSessionManager
 
 
 @pytest.mark.asyncio
@@ -7,3 +12,44 @@ async def test_read_main(async_client: AsyncClient) -> None:
     response = await async_client.get("/health")
     assert response.status_code == 200
     assert response.json() == {"status": "healthy"}
+
+
+@pytest.mark.asyncio
+async def test_sqlite_profile_and_pool_metrics(
+    async_client: AsyncClient, tmp_path: Any
+) -> None:
+    manager = DatabaseSessionManager(
+        f"sqlite+aiosqlite:///{tmp_path / 'profile.db'}",
+        {"pool_size": 1, "max_overflow": 0},
+    )
+    try:
+        async with manager.session() as session:
+            assert (
+                await session.execute(text("PRAGMA journal_mode"))
+            ).scalar() == "wal"
+            assert (await session.execute(text("PRAGMA busy_timeout"))).scalar() == 5000
+            stats = manager.pool_stats()
+            assert stats["checked_out"] == 1 and stats["exhausted"] == 1
+    finally:
+        await manager.close()
+
+    response = await async_client.get("/health/db")
+    assert response.status_code == 200
+    assert response.json()["pool"] == "AsyncAdaptedQueuePool"
+
+
+@pytest.mark.asyncio
+async def test_notes_cache_stats(async_client: AsyncClient) -> None:
+    response = await async_client.get("/health/notes-cache")
+    assert response.status_code == 200
+    assert {"entries", "hits", "misses", "hit_ratio"} <= set(response.json())
+    # plus exposé sous /reports
+    assert (await async_client.get("/reports/notes/cache")).status_code != 200
+
+
+@pytest.mark.asyncio
+async def test_storage_stats(async_client: AsyncClient) -> None:
+    response = await async_client.get("/health/storage")
+    assert response.status_code == 200
+    assert "max_bytes" in response.json()
+    assert (await async_client.get("/reports/storage")).status_code != 200
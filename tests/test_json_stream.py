@@ -0,0 +1,26 @@
+import json
+
+from app.utils.json_stream import JSONObjectStreamParser
+
+
+def test_members_are_emitted_as_soon_as_complete() -> None:
+    doc = {
+        "executive_summary": 'Résumé avec "guillemets", {accolades} et [crochets]',
+        "topics": [{"title": "Budget", "start": "00:01:00"}],
+        "decisions": [],
+        "actions": [{"owner": None, "action": "Envoyer, le CR"}],
+    }
+    text = json.dumps(doc, ensure_ascii=False, indent=2)
+
+    parser = JSONObjectStreamParser()
+    seen = []
+    for i in range(0, len(text), 7):
+        for name, value in parser.feed(text[i : i + 7]):
+            seen.append(name)
+            assert value == doc[name]
+            # la section est livrée avant la fin du document
+            if name == "executive_summary":
+                assert i + 7 < len(text)
+
+    assert seen == list(doc)
+    assert parser.done
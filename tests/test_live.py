@@ -0,0 +1,189 @@
+import asyncio
+import io
+import threading
+import time
+import wave
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pytest
+from sqlalchemy.pool import NullPool
+from starlette.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from app.core.config import settings
+from app.db.session import DatabaseSessionManager, get_session_factory
+from app.models.notes import MeetingSummary
+from app.services.live import SilenceSegmenter
+from main import app
+
+RATE = 16000
+FRAME_SEC = 0.02
+
+
+def _tone(sec: float, amplitude: int = 8000) -> np.ndarray:
+    t = np.arange(int(sec * RATE)) / RATE
+    return (amplitude * np.sin(2 * np.pi * 220 * t)).astype("<i2")
+
+
+def _silence(sec: float) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    return rng.integers(-10, 10, int(sec * RATE)).astype("<i2")
+
+
+def _meeting(parts: List[Tuple[str, float]]) -> Tuple[bytes, List[float]]:
+    """PCM alternant parole/silence ; renvoie aussi la fin de chaque prise de parole."""
+    chunks, speech_ends, t = [], [], 0.0
+    for kind, sec in parts:
+        chunks.append(_tone(sec) if kind == "speech" else _silence(sec))
+        t += sec
+        if kind == "speech":
+            speech_ends.append(t)
+    return np.concatenate(chunks).tobytes(), speech_ends
+
+
+def _wav(pcm: bytes) -> bytes:
+    out = io.BytesIO()
+    with wave.open(out, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(RATE)
+        w.writeframes(pcm)
+    return out.getvalue()
+
+
+def test_segmenter_splits_on_silence() -> None:
+    pcm, _ = _meeting(
+        [
+            ("silence", 0.5),
+            ("speech", 0.6),
+            ("silence", 0.8),
+            ("speech", 0.6),
+            ("silence", 0.8),
+            ("speech", 0.06),
+            ("silence", 0.8),
+        ]  # bruit bref : ignoré
+    )
+    segmenter = SilenceSegmenter(RATE, silence_ms=600, min_speech_ms=250)
+    step = int(RATE * FRAME_SEC) * 2
+    windows = []
+    for i in range(0, len(pcm), step):
+        windows.extend(segmenter.feed(pcm[i : i + step]))
+    assert segmenter.flush() is None
+
+    assert len(windows) == 2
+    # début = première trame de parole moins la marge avant la parole
+    assert windows[0].start == pytest.approx(0.5 - 0.21, abs=0.031)
+    assert windows[1].start == pytest.approx(1.9 - 0.21, abs=0.031)
+    assert 0.6 + 0.6 <= windows[0].duration <= 0.6 + 0.6 + 0.21 + 0.03
+
+
+def _override_session_factory(monkeypatch: pytest.MonkeyPatch) -> None:
+    # la boucle d'événements du TestClient n'est pas celle des autres tests
+    db = DatabaseSessionManager(settings.TEST_DATABASE_URL, {"poolclass": NullPool})
+
+    def session_factory() -> Any:
+        return db.session
+
+    dependency: Callable[..., Any] = get_session_factory
+    monkeypatch.setitem(app.dependency_overrides, dependency, session_factory)
+
+
+def test_live_websocket_rejects_malformed_control_messages(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    _override_session_factory(monkeypatch)
+    client = TestClient(app)
+    with client.websocket_connect(f"/reports/live?sample_rate={RATE}") as ws:
+        ws.send_text("not json")
+        assert ws.receive_json()["type"] == "error"
+        ws.send_json(["stop"])
+        assert ws.receive_json()["type"] == "error"
+        # la connexion reste utilisable
+        ws.send_json({"type": "stop"})
+        assert ws.receive_json() == {"type": "error", "detail": "No speech detected."}
+
+
+def test_live_websocket_replays_wav_in_real_time(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    windows: List[float] = []
+
+    async def fake_transcribe(
+        content: bytes, filename: str, language: Optional[str]
+    ) -> Tuple[str, List[Dict[str, Any]], str]:
+        with wave.open(io.BytesIO(content)) as w:
+            windows.append(w.getnframes() / w.getframerate())
+        await asyncio.sleep(0.1)
+        # réponse sans timestamps, comme gpt-4o-mini-transcribe
+        return (
+            f"phrase {len(windows)}",
+            [{"start": 0.0, "end": 0.0, "text": f"phrase {len(windows)}"}],
+            "fr",
+        )
+
+    async def fake_notes(*args: Any, **kwargs: Any) -> MeetingSummary:
+        return MeetingSummary(executive_summary="Réunion en direct")
+
+    monkeypatch.setattr("app.services.live.transcribe_audio", fake_transcribe)
+    monkeypatch.setattr("app.api.reports.generate_structured_notes", fake_notes)
+    _override_session_factory(monkeypatch)
+
+    pcm, speech_ends = _meeting(
+        [
+            ("silence", 0.4),
+            ("speech", 0.5),
+            ("silence", 0.9),
+            ("speech", 0.5),
+            ("silence", 0.9),
+        ]
+    )
+    with wave.open(io.BytesIO(_wav(pcm))) as w:
+        frames_per_message = int(w.getframerate() * FRAME_SEC)
+        replay = []
+        while chunk := w.readframes(frames_per_message):
+            replay.append(chunk)
+
+    received: List[Tuple[float, Dict[str, Any]]] = []
+    client = TestClient(app)
+    with client.websocket_connect(
+        f"/reports/live?sample_rate={RATE}&language_hint=fr"
+    ) as ws:
+
+        def read() -> None:
+            try:
+                while True:
+                    message = ws.receive_json()
+                    received.append((time.monotonic(), message))
+            except WebSocketDisconnect:
+                pass
+
+        reader = threading.Thread(target=read)
+        reader.start()
+        t0 = time.monotonic()
+        for i, chunk in enumerate(replay):  # temps réel
+            time.sleep(max(0.0, t0 + i * FRAME_SEC - time.monotonic()))
+            ws.send_bytes(chunk)
+        ws.send_json({"type": "stop"})
+        reader.join(timeout=10)
+
+    kinds = [msg["type"] for _, msg in received]
+    assert kinds == ["segment", "segment", "transcript", "report"]
+    segments = [msg["segment"] for _, msg in received[:2]]
+    assert [s["text"] for s in segments] == ["phrase 1", "phrase 2"]
+    # timestamps relatifs au début du flux (fenêtre entière, faute de timestamps ASR)
+    assert segments[0]["start"] == pytest.approx(0.4 - 0.21, abs=0.031)
+    assert segments[1]["start"] == pytest.approx(1.8 - 0.21, abs=0.031)
+    assert segments[0]["end"] == pytest.approx(
+        segments[0]["start"] + windows[0], abs=0.001
+    )
+    # chaque segment arrive pendant la réunion, peu après la fin de la prise de parole
+    for (at, _), speech_end in zip(received, speech_ends):
+        assert at - (t0 + speech_end) < settings.LIVE_SILENCE_MS / 1000 + 0.6
+
+    transcript = received[2][1]
+    assert transcript["transcript_id"]
+    assert transcript["transcript"]["text"] == "phrase 1 phrase 2"
+    report = received[3][1]["report"]
+    assert report["summary"]["executive_summary"] == "Réunion en direct"
+    assert report["exports"]["srt_url"] is not None
@@ -0,0 +1,304 @@
+import asyncio
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List
+
+import pytest
+
+from app.services import llm, notes
+from app.services.compaction import count_tokens
+from app.services.notes_cache import NotesCache
+
+
+@pytest.fixture(autouse=True)
+def fresh_notes_cache(tmp_path: Any, monkeypatch: pytest.MonkeyPatch) -> NotesCache:
+    cache = NotesCache(str(tmp_path / "notes-cache"), max_bytes=10_000)
+    monkeypatch.setattr(notes, "notes_cache", cache)
+    return cache
+
+
+def _segments(n: int, words: int = 40) -> List[Dict[str, Any]]:
+    return [
+        {
+            "start": i * 10.0,
+            "end": i * 10.0 + 9.5,
+            "text": " ".join(f"mot{i}x{j}" for j in range(words)),
+            "speaker": f"SPEAKER_0{i % 2}",
+        }
+        for i in range(n)
+    ]
+
+
+def test_split_transcript_sections_respects_budget() -> None:
+    segs = _segments(50)
+    sections = notes.split_transcript_sections("", segs, max_tokens=500)
+
+    assert len(sections) > 1
+    assert sections[0]["start"] == "00:00:00"
+    assert sections[-1]["end"] == "00:08:19"
+    # aucun segment n'est coupé ni perdu
+    joined = "\n".join(s["text"] for s in sections)
+    assert joined.count("[") == 50
+    for s in sections:
+        assert count_tokens(s["text"]) <= 500
+
+
+def test_split_plain_text_has_no_timestamps() -> None:
+    sections = notes.split_transcript_sections("Bonjour. On commence ? Oui.")
+    assert len(sections) == 1
+    assert sections[0]["start"] is None
+    assert "[" not in sections[0]["text"]
+
+
+@pytest.mark.asyncio
+async def test_generate_structured_notes_map_reduce(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    calls: List[str] = []
+
+    async def fake_chat_json(system_prompt: str, user_prompt: str) -> Dict[str, Any]:
+        if system_prompt == notes._REDUCE_PROMPT:
+            calls.append("reduce")
+            return {
+                "executive_summary": "merged",
+                "topics": [{"title": "t", "start": "00:00:00"}],
+                "decisions": ["d"],
+            }
+        calls.append("map")
+        return {"executive_summary": "partial", "decisions": ["d"]}
+
+    monkeypatch.setattr(notes, "_chat_json", fake_chat_json)
+    monkeypatch.setattr(notes.settings, "NOTES_MAP_REDUCE_MIN_TOKENS", 1000)
+    monkeypatch.setattr(notes.settings, "NOTES_SECTION_MAX_TOKENS", 800)
+
+    segs = _segments(60)
+    text = " ".join(s["text"] for s in segs)
+    summary = await notes.generate_structured_notes(text, "fr", segments=segs)
+
+    assert summary.executive_summary == "merged"
+    assert summary.topics[0].start == "00:00:00"
+    assert calls.count("reduce") == 1
+    assert calls.count("map") > 1
+
+
+@pytest.mark.asyncio
+async def test_edit_only_recomputes_affected_sections(
+    monkeypatch: pytest.MonkeyPatch, fresh_notes_cache: NotesCache
+) -> None:
+    calls: List[str] = []
+
+    async def fake_chat_json(system_prompt: str, user_prompt: str) -> Dict[str, Any]:
+        calls.append("reduce" if system_prompt == notes._REDUCE_PROMPT else "map")
+        return {"executive_summary": "ok", "decisions": ["d"]}
+
+    monkeypatch.setattr(notes, "_chat_json", fake_chat_json)
+    monkeypatch.setattr(notes.settings, "NOTES_MAP_REDUCE_MIN_TOKENS", 1000)
+    monkeypatch.setattr(notes.settings, "NOTES_SECTION_MAX_TOKENS", 800)
+    monkeypatch.setattr(fresh_notes_cache, "max_bytes", 1_000_000)
+
+    segs = _segments(120)
+    await notes.generate_structured_notes("", "fr", segments=segs)
+    first_maps = calls.count("map")
+
+    edited = [dict(s) for s in segs]
+    edited[60]["text"] = "correction " + edited[60]["text"]
+    before = notes.split_transcript_sections("", segs, max_tokens=800)
+    after = notes.split_transcript_sections("", edited, max_tokens=800)
+    changed = {s["text"] for s in after} - {s["text"] for s in before}
+
+    calls.clear()
+    await notes.generate_structured_notes("", "fr", segments=edited)
+    assert calls.count("reduce") == 1
+    assert calls.count("map") == len(changed)
+    assert len(changed) <= 2 < first_maps
+
+
+@pytest.mark.asyncio
+async def test_llm_calls_respect_global_concurrency(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    running = 0
+    peak = 0
+
+    async def slow_call() -> None:
+        nonlocal running, peak
+        async with llm.llm_slot():
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    monkeypatch.setattr(llm.settings, "LLM_MAX_CONCURRENCY", 2)
+    monkeypatch.setattr(llm, "_semaphores", llm.weakref.WeakKeyDictionary())
+    await asyncio.gather(*(slow_call() for _ in range(6)))
+    assert peak == 2
+
+
+class _FakeStream:
+    def __init__(self, fragments: List[str], delays: List[float]) -> None:
+        self._items = list(zip(fragments, delays))
+        self.closed = False
+
+    async def __anext__(self) -> Any:
+        if not self._items:
+            raise StopAsyncIteration
+        fragment, delay = self._items.pop(0)
+        await asyncio.sleep(delay)
+        delta = SimpleNamespace(content=fragment)
+        return SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+def _stream_client(stream: _FakeStream) -> Any:
+    async def create(**kwargs: Any) -> _FakeStream:
+        return stream
+
+    return SimpleNamespace(
+        chat=SimpleNamespace(completions=SimpleNamespace(create=create))
+    )
+
+
+@pytest.mark.asyncio
+async def test_stream_timeout_excludes_consumer_time(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(llm.settings, "LLM_TIMEOUT_SEC", 0.2)
+    monkeypatch.setattr(llm.settings, "LLM_MAX_CONCURRENCY", 1)
+    monkeypatch.setattr(llm, "_semaphores", llm.weakref.WeakKeyDictionary())
+    stream = _FakeStream(['{"a"', ": 1}"], [0.01, 0.01])
+    monkeypatch.setattr(llm, "get_async_client", lambda: _stream_client(stream))
+    fragments = []
+    async for fragment in llm.stream_chat_json("system", "user"):
+        # consommateur lent : ni timeout, ni place de concurrence retenue
+        assert not llm._semaphore().locked()
+        await asyncio.sleep(0.3)
+        fragments.append(fragment)
+    assert "".join(fragments) == '{"a": 1}' and stream.closed
+
+    slow = _FakeStream(['{"a"', ": 1}"], [0.01, 0.5])
+    monkeypatch.setattr(llm, "get_async_client", lambda: _stream_client(slow))
+    with pytest.raises(llm.LLMTimeoutError):
+        async for _ in llm.stream_chat_json("system", "user"):
+            pass
+    assert slow.closed
+
+
+@pytest.mark.asyncio
+async def test_generate_structured_notes_is_cached(
+    monkeypatch: pytest.MonkeyPatch, fresh_notes_cache: NotesCache
+) -> None:
+    calls = 0
+
+    async def fake_chat_json(system_prompt: str, user_prompt: str) -> Dict[str, Any]:
+        nonlocal calls
+        calls += 1
+        return {"executive_summary": "ok"}
+
+    monkeypatch.setattr(notes, "_chat_json", fake_chat_json)
+
+    first = await notes.generate_structured_notes("Bonjour   à tous.\n", "fr")
+    second = await notes.generate_structured_notes("Bonjour à tous.", "fr")
+    assert first == second
+    assert calls == 1
+
+    monkeypatch.setattr(notes, "PROMPT_VERSION", "changed")
+    await notes.generate_structured_notes("Bonjour à tous.", "fr")
+    assert calls == 2
+
+    stats = fresh_notes_cache.stats()
+    assert stats["hits"] == 1
+    assert stats["hit_ratio"] == pytest.approx(1 / 3)
+    assert stats["bytes_stored"] > 0
+
+
+def test_notes_cache_evicts_least_recently_used(tmp_path: Any) -> None:
+    cache = NotesCache(str(tmp_path), max_bytes=250)
+    for key in ("a", "b", "c"):
+        cache.put(key, {"payload": key * 80})
+    cache.get("b")
+    cache.put("d", {"payload": "d" * 80})
+
+    assert cache.get("a") is None
+    assert cache.get("b") is not None
+    assert cache.stats()["bytes_stored"] <= 250
+
+    # l'index est reconstruit depuis le disque
+    reopened = NotesCache(str(tmp_path), max_bytes=250)
+    assert reopened.stats()["entries"] == cache.stats()["entries"]
+
+
+@pytest.mark.asyncio
+async def test_sections_strategy_runs_extractions_concurrently(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    running = 0
+    peak = 0
+
+    async def fake_chat_json(system_prompt: str, user_prompt: str) -> Dict[str, Any]:
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        if "- topics:" in system_prompt:
+            # une clé hors du groupe ne doit pas écraser les autres extractions
+            return {"topics": [{"title": "Budget"}], "decisions": ["ignored"]}
+        if "- decisions:" in system_prompt:
+            return {"decisions": ["Budget validé"]}
+        if "- executive_summary:" in system_prompt:
+            return {"executive_summary": "Point budget", "objectives": ["Valider"]}
+        return {}
+
+    monkeypatch.setattr(notes, "_chat_json", fake_chat_json)
+    summary = await notes.generate_structured_notes(
+        "On valide le budget.", "fr", strategy="sections"
+    )
+
+    assert peak == len(notes._SECTION_GROUPS)
+    assert summary.executive_summary == "Point budget"
+    assert summary.topics[0].title == "Budget"
+    assert summary.decisions == ["Budget validé"]
+
+
+def test_lazy_flowables_behaves_like_a_list() -> None:
+    expected: List[Any] = list(range(100))
+    lazy = notes._LazyFlowables([0, 1], iter(range(2, 100)))
+    # consommation par la tête comme reportlab
+    assert lazy[0] == expected[0]
+    del lazy[0], expected[0]
+    lazy[0:0] = ["a", "b"]
+    expected[0:0] = ["a", "b"]
+    # accès quelconques : tranches au milieu, ouvertes, négatives, pas != 1
+    lazy[3:5] = ["x"]
+    expected[3:5] = ["x"]
+    del lazy[10:12]
+    del expected[10:12]
+    lazy[-1] = "last"
+    expected[-1] = "last"
+    lazy[::10] = ["s"] * len(expected[::10])
+    expected[::10] = ["s"] * len(expected[::10])
+    del lazy[-3:]
+    del expected[-3:]
+    assert lazy[5:] == expected[5:]
+    assert len(lazy) == len(expected)
+    assert [lazy[i] for i in range(len(expected))] == expected
+
+
+def test_lazy_flowables_len_counts_unproduced_items() -> None:
+    produced: List[int] = []
+
+    def tail() -> Iterator[int]:
+        for i in range(2, 100):
+            produced.append(i)
+            yield i
+
+    lazy = notes._LazyFlowables([0, 1], tail(), tail_count=98)
+    assert len(lazy) == 100 and not produced
+    del lazy[0]
+    lazy[0:0] = ["a", "b"]
+    assert lazy[3] == 2 and len(produced) == 1
+    assert len(lazy) == 101
+    while len(lazy):
+        del lazy[0]
+    assert len(produced) == 98
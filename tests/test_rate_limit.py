@@ -0,0 +1,221 @@
+import hashlib
+from types import SimpleNamespace
+from typing import Any, List, Optional
+
+import numpy as np
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from app.core.security import create_access_token
+from app.models.notes import MeetingSummary
+from app.models.report import UsageEvent
+from app.models.user import User
+from app.services import rate_limit
+from app.services.rate_limit import MemoryRateLimitStore, RateLimiter, request_principal
+from app.services.embeddings import OpenAIEmbedding
+from app.services.usage import (
+    UsageLedger,
+    metered,
+    record_audio_seconds,
+    record_llm_tokens,
+)
+from main import app
+from tests.conftest import test_db
+
+
+@pytest.fixture
+def limits(monkeypatch: pytest.MonkeyPatch) -> UsageLedger:
+    monkeypatch.setattr("app.services.rate_limit.settings.RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(rate_limit, "rate_limiter", RateLimiter(MemoryRateLimitStore()))
+    ledger = UsageLedger(session_factory=test_db.session)
+    monkeypatch.setattr(rate_limit, "usage_ledger", ledger)
+    return ledger
+
+
+@pytest.mark.asyncio
+async def test_burst_rejected_before_body_is_read(
+    async_client: AsyncClient, monkeypatch: pytest.MonkeyPatch, limits: UsageLedger
+) -> None:
+    monkeypatch.setattr("app.services.rate_limit.settings.RATE_LIMIT_BURST", 2)
+    monkeypatch.setattr(
+        "app.services.rate_limit.settings.RATE_LIMIT_REQUESTS_PER_MINUTE", 1.0
+    )
+    resolved: List[Any] = []
+
+    async def fake_resolve(*args: Any, **kwargs: Any) -> Any:
+        resolved.append(args)
+        return "Bonjour.", None, "fr"
+
+    async def fake_notes(*args: Any, **kwargs: Any) -> MeetingSummary:
+        return MeetingSummary(executive_summary="Point budget")
+
+    monkeypatch.setattr("app.api.reports._resolve_transcript", fake_resolve)
+    monkeypatch.setattr("app.api.reports.generate_structured_notes", fake_notes)
+
+    statuses = []
+    for _ in range(3):
+        response = await async_client.post(
+            "/reports/notes", files={"file": ("meeting.wav", b"\0" * 4096, "audio/wav")}
+        )
+        statuses.append(response.status_code)
+    assert statuses == [200, 200, 429]
+    assert response.headers["retry-after"] == "60"
+    assert len(resolved) == 2  # la requête refusée n'a pas été décodée
+    # une autre route n'est pas limitée
+    assert (await async_client.get("/health")).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_llm_quota_debited_and_ledger_written_in_batch(
+    async_client: AsyncClient,
+    session: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+    limits: UsageLedger,
+) -> None:
+    monkeypatch.setattr(
+        "app.services.rate_limit.settings.QUOTA_LLM_TOKENS_PER_HOUR", 1000
+    )
+    user = User(username="quota-user", hashed_password="x")
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+    headers = {"Authorization": f"Bearer {create_access_token(user.username, str(user.id))}"}
+
+    async def fake_notes(*args: Any, **kwargs: Any) -> MeetingSummary:
+        record_llm_tokens(1200)
+        return MeetingSummary(executive_summary="Point budget")
+
+    monkeypatch.setattr("app.api.reports.generate_structured_notes", fake_notes)
+
+    first = await async_client.post(
+        "/reports/notes", data={"transcript": "Bonjour."}, headers=headers
+    )
+    assert first.status_code == 200
+    # quota dépassé par la première requête : la suivante est refusée
+    second = await async_client.post(
+        "/reports/notes", data={"transcript": "Bonjour."}, headers=headers
+    )
+    assert second.status_code == 429
+    # les autres appelants ne sont pas concernés
+    anonymous = await async_client.post(
+        "/reports/notes", data={"transcript": "Bonjour."}
+    )
+    assert anonymous.status_code == 200
+
+    assert limits.stats()["pending"] == 2
+    assert await limits.flush() == 2
+    rows = (
+        (
+            await session.execute(
+                select(UsageEvent).where(UsageEvent.principal == f"user:{user.id}")
+            )
+        )
+        .scalars()
+        .all()
+    )
+    assert [(r.owner_id, r.endpoint, r.status_code, r.llm_tokens) for r in rows] == [
+        (user.id, "/reports/notes", 200, 1200)
+    ]
+
+
+def test_websocket_token_in_query_string_identifies_user() -> None:
+    token = create_access_token("ws-user", "42")
+    scope = {
+        "type": "websocket",
+        "headers": [],
+        "query_string": f"token={token}".encode(),
+    }
+    assert request_principal(scope) == ("user:42", 42)
+    scope["query_string"] = b"token=invalid"
+    scope["client"] = ("10.0.0.1", 1234)
+    assert request_principal(scope) == ("ip:10.0.0.1", None)
+
+
+def test_api_token_header_identifies_client_without_storing_it() -> None:
+    scope = {
+        "type": "http",
+        "headers": [(b"x-api-token", b"secret-api-token")],
+        "query_string": b"",
+        "client": ("10.0.0.1", 1234),
+    }
+    principal, owner_id = request_principal(scope)
+    assert principal == f"token:{hashlib.sha256(b'secret-api-token').hexdigest()}"
+    assert owner_id is None
+    scope["headers"] = [(b"x-api-token", b"other-api-token")]
+    assert request_principal(scope)[0] != principal
+
+
+@pytest.mark.asyncio
+async def test_upload_part_puts_limited_in_their_own_bucket(
+    async_client: AsyncClient, monkeypatch: pytest.MonkeyPatch, limits: UsageLedger
+) -> None:
+    monkeypatch.setattr(
+        "app.services.rate_limit.settings.RATE_LIMIT_UPLOAD_PARTS_PER_MINUTE", 2.0
+    )
+    statuses = []
+    for n in range(1, 4):
+        response = await async_client.put(
+            f"/reports/uploads/unknown/parts/{n}", content=b"\0" * 16
+        )
+        statuses.append(response.status_code)
+    assert statuses == [404, 404, 429]
+    assert response.headers["retry-after"] == "30"
+    assert limits.stats()["pending"] == 0  # pas d'entrée au journal par partie
+    # le seau des requêtes coûteuses n'a pas été entamé
+    notes = await async_client.post("/reports/notes", data={"transcript": ""})
+    assert notes.status_code != 429
+
+
+def test_live_websocket_charged_per_window_and_rejected_before_accept(
+    monkeypatch: pytest.MonkeyPatch, limits: UsageLedger
+) -> None:
+    monkeypatch.setattr(
+        "app.services.rate_limit.settings.QUOTA_AUDIO_SECONDS_PER_HOUR", 60.0
+    )
+
+    async def fake_transcribe(
+        content: bytes, filename: str, language: Optional[str]
+    ) -> Any:
+        record_audio_seconds(90.0)
+        return "Bonjour.", [{"start": 0.0, "end": 0.0, "text": "Bonjour."}], "fr"
+
+    monkeypatch.setattr("app.services.live.transcribe_audio", fake_transcribe)
+    rate = 16000
+    t = np.arange(int(0.6 * rate)) / rate
+    speech = (8000 * np.sin(2 * np.pi * 220 * t)).astype("<i2").tobytes()
+    silence = np.zeros(int(0.9 * rate), dtype="<i2").tobytes()
+
+    client = TestClient(app)
+    with client.websocket_connect(f"/reports/live?sample_rate={rate}") as ws:
+        ws.send_bytes(speech + silence)
+        assert ws.receive_json()["type"] == "segment"
+        # réunion en cours : le quota est déjà débité de la première fenêtre
+        with pytest.raises(WebSocketDisconnect) as refused:
+            with client.websocket_connect(f"/reports/live?sample_rate={rate}"):
+                pass
+        assert refused.value.code == 1008
+
+    assert [
+        (e["endpoint"], e["status_code"], e["audio_seconds"]) for e in limits._pending
+    ] == [("/reports/live", 101, 90.0)]
+
+
+@pytest.mark.asyncio
+async def test_embedding_tokens_are_metered(monkeypatch: pytest.MonkeyPatch) -> None:
+    async def create(model: str, input: List[str], dimensions: int) -> Any:
+        return SimpleNamespace(
+            data=[SimpleNamespace(embedding=[1.0] * dimensions) for _ in input],
+            usage=SimpleNamespace(total_tokens=7 * len(input)),
+        )
+
+    client = SimpleNamespace(embeddings=SimpleNamespace(create=create))
+    monkeypatch.setattr("app.services.llm.get_async_client", lambda: client)
+    with metered() as meter:
+        await OpenAIEmbedding("text-embedding-3-small", 4, batch_size=2).embed(
+            ["a", "b", "c"]
+        )
+    assert meter.llm_tokens == 21
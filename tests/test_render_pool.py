@@ -0,0 +1,31 @@
+import os
+from typing import Any
+
+import pytest
+
+from app.models.notes import MeetingSummary
+from app.services.notes import render_pdf_file
+from app.services.process_pool import BoundedProcessPool, PoolSaturated
+
+
+@pytest.mark.asyncio
+async def test_pdf_rendered_in_worker_process(tmp_path: Any) -> None:
+    pool = BoundedProcessPool(max_workers=1, queue_limit=0, name="pdf")
+    summary = MeetingSummary(executive_summary="Point budget", decisions=["OK"])
+    pdf_path = str(tmp_path / "meeting-report.pdf")
+    try:
+        future = pool.submit(
+            render_pdf_file, summary.model_dump(), "Bonjour.", pdf_path
+        )
+        # capacité atteinte : la soumission suivante est refusée
+        with pytest.raises(PoolSaturated):
+            pool.submit(render_pdf_file, summary.model_dump(), "Bonjour.", pdf_path)
+        assert await future == pdf_path
+    finally:
+        pool.shutdown()
+
+    with open(pdf_path, "rb") as f:
+        assert f.read(5) == b"%PDF-"
+    assert os.listdir(tmp_path) == ["meeting-report.pdf"]
+    assert pool.stats()["completed"] == 1
+    assert pool.stats()["rejected"] == 1
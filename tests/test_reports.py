@@ -0,0 +1,435 @@
+import asyncio
+import json
+import os
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.security import create_access_token, get_password_hash
+from app.models.notes import MeetingSummary
+from app.models.report import Report
+from app.models.user import User
+from app.services import artifacts, llm, notes
+from app.services.retention import retention
+from app.services.search import SearchUnavailable
+
+
+def _parse_sse(body: str) -> List[Dict[str, Any]]:
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append({"event": lines["event"], "data": json.loads(lines["data"])})
+    return events
+
+
+@pytest.mark.asyncio
+async def test_notes_stream_emits_sections_then_report(
+    async_client: AsyncClient, session: AsyncSession, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    completion = (
+        '{"executive_summary": "Point budget", "objectives": ["Valider"],'
+        ' "topics": [{"title": "Budget"}], "decisions": ["Budget validé"],'
+        ' "actions": [], "outcomes": [], "next_steps": []}'
+    )
+
+    async def fake_stream(*args: Any, **kwargs: Any) -> AsyncIterator[str]:
+        for i in range(0, len(completion), 5):
+            yield completion[i : i + 5]
+
+    monkeypatch.setattr(llm, "stream_chat_json", fake_stream)
+    monkeypatch.setattr(notes.settings, "NOTES_CACHE_ENABLED", False)
+
+    response = await async_client.post(
+        "/reports/notes/stream",
+        data={"transcript": "Bonjour, on valide le budget.", "language_hint": "fr"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = _parse_sse(response.text)
+    kinds = [e["event"] for e in events]
+    assert kinds[:7] == ["section"] * 7
+    assert kinds[-2:] == ["report", "done"]
+    assert events[0]["data"] == {"name": "executive_summary", "value": "Point budget"}
+    assert events[2]["data"]["value"][0]["title"] == "Budget"
+    report = events[-2]["data"]
+    assert report["summary"]["decisions"] == ["Budget validé"]
+    assert report["exports"]["markdown_url"].startswith("/reports/files/")
+    # enregistré par la session ouverte dans le générateur
+    assert await session.get(Report, report["report_id"]) is not None
+
+
+@pytest.mark.asyncio
+async def test_report_row_not_kept_when_indexing_fails(
+    async_client: AsyncClient, session: AsyncSession, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    async def fake_stream(*args: Any, **kwargs: Any) -> AsyncIterator[str]:
+        yield '{"executive_summary": "Point budget"}'
+
+    async def failing_index(*args: Any, **kwargs: Any) -> Any:
+        raise RuntimeError("index unavailable")
+
+    monkeypatch.setattr(llm, "stream_chat_json", fake_stream)
+    monkeypatch.setattr(notes.settings, "NOTES_CACHE_ENABLED", False)
+    monkeypatch.setattr("app.api.reports.index_report", failing_index)
+    count = select(func.count()).select_from(Report)
+    before = (await session.execute(count)).scalar()
+
+    response = await async_client.post(
+        "/reports/notes/stream", data={"transcript": "Bonjour."}
+    )
+    events = _parse_sse(response.text)
+    assert [e["event"] for e in events][-2:] == ["error", "done"]
+    # ligne du rapport et index dans la même transaction : rien n'est validé
+    assert (await session.execute(count)).scalar() == before
+
+
+async def _create_report(
+    async_client: AsyncClient,
+    monkeypatch: pytest.MonkeyPatch,
+    headers: Optional[Dict[str, str]] = None,
+) -> Dict[str, Any]:
+    async def fake_notes(*args: Any, **kwargs: Any) -> MeetingSummary:
+        return MeetingSummary(
+            executive_summary="Point budget", decisions=["Budget validé"]
+        )
+
+    monkeypatch.setattr("app.api.reports.generate_structured_notes", fake_notes)
+    response = await async_client.post(
+        "/reports/notes",
+        data={"transcript": "Bonjour.", "export_pdf": "true"},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    body: Dict[str, Any] = response.json()
+    return body
+
+
+@pytest.mark.asyncio
+async def test_exports_rendered_once_on_first_download(
+    async_client: AsyncClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    report = await _create_report(async_client, monkeypatch)
+    report_dir = os.path.join(settings.DATA_ROOT, report["report_id"])
+    # rien n'est rendu à la création du rapport
+    assert os.listdir(report_dir) == [artifacts.REPORT_SOURCE]
+
+    renders = 0
+    original = artifacts._write_markdown
+
+    def slow_write(storage: Any, source: Dict[str, Any], key: str) -> None:
+        nonlocal renders
+        renders += 1
+        time.sleep(0.05)
+        original(storage, source, key)
+
+    monkeypatch.setattr(artifacts, "_write_markdown", slow_write)
+
+    url = report["exports"]["markdown_url"]
+    responses = await asyncio.gather(*(async_client.get(url) for _ in range(5)))
+    assert [r.status_code for r in responses] == [200] * 5
+    assert renders == 1
+    assert "Budget validé" in responses[0].text
+    assert responses[0].headers["content-type"].startswith("text/markdown")
+
+    # servi depuis le disque ensuite
+    assert (await async_client.get(url)).status_code == 200
+    assert renders == 1
+
+    missing = await async_client.get(f"/reports/files/{report['report_id']}/other.txt")
+    assert missing.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_download_records_access_only_for_existing_reports(
+    async_client: AsyncClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    accessed: List[str] = []
+    monkeypatch.setattr(retention, "record_access", accessed.append)
+    report = await _create_report(async_client, monkeypatch)
+
+    unknown = await async_client.get("/reports/files/unknown/meeting-notes.md")
+    assert unknown.status_code == 404
+    assert accessed == []
+    ok = await async_client.get(report["exports"]["markdown_url"])
+    assert ok.status_code == 200
+    assert accessed == [report["report_id"]]
+
+
+@pytest.mark.asyncio
+async def test_download_is_cacheable_compressed_and_ranged(
+    async_client: AsyncClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    async def fake_notes(*args: Any, **kwargs: Any) -> MeetingSummary:
+        return MeetingSummary(executive_summary="Point budget")
+
+    monkeypatch.setattr("app.api.reports.generate_structured_notes", fake_notes)
+    transcript = " ".join(f"Phrase {i} sur le budget." for i in range(200))
+    response = await async_client.post(
+        "/reports/notes", data={"transcript": transcript}
+    )
+    url = response.json()["exports"]["markdown_url"]
+
+    gz = await async_client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert gz.status_code == 200
+    assert gz.headers["content-encoding"] == "gzip"
+    assert gz.headers["vary"] == "Accept-Encoding"
+    assert "immutable" in gz.headers["cache-control"]
+    assert int(gz.headers["content-length"]) < len(gz.content) / 4
+    assert gz.text.startswith("# Meeting Report")
+
+    revalidated = await async_client.get(
+        url, headers={"Accept-Encoding": "gzip", "If-None-Match": gz.headers["etag"]}
+    )
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+
+    plain = await async_client.get(url, headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["etag"] != gz.headers["etag"]
+    assert plain.content == gz.content
+
+    partial = await async_client.get(
+        url, headers={"Accept-Encoding": "identity", "Range": "bytes=2-15"}
+    )
+    assert partial.status_code == 206
+    assert partial.content == b"Meeting Report"
+    assert partial.headers["content-range"] == f"bytes 2-15/{len(plain.content)}"
+
+
+@pytest.mark.asyncio
+async def test_pdf_download_rejected_when_render_pool_saturated(
+    async_client: AsyncClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    from app.services.render_pool import pdf_pool
+
+    report = await _create_report(async_client, monkeypatch)
+    monkeypatch.setattr(pdf_pool, "_pending", pdf_pool.capacity)
+
+    response = await async_client.get(report["exports"]["pdf_url"])
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "10"
+
+
+@pytest.mark.asyncio
+async def test_list_reports_paginates_by_cursor(
+    async_client: AsyncClient, monkeypatch: pytest.MonkeyPatch, session: AsyncSession
+) -> None:
+    user = User(
+        username="reports-owner", hashed_password=get_password_hash("secret123")
+    )
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+    headers = {"Authorization": f"Bearer {create_access_token('test', str(user.id))}"}
+
+    created = [
+        (await _create_report(async_client, monkeypatch, headers))["report_id"]
+        for _ in range(5)
+    ]
+    await _create_report(async_client, monkeypatch)  # anonyme : hors listing
+
+    seen: List[str] = []
+    cursor = None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = await async_client.get("/reports", params=params, headers=headers)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page["items"]) <= 2
+        seen += [item["id"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+
+    assert seen == created[::-1]
+    assert "report.json" in page["items"][0]["artifacts"]
+
+    bad = await async_client.get("/reports", params={"cursor": "!!"}, headers=headers)
+    assert bad.status_code == 400
+    assert (await async_client.get("/reports")).status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_search_returns_ranked_segments_with_timestamps(
+    async_client: AsyncClient, monkeypatch: pytest.MonkeyPatch, session: AsyncSession
+) -> None:
+    user = User(username="search-owner", hashed_password=get_password_hash("secret123"))
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+    headers = {"Authorization": f"Bearer {create_access_token('test', str(user.id))}"}
+
+    async def fake_notes(*args: Any, **kwargs: Any) -> MeetingSummary:
+        return MeetingSummary(
+            executive_summary="Revue", decisions=["Migration validée"]
+        )
+
+    monkeypatch.setattr("app.api.reports.generate_structured_notes", fake_notes)
+    transcript = {
+        "text": "...",
+        "segments": [
+            {
+                "start": 0.0,
+                "end": 4.0,
+                "text": "Bonjour à tous.",
+                "speaker": "SPEAKER_00",
+            },
+            {
+                "start": 65.0,
+                "end": 70.0,
+                "text": "On lance la migration des serveurs.",
+                "speaker": "SPEAKER_01",
+            },
+        ],
+    }
+    response = await async_client.post(
+        "/reports/notes", data={"transcript": json.dumps(transcript)}, headers=headers
+    )
+    report_id = response.json()["report_id"]
+
+    response = await async_client.get(
+        "/reports/search", params={"q": "migration serv"}, headers=headers
+    )
+    assert response.status_code == 200
+    hits = response.json()["hits"]
+    assert len(hits) == 1
+    assert hits[0]["report_id"] == report_id
+    assert hits[0]["start"] == 65.0
+    assert hits[0]["speaker"] == "SPEAKER_01"
+    assert "[migration]" in hits[0]["snippet"]
+
+    response = await async_client.get(
+        "/reports/search", params={"q": "validee"}, headers=headers
+    )
+    assert [h["field"] for h in response.json()["hits"]] == ["decisions"]
+
+    # syntaxe FTS5 neutralisée, pas d'erreur SQL
+    response = await async_client.get(
+        "/reports/search", params={"q": 'NEAR("x" OR) *'}, headers=headers
+    )
+    assert response.status_code == 200
+
+    # moteur sans index plein texte : 501 plutôt qu'une erreur 500
+    async def unsupported(*args: Any, **kwargs: Any) -> Any:
+        raise SearchUnavailable("Full-text search is not supported on mysql")
+
+    monkeypatch.setattr("app.api.reports.search_chunks", unsupported)
+    response = await async_client.get(
+        "/reports/search", params={"q": "x"}, headers=headers
+    )
+    assert response.status_code == 501
+
+
+@pytest.mark.asyncio
+async def test_similar_finds_related_meetings(
+    async_client: AsyncClient, monkeypatch: pytest.MonkeyPatch, session: AsyncSession
+) -> None:
+    user = User(
+        username="similar-owner", hashed_password=get_password_hash("secret123")
+    )
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+    headers = {"Authorization": f"Bearer {create_access_token('test', str(user.id))}"}
+
+    summaries = iter(
+        [
+            MeetingSummary(executive_summary="Migration des serveurs vers le cloud"),
+            MeetingSummary(executive_summary="Recrutement de deux développeurs"),
+            MeetingSummary(executive_summary="Planning de la migration des serveurs"),
+        ]
+    )
+
+    async def fake_notes(*args: Any, **kwargs: Any) -> MeetingSummary:
+        return next(summaries)
+
+    monkeypatch.setattr("app.api.reports.generate_structured_notes", fake_notes)
+    ids = []
+    for text in ("On migre les serveurs.", "On recrute.", "Calendrier de migration."):
+        response = await async_client.post(
+            "/reports/notes", data={"transcript": text}, headers=headers
+        )
+        ids.append(response.json()["report_id"])
+
+    response = await async_client.get(
+        "/reports/similar", params={"q": "migration serveurs cloud"}, headers=headers
+    )
+    assert response.status_code == 200
+    assert response.json()["hits"][0]["report_id"] == ids[0]
+
+    response = await async_client.get(
+        "/reports/similar", params={"report_id": ids[0]}, headers=headers
+    )
+    hits = response.json()["hits"]
+    assert ids[0] not in [h["report_id"] for h in hits]
+    assert hits[0]["report_id"] == ids[2]
+
+    response = await async_client.get("/reports/similar", headers=headers)
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_notes_reuse_stored_transcript_without_retranscribing(
+    async_client: AsyncClient, monkeypatch: pytest.MonkeyPatch, session: AsyncSession
+) -> None:
+    calls = []
+
+    async def fake_transcribe(
+        content: bytes, filename: str, language: Optional[str]
+    ) -> Any:
+        calls.append(filename)
+        segments = [
+            {"start": 0.0, "end": 3.0, "text": "On valide le budget."},
+            {"start": 5.0, "end": 8.0, "text": "D'accord, je m'en occupe."},
+        ]
+        return "On valide le budget. D'accord, je m'en occupe.", segments, "fr"
+
+    async def fake_notes(*args: Any, **kwargs: Any) -> MeetingSummary:
+        assert kwargs["segments"][1]["speaker"] == "Speaker 2"
+        return MeetingSummary(executive_summary="Budget", decisions=["Budget validé"])
+
+    monkeypatch.setattr("app.api.reports.transcribe_audio", fake_transcribe)
+    monkeypatch.setattr("app.api.reports.generate_structured_notes", fake_notes)
+
+    user = User(
+        username="transcript-owner", hashed_password=get_password_hash("secret123")
+    )
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+    headers = {"Authorization": f"Bearer {create_access_token('test', str(user.id))}"}
+
+    response = await async_client.post(
+        "/reports/transcribe",
+        params={"diarization": "alternate", "gap_threshold": 1.0},
+        files={"file": ("meeting.wav", b"RIFF", "audio/wav")},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    transcript_id = response.json()["transcript_id"]
+
+    response = await async_client.post(
+        "/reports/notes", data={"transcript_id": transcript_id}, headers=headers
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert calls == ["meeting.wav"]
+    assert body["language"] == "fr"
+    assert body["transcript_text"].startswith("On valide le budget.")
+    assert body["exports"]["srt_url"] is not None
+
+    # transcript d'un autre utilisateur : même réponse qu'un id inconnu
+    response = await async_client.post(
+        "/reports/notes", data={"transcript_id": transcript_id}
+    )
+    assert response.status_code == 404
+    response = await async_client.post(
+        "/reports/notes", data={"transcript_id": "missing"}
+    )
+    assert response.status_code == 404
@@ -0,0 +1,180 @@
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+import pytest
+from sqlalchemy import select
+
+from app.models.report import Report, ReportChunk, StoredTranscript
+from app.services.retention import RetentionManager
+from app.services.storage import LocalStorage
+from tests.conftest import test_db
+
+DAY = 86400
+
+
+def _make_report(
+    root: str, report_id: str, age_days: float, source: int, render: int
+) -> str:
+    out_dir = os.path.join(root, report_id)
+    os.makedirs(out_dir)
+    with open(os.path.join(out_dir, "report.json"), "wb") as f:
+        f.write(b"x" * source)
+    if render:
+        with open(os.path.join(out_dir, "meeting-notes.md"), "wb") as f:
+            f.write(b"x" * render)
+        with open(os.path.join(out_dir, "meeting-notes.md.gz"), "wb") as f:
+            f.write(b"x" * (render // 4))
+    accessed = time.time() - age_days * DAY
+    os.utime(out_dir, (accessed, accessed))
+    return out_dir
+
+
+async def _add_rows(report_id: str, out_dir: str) -> None:
+    async with test_db.session() as db:
+        db.add(
+            Report(
+                id=report_id,
+                created_at=datetime.utcnow(),
+                source_path=os.path.join(out_dir, "report.json"),
+                artifacts={
+                    "report.json": {"path": "report.json", "bytes": 1},
+                    "meeting-notes.md": {"path": "meeting-notes.md", "bytes": 1},
+                },
+            )
+        )
+        db.add(
+            ReportChunk(report_id=report_id, kind="segment", text=f"chunk {report_id}")
+        )
+        await db.commit()
+
+
+@pytest.mark.asyncio
+async def test_size_policy_evicts_renders_then_least_recent_reports(
+    tmp_path: Any, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    root = str(tmp_path)
+    removed: List[int] = []
+
+    async def fake_remove_chunks(chunk_ids: List[int]) -> None:
+        removed.extend(chunk_ids)
+
+    monkeypatch.setattr("app.services.retention.remove_chunks", fake_remove_chunks)
+    # (âge en jours, octets source, octets rendus)
+    layout: Dict[str, tuple] = {
+        "ret-old": (30, 1000, 4000),
+        "ret-mid": (20, 1000, 4000),
+        "ret-new": (10, 1000, 4000),
+        "ret-fresh": (0, 1000, 4000),  # consulté à l'instant : période de grâce
+    }
+    for report_id, (age, source, render) in layout.items():
+        await _add_rows(report_id, _make_report(root, report_id, age, source, render))
+
+    manager = RetentionManager(
+        storage=LocalStorage(root),
+        max_bytes=14000,
+        max_age_days=0,
+        scan_batch=2,
+        delete_batch=10,
+        grace_sec=60,
+        session_factory=test_db.session,
+    )
+    # 4 rapports, 2 par passage : rien n'est supprimé avant la fin du parcours
+    await manager.tick()
+    assert not manager.scan_complete and manager.stats()["reports"] == 2
+    await manager.tick()
+    await manager.tick()
+    stats = manager.stats()
+    assert manager.scan_complete
+    # 4 x 6000 octets -> 14000 : exports des deux plus anciens évincés d'abord
+    assert stats["renders_evicted"] == 2 and stats["reports_deleted"] == 0
+    assert stats["bytes_reclaimed"] == 2 * 5000
+    assert stats["bytes_used"] == 14000
+    assert sorted(os.listdir(os.path.join(root, "ret-old"))) == ["report.json"]
+    assert "meeting-notes.md" in os.listdir(os.path.join(root, "ret-new"))
+
+    # ret-mid vient d'être consulté : protégé, ret-old et ret-new partent
+    manager.record_access("ret-mid")
+    manager.max_bytes = 6000
+    await manager.tick()
+    stats = manager.stats()
+    assert stats["renders_evicted"] == 3 and stats["reports_deleted"] == 2
+    assert sorted(os.listdir(root)) == ["ret-fresh", "ret-mid"]
+    assert stats["bytes_used"] == 1000 + 6000
+
+    async with test_db.session() as db:
+        assert await db.get(Report, "ret-old") is None
+        rows = await db.execute(
+            select(ReportChunk).where(ReportChunk.report_id == "ret-old")
+        )
+        assert rows.first() is None
+        rows = await db.execute(select(ReportChunk.id))
+        # vecteurs des deux rapports supprimés retirés de l'index
+        assert len(removed) == 2 and not set(removed) & set(rows.scalars())
+        evicted = await db.get(Report, "ret-mid")
+        assert list(evicted.artifacts) == ["report.json"]
+
+
+@pytest.mark.asyncio
+async def test_age_policy_deletes_stale_reports_and_transcripts(tmp_path: Any) -> None:
+    root = str(tmp_path)
+    await _add_rows("age-stale", _make_report(root, "age-stale", 400, 100, 0))
+    _make_report(root, "age-recent", 3, 100, 0)
+    async with test_db.session() as db:
+        for tid, age in (("age-t-old", 400), ("age-t-new", 0)):
+            created_at = datetime.utcnow() - timedelta(days=age)
+            db.add(
+                StoredTranscript(id=tid, created_at=created_at, text=tid, segments=[])
+            )
+        await db.commit()
+
+    manager = RetentionManager(
+        storage=LocalStorage(root),
+        max_bytes=0,
+        max_age_days=365,
+        scan_batch=10,
+        grace_sec=60,
+        session_factory=test_db.session,
+    )
+    await manager.tick()
+    assert sorted(os.listdir(root)) == ["age-recent"]
+    stats = manager.stats()
+    assert stats["reports_deleted"] == 1 and stats["bytes_reclaimed"] == 100
+    assert stats["transcripts_deleted"] == 1
+    async with test_db.session() as db:
+        assert await db.get(Report, "age-stale") is None
+        assert await db.get(StoredTranscript, "age-t-old") is None
+        assert await db.get(StoredTranscript, "age-t-new") is not None
+
+
+@pytest.mark.asyncio
+async def test_database_failure_keeps_files_and_retries(tmp_path: Any) -> None:
+    root = str(tmp_path)
+    await _add_rows("fail-stale", _make_report(root, "fail-stale", 400, 100, 0))
+    failures = [RuntimeError("database unavailable")]
+
+    def flaky_session() -> Any:
+        if failures:
+            raise failures.pop()
+        return test_db.session()
+
+    manager = RetentionManager(
+        storage=LocalStorage(root),
+        max_bytes=0,
+        max_age_days=365,
+        scan_batch=10,
+        grace_sec=60,
+        session_factory=flaky_session,
+    )
+    with pytest.raises(RuntimeError):
+        await manager.tick()
+    # rien n'est supprimé tant que la base n'a pas suivi
+    assert os.listdir(root) == ["fail-stale"]
+    assert manager.stats()["reports_deleted"] == 0
+
+    await manager.tick()
+    assert os.listdir(root) == []
+    assert manager.stats()["reports_deleted"] == 1
+    async with test_db.session() as db:
+        assert await db.get(Report, "fail-stale") is None
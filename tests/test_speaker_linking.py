@@ -0,0 +1,81 @@
+import numpy as np
+
+from app.services.speaker_linking import SpeakerLinker, link_windows
+
+
+def _voice(seed: int, dim: int = 64) -> np.ndarray:
+    return np.random.default_rng(seed).normal(size=dim)
+
+
+def _noisy(v: np.ndarray, seed: int, scale: float = 0.2) -> np.ndarray:
+    return v + scale * np.random.default_rng(seed).normal(size=v.shape)
+
+
+def test_same_speaker_linked_across_windows() -> None:
+    alice, bob = _voice(1), _voice(2)
+    linker = SpeakerLinker(threshold=0.55)
+    first = linker.link({"A": alice, "B": bob}, {"A": 10.0, "B": 5.0})
+    # labels locaux inversés dans la fenêtre suivante
+    second = linker.link(
+        {"SPEAKER_00": _noisy(bob, 3), "SPEAKER_01": _noisy(alice, 4)},
+        {"SPEAKER_00": 4.0, "SPEAKER_01": 6.0},
+    )
+    assert first == {"A": "SPEAKER_00", "B": "SPEAKER_01"}
+    assert second == {"SPEAKER_00": "SPEAKER_01", "SPEAKER_01": "SPEAKER_00"}
+
+
+def test_new_speaker_gets_new_global_label() -> None:
+    alice, carol = _voice(1), _voice(5)
+    linker = SpeakerLinker(threshold=0.55)
+    linker.link({"A": alice}, {"A": 10.0})
+    mapping = linker.link({"A": _noisy(alice, 6), "B": carol}, {"A": 3.0, "B": 3.0})
+    assert mapping == {"A": "SPEAKER_00", "B": "SPEAKER_01"}
+
+
+def test_greedy_tie_keeps_window_speakers_apart() -> None:
+    alice = _voice(1)
+    linker = SpeakerLinker(threshold=0.55)
+    linker.link({"A": alice}, {"A": 10.0})
+    # deux speakers locaux proches du même speaker global : seul le plus
+    # similaire y est relié, l'autre devient un nouveau speaker
+    mapping = linker.link(
+        {"X": _noisy(alice, 7, scale=0.3), "Y": _noisy(alice, 8, scale=0.1)},
+        {"X": 2.0, "Y": 2.0},
+    )
+    assert mapping == {"X": "SPEAKER_01", "Y": "SPEAKER_00"}
+
+
+def test_windows_stitched_on_meeting_timeline() -> None:
+    alice, bob = _voice(1), _voice(2)
+    windows = [
+        (
+            0.0,
+            (
+                [
+                    {"start": 0.5, "end": 20.0, "speaker": "SPEAKER_00"},
+                    {"start": 21.0, "end": 29.0, "speaker": "SPEAKER_01"},
+                ],
+                {"SPEAKER_00": alice, "SPEAKER_01": bob},
+            ),
+        ),
+        (
+            30.0,
+            (
+                # labels locaux inversés ; "SPEAKER_02" sans embedding
+                [
+                    {"start": 0.0, "end": 12.0, "speaker": "SPEAKER_00"},
+                    {"start": 12.5, "end": 12.8, "speaker": "SPEAKER_02"},
+                    {"start": 13.0, "end": 30.0, "speaker": "SPEAKER_01"},
+                ],
+                {"SPEAKER_00": _noisy(bob, 3), "SPEAKER_01": _noisy(alice, 4)},
+            ),
+        ),
+    ]
+    segments = link_windows(iter(windows), SpeakerLinker(threshold=0.55))
+    assert [(s["start"], s["end"], s["speaker"]) for s in segments] == [
+        (0.5, 20.0, "SPEAKER_00"),
+        (21.0, 29.0, "SPEAKER_01"),
+        (30.0, 42.0, "SPEAKER_01"),
+        (42.5, 42.8, "UNKNOWN"),
+        (43.0, 60.0, "SPEAKER_00"),
+    ]
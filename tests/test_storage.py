@@ -0,0 +1,254 @@
+import gzip
+import hashlib
+import io
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+import pytest
+from httpx import AsyncClient
+
+from app.core.config import settings
+from app.models.notes import MeetingSummary
+from app.services import storage as storage_module
+from app.services.retention import RetentionManager
+from app.services.storage import S3Storage
+from tests.conftest import test_db
+
+
+class _ClientError(Exception):
+    def __init__(self, code: str):
+        super().__init__(code)
+        self.response = {"Error": {"Code": code}}
+
+
+class _Body:
+    def __init__(self, data: bytes):
+        self._data = io.BytesIO(data)
+
+    def iter_chunks(self, chunk_size: int) -> Iterator[bytes]:
+        while chunk := self._data.read(chunk_size):
+            yield chunk
+
+    def close(self) -> None:
+        pass
+
+
+class FakeS3:
+    """Object store en mémoire : sous-ensemble de l'API du client boto3 utilisé."""
+
+    def __init__(self, page_size: int = 2):
+        self.objects: Dict[str, bytes] = {}
+        self.modified: Dict[str, datetime] = {}
+        self.puts = 0
+        self.uploads: Dict[str, Dict[int, bytes]] = {}
+        self.completed_multipart = 0
+        self.page_size = page_size
+
+    def _etag(self, data: bytes) -> str:
+        return f'"{hashlib.md5(data).hexdigest()}"'
+
+    def put_object(self, Bucket: str, Key: str, Body: bytes) -> Dict[str, Any]:
+        self.objects[Key] = Body
+        self.modified[Key] = datetime.now(timezone.utc)
+        self.puts += 1
+        return {"ETag": self._etag(Body)}
+
+    def create_multipart_upload(self, Bucket: str, Key: str) -> Dict[str, Any]:
+        upload_id = f"upload-{len(self.uploads)}"
+        self.uploads[upload_id] = {}
+        return {"UploadId": upload_id}
+
+    def upload_part(
+        self, Bucket: str, Key: str, UploadId: str, PartNumber: int, Body: Any
+    ) -> Dict[str, Any]:
+        data = Body.read() if hasattr(Body, "read") else Body
+        self.uploads[UploadId][PartNumber] = data
+        return {"ETag": self._etag(data)}
+
+    def list_parts(
+        self, Bucket: str, Key: str, UploadId: str, PartNumberMarker: int = 0
+    ) -> Dict[str, Any]:
+        parts = self.uploads[UploadId]
+        return {
+            "Parts": [
+                {"PartNumber": n, "Size": len(parts[n]), "ETag": self._etag(parts[n])}
+                for n in sorted(parts)
+                if n > PartNumberMarker
+            ],
+            "IsTruncated": False,
+        }
+
+    def generate_presigned_url(
+        self, operation: str, Params: Dict[str, Any], ExpiresIn: int
+    ) -> str:
+        return (
+            f"https://s3.test/{Params['Bucket']}/{Params['Key']}"
+            f"?uploadId={Params['UploadId']}&partNumber={Params['PartNumber']}"
+        )
+
+    def complete_multipart_upload(
+        self, Bucket: str, Key: str, UploadId: str, MultipartUpload: Dict[str, Any]
+    ) -> None:
+        parts = self.uploads.pop(UploadId)
+        numbers = [p["PartNumber"] for p in MultipartUpload["Parts"]]
+        self.objects[Key] = b"".join(parts[n] for n in numbers)
+        self.completed_multipart += 1
+
+    def abort_multipart_upload(self, Bucket: str, Key: str, UploadId: str) -> None:
+        self.uploads.pop(UploadId, None)
+
+    def get_object(
+        self, Bucket: str, Key: str, Range: Optional[str] = None
+    ) -> Dict[str, Any]:
+        if Key not in self.objects:
+            raise _ClientError("NoSuchKey")
+        data = self.objects[Key]
+        if Range:
+            first, last = Range[len("bytes=") :].split("-")
+            data = data[int(first) : int(last) + 1 if last else None]
+        return {"Body": _Body(data)}
+
+    def head_object(self, Bucket: str, Key: str) -> Dict[str, Any]:
+        if Key not in self.objects:
+            raise _ClientError("404")
+        data = self.objects[Key]
+        return {
+            "ContentLength": len(data),
+            "LastModified": _NOW,
+            "ETag": self._etag(data),
+        }
+
+    def list_objects_v2(
+        self,
+        Bucket: str,
+        Prefix: str = "",
+        Delimiter: Optional[str] = None,
+        ContinuationToken: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        keys = sorted(k for k in self.objects if k.startswith(Prefix))
+        if Delimiter:
+            keys = sorted(
+                {
+                    Prefix + k[len(Prefix) :].split(Delimiter)[0] + Delimiter
+                    for k in keys
+                }
+            )
+        start = int(ContinuationToken or 0)
+        page = keys[start : start + self.page_size]
+        result: Dict[str, Any] = {"IsTruncated": start + self.page_size < len(keys)}
+        if result["IsTruncated"]:
+            result["NextContinuationToken"] = str(start + self.page_size)
+        if Delimiter:
+            result["CommonPrefixes"] = [{"Prefix": p} for p in page]
+        else:
+            result["Contents"] = [
+                {
+                    "Key": k,
+                    "Size": len(self.objects[k]),
+                    "LastModified": self.modified.get(k, _NOW),
+                    "ETag": self._etag(self.objects[k]),
+                }
+                for k in page
+            ]
+        return result
+
+    def delete_objects(self, Bucket: str, Delete: Dict[str, Any]) -> None:
+        for obj in Delete["Objects"]:
+            self.objects.pop(obj["Key"], None)
+
+
+_NOW = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.mark.asyncio
+async def test_reports_round_trip_through_s3_storage(
+    async_client: AsyncClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    client = FakeS3()
+    s3 = S3Storage("bucket", "reports/", client=client, part_size=4096)
+    monkeypatch.setattr(storage_module, "_storage", s3)
+
+    async def fake_notes(*args: Any, **kwargs: Any) -> MeetingSummary:
+        return MeetingSummary(executive_summary="Point budget")
+
+    monkeypatch.setattr("app.api.reports.generate_structured_notes", fake_notes)
+    transcript = " ".join(f"Phrase {i} sur le budget." for i in range(2000))
+    response = await async_client.post(
+        "/reports/notes", data={"transcript": transcript}
+    )
+    report_id = response.json()["report_id"]
+    url = response.json()["exports"]["markdown_url"]
+    assert f"reports/{report_id}/report.json" in client.objects
+    assert not os.path.exists(os.path.join(settings.DATA_ROOT, report_id))
+
+    gz = await async_client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert gz.status_code == 200
+    assert gz.headers["content-encoding"] == "gzip"
+    assert gz.headers["vary"] == "Accept-Encoding"
+    assert gz.text.startswith("# Meeting Report")
+    # l'export (> part_size) est envoyé en multipart, sans fichier intermédiaire
+    assert client.completed_multipart >= 2 and not client.uploads
+    stored = client.objects[f"reports/{report_id}/meeting-notes.md"]
+    assert (
+        gzip.decompress(client.objects[f"reports/{report_id}/meeting-notes.md.gz"])
+        == stored
+    )
+
+    revalidated = await async_client.get(
+        url, headers={"Accept-Encoding": "gzip", "If-None-Match": gz.headers["etag"]}
+    )
+    assert revalidated.status_code == 304
+
+    partial = await async_client.get(
+        url, headers={"Accept-Encoding": "identity", "Range": "bytes=2-15"}
+    )
+    assert partial.status_code == 206
+    assert partial.content == b"Meeting Report"
+    assert partial.headers["content-range"] == f"bytes 2-15/{len(stored)}"
+    unsatisfiable = await async_client.get(
+        url, headers={"Accept-Encoding": "identity", "Range": f"bytes={len(stored)}-"}
+    )
+    assert unsatisfiable.status_code == 416
+
+    # listing paginé : tous les rapports et tous leurs objets
+    assert report_id in set(s3.list_prefixes())
+    keys: List[str] = [obj.key for obj in s3.list(f"{report_id}/")]
+    assert sorted(keys) == sorted(
+        k[len("reports/") :]
+        for k in client.objects
+        if k.startswith(f"reports/{report_id}/")
+    )
+    s3.delete_prefix(f"{report_id}/")
+    assert (await async_client.get(url)).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_s3_access_marker_shared_between_replicas(tmp_path: Any) -> None:
+    client = FakeS3()
+    for report_id in ("s3-read-daily", "s3-stale"):
+        client.objects[f"reports/{report_id}/report.json"] = b"{}"
+        client.modified[f"reports/{report_id}/report.json"] = datetime(
+            2020, 1, 1, tzinfo=timezone.utc
+        )
+
+    # téléchargements servis par un autre réplica : un seul PUT du marqueur
+    serving = S3Storage("bucket", "reports/", client=client)
+    serving.touch("s3-read-daily/")
+    serving.touch("s3-read-daily/")
+    assert client.puts == 1
+
+    manager = RetentionManager(
+        storage=S3Storage("bucket", "reports/", client=client),
+        max_bytes=0,
+        max_age_days=365,
+        scan_batch=10,
+        grace_sec=0,
+        session_factory=test_db.session,
+    )
+    await manager.tick()
+    assert sorted(client.objects) == [
+        "reports/s3-read-daily/.accessed",
+        "reports/s3-read-daily/report.json",
+    ]
+    assert manager.stats()["render_bytes"] == 0
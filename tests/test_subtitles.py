@@ -0,0 +1,22 @@
+from app.services.subtitles import iter_srt, iter_vtt
+
+SEGMENTS = [
+    {"start": 0.0, "end": 2.5, "text": "Bonjour  à tous.", "speaker": "SPEAKER_00"},
+    {"start": 2.5, "end": 2.5, "text": "   ", "speaker": "SPEAKER_01"},
+    {"start": 3661.2, "end": 3663.0, "text": "R&D <urgent> --> ok", "speaker": None},
+]
+
+
+def test_srt_numbers_cues_and_skips_empty_segments() -> None:
+    assert "".join(iter_srt(SEGMENTS)) == (
+        "1\n00:00:00,000 --> 00:00:02,500\nSPEAKER_00: Bonjour à tous.\n\n"
+        "2\n01:01:01,200 --> 01:01:03,000\nR&D <urgent> --> ok\n\n"
+    )
+
+
+def test_vtt_escapes_cue_text() -> None:
+    assert "".join(iter_vtt(SEGMENTS)) == (
+        "WEBVTT\n\n"
+        "00:00:00.000 --> 00:00:02.500\n<v SPEAKER_00>Bonjour à tous.\n\n"
+        "01:01:01.200 --> 01:01:03.000\nR&amp;D &lt;urgent> --&gt; ok\n\n"
+    )
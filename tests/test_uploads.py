@@ -0,0 +1,161 @@
+import os
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import update
+
+from app.models.notes import MeetingSummary
+from app.models.report import UploadSession
+from app.services import storage as storage_module
+from app.services.storage import S3Storage
+from app.services.uploads import purge_expired_uploads, upload_key
+from tests.conftest import test_db
+from tests.test_storage import FakeS3
+
+PART = 1024
+AUDIO = bytes(range(256)) * 10  # 2560 octets : 3 parties
+
+
+def _fake_transcribe(
+    calls: List[Dict[str, Any]],
+) -> Callable[..., Awaitable[Tuple[str, List[Dict[str, Any]], str]]]:
+    async def fake(
+        source: Any, filename: str, language: Optional[str]
+    ) -> Tuple[str, List[Dict[str, Any]], str]:
+        assert isinstance(source, str)  # chemin local, pas de contenu en mémoire
+        with open(source, "rb") as f:
+            calls.append({"path": source, "filename": filename, "content": f.read()})
+        return (
+            "Bonjour à tous.",
+            [{"start": 0.0, "end": 1.0, "text": "Bonjour à tous."}],
+            "fr",
+        )
+
+    return fake
+
+
+@pytest.mark.asyncio
+async def test_resumable_upload_relayed_by_api_then_notes_by_reference(
+    async_client: AsyncClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr("app.services.uploads.settings.UPLOAD_PART_SIZE", PART)
+    calls: List[Dict[str, Any]] = []
+    monkeypatch.setattr("app.api.reports.transcribe_audio", _fake_transcribe(calls))
+
+    async def fake_notes(*args: Any, **kwargs: Any) -> MeetingSummary:
+        return MeetingSummary(executive_summary="Réunion envoyée en parties")
+
+    monkeypatch.setattr("app.api.reports.generate_structured_notes", fake_notes)
+
+    created = await async_client.post(
+        "/reports/uploads", json={"filename": "meeting.m4a", "size": len(AUDIO)}
+    )
+    assert created.status_code == 201
+    session = created.json()
+    upload_id = session["upload_id"]
+    assert [p["size"] for p in session["parts"]] == [1024, 1024, 512]
+    assert session["parts"][1]["url"] == f"/reports/uploads/{upload_id}/parts/2"
+
+    # partie 2 d'abord, puis coupure : la reprise liste ce qui manque
+    ok = await async_client.put(
+        session["parts"][1]["url"], content=AUDIO[PART : 2 * PART]
+    )
+    assert ok.status_code == 200
+    short = await async_client.put(
+        f"/reports/uploads/{upload_id}/parts/3", content=b"x" * 10
+    )
+    assert short.status_code == 400
+    resumed = (await async_client.get(f"/reports/uploads/{upload_id}")).json()
+    assert [p["uploaded"] for p in resumed["parts"]] == [False, True, False]
+
+    incomplete = await async_client.post(f"/reports/uploads/{upload_id}/complete")
+    assert incomplete.status_code == 409
+    assert incomplete.json()["detail"]["missing_parts"] == [1, 3]
+
+    for part in resumed["parts"]:
+        if not part["uploaded"]:
+            start = (part["part_number"] - 1) * PART
+            await async_client.put(
+                part["url"], content=AUDIO[start : start + part["size"]]
+            )
+    done = await async_client.post(f"/reports/uploads/{upload_id}/complete")
+    assert done.status_code == 200
+    assert done.json()["status"] == "complete"
+
+    response = await async_client.post("/reports/notes", data={"upload_id": upload_id})
+    assert response.status_code == 200
+    assert (
+        response.json()["summary"]["executive_summary"] == "Réunion envoyée en parties"
+    )
+    assert calls[0]["content"] == AUDIO and calls[0]["filename"] == "meeting.m4a"
+    assert calls[0]["path"].endswith(".m4a")  # le fichier du stockage, lu sur place
+
+    assert (
+        await async_client.delete(f"/reports/uploads/{upload_id}")
+    ).status_code == 204
+    assert not os.path.exists(calls[0]["path"])
+    missing = await async_client.post("/reports/notes", data={"upload_id": upload_id})
+    assert missing.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_s3_upload_uses_presigned_parts_and_expires(
+    async_client: AsyncClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    client = FakeS3()
+    s3 = S3Storage("bucket", "reports/", client=client)
+    monkeypatch.setattr(storage_module, "_storage", s3)
+    monkeypatch.setattr("app.services.uploads.settings.UPLOAD_PART_SIZE", PART)
+    calls: List[Dict[str, Any]] = []
+    monkeypatch.setattr("app.api.reports.transcribe_audio", _fake_transcribe(calls))
+
+    session = (
+        await async_client.post(
+            "/reports/uploads", json={"filename": "call.wav", "size": len(AUDIO)}
+        )
+    ).json()
+    upload_id = session["upload_id"]
+    # le client envoie chaque partie directement au stockage
+    for part in session["parts"]:
+        assert part["url"].startswith("https://s3.test/bucket/reports/.uploads/")
+        n = part["part_number"]
+        storage_upload_id = part["url"].split("uploadId=")[1].split("&")[0]
+        client.upload_part(
+            Bucket="bucket",
+            Key=part["url"].split("https://s3.test/bucket/")[1].split("?")[0],
+            UploadId=storage_upload_id,
+            PartNumber=n,
+            Body=AUDIO[(n - 1) * PART : n * PART],
+        )
+    assert (
+        await async_client.post(f"/reports/uploads/{upload_id}/complete")
+    ).status_code == 200
+    assert client.objects[f"reports/.uploads/{upload_id}/audio.wav"] == AUDIO
+
+    response = await async_client.post(
+        "/reports/transcribe", params={"upload_id": upload_id}
+    )
+    assert response.status_code == 200
+    assert response.json()["transcript"]["text"] == "Bonjour à tous."
+    assert calls[0]["content"] == AUDIO
+    assert not os.path.exists(calls[0]["path"])  # copie locale supprimée après usage
+
+    # expiration : la rétention supprime la session et l'audio
+    async with test_db.session() as db:
+        session_row = await db.get(UploadSession, upload_id)
+        assert session_row is not None
+        key = upload_key(session_row)
+        await db.execute(
+            update(UploadSession)
+            .where(UploadSession.id == upload_id)
+            .values(expires_at=datetime.utcnow() - timedelta(seconds=1))
+        )
+        await db.commit()
+        assert await purge_expired_uploads(db, s3, datetime.utcnow(), limit=10) >= 1
+        await db.commit()
+        assert await db.get(UploadSession, upload_id) is None
+    assert f"reports/{key}" not in client.objects
+    gone = await async_client.get(f"/reports/uploads/{upload_id}")
+    assert gone.status_code == 404
@@ -0,0 +1,158 @@
+import threading
+from typing import Any
+
+import numpy as np
+import pytest
+
+from app.services import vector_index
+from app.services.embeddings import HashingEmbedding
+from app.services.vector_index import IndexReadOnly, VectorIndex
+
+
+def _clustered(n: int, dim: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(50, dim))
+    x = centers[rng.integers(0, 50, n)] + 0.3 * rng.normal(size=(n, dim))
+    out: np.ndarray = x / np.linalg.norm(x, axis=1, keepdims=True)
+    return out.astype(np.float32)
+
+
+def test_ivf_recall_persistence_and_incremental_add(tmp_path: Any) -> None:
+    dim = 32
+    data = _clustered(6000, dim)
+    owners = np.arange(6000) % 3
+    index = VectorIndex(str(tmp_path), dim, nprobe=8, delta_min=1000)
+    for start in range(0, 6000, 500):
+        index.add(
+            np.arange(start, start + 500),
+            data[start : start + 500],
+            owners[start : start + 500],
+        )
+    index.wait_compaction()
+    assert index.stats()["lists"] > 1  # compacté en segment IVF
+
+    queries = _clustered(50, dim, seed=1)
+    recall = []
+    for q in queries:
+        exact = set(np.argsort(-(data @ q))[:10])
+        ids, scores = index.search(q, k=10)
+        recall.append(len(exact & set(ids.tolist())) / 10)
+        assert np.all(np.diff(scores) <= 1e-6)
+    assert np.mean(recall) >= 0.9
+
+    ids, _ = index.search(queries[0], k=10, owner_id=2)
+    assert set(owners[ids]) == {2}
+
+    # rechargé depuis le disque (segment mappé + delta)
+    index.add(np.array([99_999]), queries[:1])
+    index.close()
+    reopened = VectorIndex(str(tmp_path), dim, nprobe=8, delta_min=1000)
+    assert len(reopened) == 6001
+    ids, scores = reopened.search(queries[0], k=1)
+    assert ids[0] == 99_999 and scores[0] > 0.99
+
+
+def test_removed_vectors_hidden_then_dropped_at_compaction(tmp_path: Any) -> None:
+    dim = 16
+    data = _clustered(3000, dim)
+    index = VectorIndex(str(tmp_path), dim, nprobe=64, delta_min=1000)
+    index.add(np.arange(3000), data)
+    index.compact()
+
+    dead = np.arange(0, 3000, 2)
+    index.remove(dead[:500])
+    assert index.stats()["tombstones"] == 500  # sous le seuil : pas de compaction
+    ids, _ = index.search(data[0], k=20)
+    assert ids[0] != 0 and not set(ids.tolist()) & set(dead[:500].tolist())
+
+    # suppressions persistées
+    index.close()
+    reopened = VectorIndex(str(tmp_path), dim, nprobe=64, delta_min=1000)
+    assert reopened.stats()["tombstones"] == 500
+    # id supprimé réutilisé par la base : le nouveau vecteur est visible
+    reopened.add(np.array([0]), data[1:2])
+    ids, _ = reopened.search(data[1], k=2)
+    assert set(ids.tolist()) == {0, 1}
+
+    # seuil atteint : vecteurs supprimés retirés du segment
+    reopened.remove(dead[500:])
+    reopened.wait_compaction()
+    stats = reopened.stats()
+    assert stats["tombstones"] == 0 and stats["main"] == 1501
+    ids, _ = reopened.search(data[3], k=10)
+    assert ids[0] == 3 and not np.isin(ids, dead[1:]).any()
+
+    reopened.remove(np.arange(3000))
+    reopened.compact()
+    assert len(reopened) == 0
+    assert len(reopened.search(data[1], k=5)[0]) == 0
+
+
+def test_owner_search_widens_probe_until_k_hits(tmp_path: Any) -> None:
+    dim = 16
+    data = _clustered(4000, dim)
+    index = VectorIndex(str(tmp_path), dim, nprobe=1, delta_min=1000)
+    index.add(np.arange(4000), data)
+    index.compact()
+    # propriétaire rare : ses vecteurs sont loin de la liste la plus proche
+    far = np.argsort(data @ data[0])[:5]
+    owners = np.zeros(4000, dtype=np.int32)
+    owners[far] = 7
+    index.remove(far)
+    index.add(far + 10_000, data[far], owners[far])
+    index.compact()
+
+    ids, _ = index.search(data[0], k=5, owner_id=7)
+    assert sorted(ids.tolist()) == sorted((far + 10_000).tolist())
+
+
+def test_compaction_runs_off_the_write_lock(
+    tmp_path: Any, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    dim = 16
+    data = _clustered(1200, dim)
+    started, release = threading.Event(), threading.Event()
+    assign_lists = vector_index.assign_lists
+
+    def slow_assign(*args: Any, **kwargs: Any) -> np.ndarray:
+        started.set()
+        release.wait(5)
+        return assign_lists(*args, **kwargs)
+
+    monkeypatch.setattr(vector_index, "assign_lists", slow_assign)
+    index = VectorIndex(str(tmp_path), dim, delta_min=1000)
+    index.add(np.arange(1000), data[:1000])  # seuil atteint : compaction lancée
+    assert started.wait(5)
+
+    # ajouts, suppressions et recherches pendant la compaction
+    index.add(np.arange(1000, 1200), data[1000:1200])
+    index.remove(np.array([0]))
+    ids, _ = index.search(data[1100], k=1)
+    assert ids[0] == 1100
+    release.set()
+    index.wait_compaction()
+
+    stats = index.stats()
+    assert (stats["main"], stats["delta"], stats["tombstones"]) == (1000, 200, 1)
+    ids, _ = index.search(data[0], k=1200)
+    assert len(ids) == 1199 and 0 not in ids.tolist()
+
+    # un second processus sur le même répertoire : lecture seule
+    other = VectorIndex(str(tmp_path), dim, delta_min=1000)
+    assert other.read_only and len(other) == 1200
+    with pytest.raises(IndexReadOnly):
+        other.add(np.array([5000]), data[:1])
+    index.close()
+    reopened = VectorIndex(str(tmp_path), dim, delta_min=1000)
+    assert not reopened.read_only
+    assert len(reopened) == 1200 and reopened.stats()["tombstones"] == 1
+
+
+def test_hashing_embedding_is_deterministic_and_normalized() -> None:
+    backend = HashingEmbedding(64)
+    a, b, c = backend.embed_sync(
+        ["budget du projet validé", "budget du projet validé", "recrutement équipe"]
+    )
+    assert np.allclose(a, b)
+    assert np.isclose(np.linalg.norm(a), 1.0)
+    assert a @ b > a @ c